@@ -8,28 +8,55 @@ import time
 import re
 import traceback
 import uuid
+import hashlib
 from datetime import datetime
 import threading
 import random
 import tempfile
-import PyPDF2
-from pdf2image import convert_from_path
+from typing import Dict, Any, Tuple
 from werkzeug.utils import secure_filename
-import pytesseract
-from app.services.flashcard_service import generate_flashcards_from_interview_result
+from app.services.flashcard_service import FlashcardService
 
 # Import services and utils
-from app.services.ai_service import check_ai_server_health, get_ai_response, get_structured_output, AI_MODEL
+from app.services.ai_service import check_ai_server_health, get_ai_response, get_structured_output, get_last_call_metrics, get_structured_output_metrics, get_model_routing, AI_MODEL
 from app.utils.skill_extractor import extract_skills_from_text
+from app.utils.turn_classifier import get_turn_classifier
+from app.utils.prompt_budget import get_prompt_metrics
 from app.services.interview_service import (
     create_interview_system_prompt,
     analyze_interview_responses,
     generate_interview_questions
 )
-from app.services.job_matching_service import match_job_to_skills, match_jobs_with_ai
+from app.services.job_matching_service import match_job_to_skills, match_jobs_with_ai, stream_jobs_with_ai
+from app.services.write_behind import get_write_behind_metrics
+from app.services.storage_codecs import codec_info
+from app.services.pdf_service import extract_pdf_text, pdf_source, PDF_CHAR_BUDGET
+from app.services.cv_service import analyze_cv_text, cv_analysis_fingerprint
+from app.services.interview_session_service import (
+    new_session,
+    session_from_messages,
+    record_ai_message,
+    record_user_message,
+    should_end_interview,
+    save_session,
+    session_turn,
+    MAX_AI_MESSAGES,
+    TECHNICAL_QUESTION_LIMIT
+)
+from app.services.question_pool_service import QuestionPoolService, QUESTION_POOL_PREWARM_MATCHES
+from app.services.conversation_context import build_context, schedule_summary_update
+from app.services.interview_summary_service import start_end_summary, get_end_summary_status, end_summary_listeners
+from app.services.interview_analysis_service import (
+    analyze_interviews,
+    INTERVIEW_ANALYSIS_CONCURRENCY,
+    INTERVIEW_ANALYSIS_MAX_CONCURRENCY,
+    INTERVIEW_ANALYSIS_MAX_BATCH
+)
+from app.services.task_queue import get_task_queue
+from app.services.model_warmup import get_model_warmup, MODEL_WARMUP_ENABLED
 
 # Import storage interfaces
-from app import get_job_storage, get_interview_storage, get_cv_storage, FIREBASE_ENABLED
+from app import get_job_storage, get_interview_storage, get_cv_storage, get_flashcard_storage, FIREBASE_ENABLED
 
 # Check if Firebase is enabled from environment
 os.environ['FIREBASE_ENABLED'] = os.environ.get('FIREBASE_ENABLED', 'false')
@@ -41,11 +68,24 @@ logger = logging.getLogger(__name__)
 job_storage = get_job_storage()
 interview_storage = get_interview_storage()
 cv_storage = get_cv_storage()
+flashcard_storage = get_flashcard_storage()
+
+# Interview questions are pre-generated per job when it is saved or shown in matches
+question_pool_service = QuestionPoolService(job_storage)
+job_storage.save_listeners.append(question_pool_service.warm)
+
+# Flashcards are generated as soon as an interview's end summary is ready
+flashcard_service = FlashcardService(flashcard_storage)
+end_summary_listeners.append(flashcard_service.prefetch)
+
+# Long-running AI work can be queued instead of holding the request open
+task_queue = get_task_queue()
+model_warmup = get_model_warmup()
 
 # Initialize Flask app
 app = Flask(__name__, static_folder='static')
 CORS(app)
-UPLOAD_FOLDER = tempfile.gettempdir()  # Use system temp directory
+UPLOAD_FOLDER = tempfile.gettempdir()  # Spill directory for very large PDF uploads
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 # Middleware to check AI server status before each request
@@ -66,6 +106,9 @@ def search_jobs():
     
     job_keyword = data.get('job_keyword', '')
     profile_text = data.get('profile_text', '')
+    # Paging is opt-in: without page_size every matching job is scored
+    page_size = int(data['page_size']) if data.get('page_size') else None
+    cursor = data.get('cursor')
     
     logger.info(f"Received search query: keyword={job_keyword}")
     logger.info(f"Profile text length: {len(profile_text)}")
@@ -90,8 +133,9 @@ def search_jobs():
                 "suggestion": "Please provide more details about your technical skills"
             }), 400
         
-        # Get jobs from storage
-        all_jobs = job_storage.list_jobs(keyword=job_keyword)
+        # Get the jobs (or one page of them) from storage, filtered server-side when supported
+        page = job_storage.list_jobs_page(keyword=job_keyword, limit=page_size, start_after=cursor)
+        all_jobs = page["jobs"]
         logger.info(f"Found {len(all_jobs)} jobs for keyword: {job_keyword}")
         
         # Match jobs to skills
@@ -118,7 +162,8 @@ def search_jobs():
         return jsonify({
             "results": results,
             "extracted_skills": skills,
-            "experience_level": experience
+            "experience_level": experience,
+            "next_cursor": page["next_cursor"]
         })
         
     except Exception as e:
@@ -191,6 +236,28 @@ def check_models_health():
     })
 
 
+@app.route('/api/models/routing', methods=['GET'])
+def model_routing():
+    """Endpoint to report which model each task runs on, with per task latency and output quality, and which models are loaded"""
+    return jsonify({**get_model_routing(), "residency": model_warmup.get_metrics(), "timestamp": time.time()})
+
+
+@app.route('/api/storage/metrics', methods=['GET'])
+def storage_metrics():
+    """Endpoint to report storage codec, write-behind queue and job read metrics"""
+    return jsonify({
+        "codecs": codec_info(),
+        "write_behind": get_write_behind_metrics(),
+        "jobs": job_storage.get_metrics() if hasattr(job_storage, 'get_metrics') else {},
+        "question_pools": question_pool_service.get_metrics(),
+        "tasks": task_queue.get_metrics(),
+        "flashcards": flashcard_service.get_metrics(),
+        "prompts": get_prompt_metrics(),
+        "structured_output": get_structured_output_metrics(),
+        "timestamp": time.time()
+    })
+
+
 @app.route('/api/match-jobs', methods=['GET', 'POST'])
 def match_jobs_with_ai_endpoint():
     """Endpoint to match jobs to profile text using AI"""
@@ -209,30 +276,125 @@ def match_jobs_with_ai_endpoint():
     
     if len(profile_text) < 10:
         return jsonify({"error": "Profile text is too short. Please provide more information."}), 400
+    
+    if wants_async(data):
+        return queued_response(submit_task("job_matching", {
+            "profile_text": profile_text,
+            "job_keyword": job_keyword,
+            "limit": limit
+        }))
+    
+    body, status_code = run_job_matching(profile_text, job_keyword, limit)
+    return jsonify(body), status_code
+
+
+def run_job_matching(profile_text: str, job_keyword: str, limit: int) -> Tuple[Dict[str, Any], int]:
+    """
+    Match all stored jobs to a profile
+    
+    Args:
+        profile_text: User profile description
+        job_keyword: Optional keyword to focus the matching
+        limit: Maximum number of matches
         
+    Returns:
+        Response body and HTTP status code
+    """
     try:
         all_jobs = job_storage.list_jobs()
         if not all_jobs:
-            return jsonify({
+            return {
                 "message": "No jobs found in database",
                 "matches": [],
                 "total_matches": 0 # Use snake_case
-            })
+            }, 200
         
         # match_jobs_with_ai now returns snake_case keys
         matches_snake_case = match_jobs_with_ai(profile_text, job_keyword, all_jobs)
         
         limited_matches = matches_snake_case[:limit]
         
-        return jsonify({
+        # The top matches are the jobs users open next; prepare their interview questions
+        for job in limited_matches[:QUESTION_POOL_PREWARM_MATCHES]:
+            question_pool_service.warm(job)
+        
+        return {
             "matches": limited_matches, # Already snake_case
             "total_matches": len(limited_matches), # Use snake_case
             "message": f"Found {len(limited_matches)} matching jobs"
-        })
+        }, 200
     
     except Exception as e:
         logger.error(f"Error matching jobs: {e}", exc_info=True)
-        return jsonify({"error": f"Error matching jobs: {str(e)}"}), 500
+        return {"error": f"Error matching jobs: {str(e)}"}, 500
+
+
+@app.route('/api/match-jobs/stream', methods=['GET', 'POST'])
+def stream_job_matches_endpoint():
+    """
+    Endpoint to match jobs to profile text using AI, streaming each match as the model writes it
+
+    Takes the same parameters as /api/match-jobs.
+
+    Returns:
+    Newline-delimited JSON, one {"match": job} line per match in the model's
+    order, then a {done, total_matches, order, extracted_user_skills, fallback,
+    stopped_at_limit} line. Generation stops once limit matches have been sent;
+    the model lists the user's skills after the matches, so a stream stopped at
+    the limit has stopped_at_limit true and an empty extracted_user_skills.
+    """
+    if request.method == 'POST':
+        data = request.json or {}
+    else:  # GET
+        data = request.args.to_dict()
+
+    profile_text = data.get('profile_text', '')
+    job_keyword = data.get('job_keyword', '')
+    limit = int(data.get('limit', 10))
+
+    if not profile_text:
+        return jsonify({"error": "Missing user profile description (profile_text)"}), 400
+
+    if len(profile_text) < 10:
+        return jsonify({"error": "Profile text is too short. Please provide more information."}), 400
+
+    all_jobs = job_storage.list_jobs()
+
+    def generate():
+        sent = []
+        summary = {"extracted_user_skills": [], "fallback": False}
+        stopped_at_limit = False
+        events = stream_jobs_with_ai(profile_text, job_keyword, all_jobs)
+        try:
+            for event in events:
+                if event["type"] == "done":
+                    summary = event
+                    break
+                sent.append(event["match"])
+                if len(sent) <= QUESTION_POOL_PREWARM_MATCHES:
+                    question_pool_service.warm(event["match"])
+                yield json.dumps({"match": event["match"]}, ensure_ascii=False) + "\n"
+                if len(sent) >= limit:
+                    stopped_at_limit = True
+                    break
+        except Exception as e:
+            logger.error(f"Error streaming job matches: {e}", exc_info=True)
+            yield json.dumps({"error": f"Error matching jobs: {str(e)}"}) + "\n"
+        finally:
+            # Closing the generator ends the model's stream, so no tokens are spent past the limit
+            events.close()
+
+        order = [job["id"] for job in sorted(sent, key=lambda x: x.get("match_percentage", 0), reverse=True)]
+        yield json.dumps({
+            "done": True,
+            "total_matches": len(sent),
+            "order": order,
+            "extracted_user_skills": summary.get("extracted_user_skills", []),
+            "fallback": summary.get("fallback", False),
+            "stopped_at_limit": stopped_at_limit
+        }, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 
 @app.route('/api/conversation', methods=['POST'])
@@ -243,18 +405,56 @@ def handle_conversation():
     if not data:
         return jsonify({"error": "No input data"}), 400
 
-    # Extract job information and conversation history
-    job = data.get('job')
-    messages = data.get('messages', [])
+    session_id = data.get('session_id')
+    if not session_id:
+        return run_conversation_turn(data)
+
+    # One turn per session at a time, from loading the session to saving the reply
+    with session_turn(session_id) as claimed:
+        if not claimed:
+            return jsonify({"error": "The previous message of this interview session is still being answered"}), 409
+        return run_conversation_turn(data)
+
+def run_conversation_turn(data: Dict[str, Any]):
+    """Answer one interview message (the caller holds the session turn, if any)"""
+    # Three request shapes:
+    #   {"session_id", "message"}  - continue a server-side session with just the new reply
+    #   {"job"}                    - start a server-side session
+    #   {"job", "messages"}        - legacy, full history sent by the client every turn
+    session_id = data.get('session_id')
+    persist_session = True
+
+    if session_id:
+        session = interview_storage.get_interview(session_id)
+        if not session or session.get('type') != 'session':
+            return jsonify({"error": f"Interview session {session_id} not found"}), 404
+        if session.get('status') != 'active':
+            return jsonify({"error": "Interview session has already ended"}), 409
+        job = session['job']
+    else:
+        job = data.get('job')
+        if not job:
+            return jsonify({
+                "id": str(uuid.uuid4()),
+                "isUser": False,
+                "message": "Error: Missing job information"
+            }), 400
 
-    if not job:
-        return jsonify({
-            "id": str(uuid.uuid4()),
-            "isUser": False,
-            "message": "Error: Missing job information"
-        }), 400
+        if 'messages' in data:
+            session = session_from_messages(job, data.get('messages') or [])
+            persist_session = False
+            if not session['messages']:
+                question_pool_service.warm(job)
+        else:
+            session = new_session(job)
+            # Questions come from the pre-generated pool, so starting never waits on generation
+            session['planned_questions'] = question_pool_service.draw(job, TECHNICAL_QUESTION_LIMIT)
 
     try:
+        if session_id and data.get('message'):
+            record_user_message(session, data['message'], data.get('message_id'))
+        messages = session['messages']
+
         # Create system prompt for interview context
         job_title = job.get('title', 'the position')
         company = job.get('company', 'our company')
@@ -262,108 +462,16 @@ def handle_conversation():
         required_skills = job.get('required_skills', [])
         experience_level = job.get('experience_level', 'mid')
 
-        # Count technical questions asked (not just messages)
-        technical_questions_asked = 0
-        previous_questions = []
-        ai_messages = []
-        user_messages = []
-
-        # Track vague answers from the user
-        vague_answer_count = 0
-        vague_answers = []
-
-        # Define vague response patterns
-        vague_patterns = [
-            r"(?i)yes i know",
-            r"(?i)^yes$",
-            r"(?i)i know that",
-            r"(?i)i am familiar with",
-            r"(?i)i have experience",
-            r"(?i)i understand",
-            r"(?i)sounds good",
-            r"(?i)of course",
-            r"(?i)definitely",
-            r"(?i)certainly",
-            r"(?i)absolutely",
-            r"(?i)^sure$",
-            r"(?i)^okay$",
-            r"(?i)^ok$",
-            r"(?i)^i do$"
-        ]
-
-        # Get all AI messages and user messages for tracking
-        for i, msg in enumerate(messages):
-            if not msg.get('isUser', True):
-                message_text = msg.get('message', '')
-                ai_messages.append(message_text)
-                # Count question marks in non-user messages
-                if "?" in message_text:
-                    # Add to technical questions if not just a greeting
-                    # More robust question detection
-                    is_technical = False
-                    for skill in required_skills:
-                        if skill.lower() in message_text.lower():
-                            is_technical = True
-                            break
-
-                    # Also count questions about programming concepts
-                    tech_keywords = ['code', 'programming', 'software', 'database', 'api',
-                                    'algorithm', 'function', 'class', 'object', 'method',
-                                    'framework', 'library', 'deploy', 'architecture']
-
-                    for keyword in tech_keywords:
-                        if keyword.lower() in message_text.lower():
-                            is_technical = True
-                            break
-
-                    if is_technical:
-                        technical_questions_asked += 1
-                        previous_questions.append(message_text)
-            else:
-                # Store user messages for evaluation later
-                user_message = msg.get('message', '')
-                user_messages.append(user_message)
-
-                # Check if this user message came right after an AI message with a question
-                if i > 0 and not messages[i-1].get('isUser', True) and "?" in messages[i-1].get('message', ''):
-                    # Check if the response is vague
-                    is_vague = False
-                    for pattern in vague_patterns:
-                        if re.search(pattern, user_message):
-                            is_vague = True
-                            break
-
-                    # Check if response is too short (less than 20 characters)
-                    if len(user_message.strip()) < 20:
-                        is_vague = True
-
-                    # Check if response lacks technical details
-                    contains_technical_detail = False
-                    for skill in required_skills:
-                        if skill.lower() in user_message.lower():
-                            contains_technical_detail = True
-                            break
-
-                    for keyword in tech_keywords:
-                        if keyword.lower() in user_message.lower():
-                            contains_technical_detail = True
-                            break
-
-                    # If AI asked a technical question but response lacks technical details
-                    if is_technical and not contains_technical_detail and len(user_message.strip()) < 50:
-                        is_vague = True
-
-                    if is_vague:
-                        vague_answer_count += 1
-                        vague_answers.append(user_message)
-
-        # Force the end of the interview after enough exchanges
-        # This is a fallback for cases where question counting doesn't work
-        force_end = len(ai_messages) >= 10
+        # Counters are maintained per message, so only the new reply was scanned
+        technical_questions_asked = session['technical_questions_asked']
+        previous_questions = session['previous_questions']
+        vague_answer_count = session['vague_answer_count']
+        vague_answers = session['vague_answers']
+        force_end = session['ai_message_count'] >= MAX_AI_MESSAGES
 
         # Log for debugging
         logger.info(f"Technical questions asked: {technical_questions_asked}")
-        logger.info(f"Total AI messages: {len(ai_messages)}")
+        logger.info(f"Total AI messages: {session['ai_message_count']}")
         logger.info(f"Force end: {force_end}")
         logger.info(f"Vague answers: {vague_answer_count}")
 
@@ -381,7 +489,8 @@ def handle_conversation():
         # Format the required skills as a comma-separated list
         skills_text = ', '.join(required_skills)
 
-        # Build the system prompt
+        # The system prompt only depends on the job, so it is byte-identical on every turn
+        # and the model server can reuse its KV-cache for it and the history that follows
         system_prompt = f"""
         You are an interviewer named PrepJobAI working at {company}, interviewing a candidate for a {experience_text} {job_title} position.
 
@@ -408,216 +517,39 @@ def handle_conversation():
         8. Always respond in English
         9. Keep track of vague answers and penalize them in the final evaluation
 
+        INTERVIEW STRUCTURE:
+        - You will ask a total of 5 technical questions throughout the interview
+        - After the 5th question and the candidate's response, end the interview
+        - The current interview state is given right before the candidate's latest message
+        """
+
+        # Per-turn state goes after the history, so only the tail of the prompt changes
+        turn_state = f"""
+        CURRENT INTERVIEW STATE:
+        - You have asked {technical_questions_asked} technical questions so far
+        - The candidate has given {vague_answer_count} vague answers so far
+
         Previous questions asked (DO NOT repeat these):
         {previous_questions}
 
         Vague answers given by the candidate (push for better answers on new questions):
         {vague_answers}
-
-        INTERVIEW STRUCTURE:
-        - You will ask a total of 5 technical questions throughout the interview
-        - You have asked {technical_questions_asked} technical questions so far
-        - The candidate has given {vague_answer_count} vague answers so far
-        - After the 5th question and the candidate's response, end the interview
+        """
+        if session.get('planned_questions'):
+            turn_state += f"""
+        Prepared questions for this interview (ask the ones not covered yet, in your own words):
+        {session['planned_questions']}
         """
 
         end_summary = {}
+        summary_future = None
         # End if 5+ technical questions or force end due to message count
-        if (technical_questions_asked >= 5 or force_end) and len(messages) >= 2 and messages[-1].get('isUser', False):
-            # Generate summary as JSON instead of string
-            summary_prompt = f"""
-            You are an AI evaluating a technical interview for a {job_title} position at {company}.
-
-            The interview has concluded, and now you need to evaluate the candidate based on their answers.
-
-            Required Skills for the position: {skills_text}
-
-            CRITICAL EVALUATION INSTRUCTIONS:
-            1. Carefully analyze the depth and specificity of answers
-            2. Penalize vague answers significantly - if the candidate gave {vague_answer_count} vague answers, their rating should be reduced by at least {vague_answer_count * 10} points
-            3. Look for specific examples and technical details in the answers
-            4. Be strict in evaluating whether the candidate demonstrated actual knowledge
-            5. Be especially critical of answers that just say "Yes, I know that" without elaboration
-            6. If most answers are vague or lack depth, the candidate should not pass
-            7. To pass, a candidate must demonstrate actual knowledge, not just claim to have it
-            8. Rating should reflect demonstrated skill, not just claimed experience
-
-            IMPORTANT: You must produce a JSON object with the following fields:
-            1. "passed": a boolean indicating if the candidate passed the interview (true/false)
-            2. "rating": a number from 1 to 100 representing the candidate's performance
-            3. "improvements": an array of strings with at least 2 specific areas where the candidate could improve
-            4. "summary": a detailed paragraph evaluating the candidate's performance
-            5. "learning_roadmap": an object with the following structure:
-               a. "key_areas": an array of 3-5 strings representing specific skills or topics the candidate should focus on
-               b. "resources": an array of objects, each representing a learning resource with:
-                  - "title": string - name of the resource
-                  - "type": string - one of "article", "course", "book", "video", or "practice"
-                  - "description": string - brief description of the resource
-                  - "difficulty": string - one of "beginner", "intermediate", or "advanced"
-                  - "url": string (optional) - a URL to a general learning platform like Coursera, Udemy, etc.
-               c. "suggested_timeline": string - a brief timeline for learning these skills
-
-            Based on the candidate's performance in the interview, create a personalized learning roadmap to help them improve in areas where they struggled.
-
-            Here is the conversation between the interviewer and the candidate to evaluate:
-            {json.dumps(messages, indent=2)}
-
-            Important evaluation factors:
-            - The candidate gave {vague_answer_count} vague answers during the interview
-            - Vague answers should significantly reduce their score
-            - If more than 2 answers were vague, the candidate should likely not pass
-
-            Analyze their answers carefully. Evaluate technical knowledge, communication skills, and relevant experience.
-            If they frequently said "I don't know" or gave vague or incorrect answers, they should receive a lower score and not pass.
-            If they demonstrated good understanding of the required skills with specific examples, they should receive a higher score and likely pass.
-
-            Return ONLY the JSON object with these fields and nothing else.
-            """
-
-            # Try to get a structured output for the summary
-            try:
-                # Define the schema for structured output
-                json_schema = {
-                    "type": "object",
-                    "properties": {
-                        "passed": {"type": "boolean"},
-                        "rating": {"type": "integer", "minimum": 1, "maximum": 100},
-                        "improvements": {"type": "array", "items": {"type": "string"}},
-                        "summary": {"type": "string"},
-                        "learning_roadmap": {
-                            "type": "object",
-                            "properties": {
-                                "key_areas": {"type": "array", "items": {"type": "string"}},
-                                "resources": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "title": {"type": "string"},
-                                            "type": {"type": "string", "enum": ["article", "course", "book", "video", "practice"]},
-                                            "description": {"type": "string"},
-                                            "difficulty": {"type": "string", "enum": ["beginner", "intermediate", "advanced"]},
-                                            "url": {"type": "string"}
-                                        },
-                                        "required": ["title", "type", "description", "difficulty"]
-                                    }
-                                },
-                                "suggested_timeline": {"type": "string"}
-                            },
-                            "required": ["key_areas", "resources", "suggested_timeline"]
-                        }
-                    },
-                    "required": ["passed", "rating", "improvements", "summary", "learning_roadmap"]
-                }
-
-                # Get structured JSON output
-                summary_response = get_structured_output(
-                    prompt=f"Evaluate this technical interview with {vague_answer_count} vague responses out of {len(user_messages)} total responses",
-                    system_prompt=summary_prompt,
-                    schema=json_schema
-                )
-
-
-                # Check if we got a valid response
-                if isinstance(summary_response, dict) and "passed" in summary_response:
-                   end_summary = summary_response
-
-                   # Ensure the rating reflects vague answers
-                   if vague_answer_count > 0:
-                       # Decrease rating based on vague answers
-                       end_summary["rating"] = max(0, min(end_summary["rating"], 100 - (vague_answer_count * 10)))
-
-                       # If 3 or more vague answers, candidate should not pass
-                       if vague_answer_count >= 3:
-                           end_summary["passed"] = False
-
-                   # Ensure improvements mention vague answers if they were an issue
-                   if vague_answer_count > 0 and not any("specific" in imp.lower() or "detail" in imp.lower() or "vague" in imp.lower() or "elaborate" in imp.lower() for imp in end_summary.get("improvements", [])):
-                       if "improvements" not in end_summary:
-                           end_summary["improvements"] = []
-                       end_summary["improvements"].append("Provide specific examples and details rather than vague answers")
-
-                   # Debug the learning_roadmap structure
-                   logger.info(f"Raw summary response: {json.dumps(summary_response, indent=2)}")
-
-                   if "learning_roadmap" not in end_summary:
-                       logger.error("learning_roadmap field is missing entirely")
-                   elif not end_summary["learning_roadmap"]:
-                       logger.error("learning_roadmap field is empty or null")
-                   elif "resources" not in end_summary["learning_roadmap"]:
-                       logger.error("resources field is missing from learning_roadmap")
-                   elif not end_summary["learning_roadmap"]["resources"]:
-                       logger.error("resources array is empty")
-                       # Force the resources array to contain expected data
-                       end_summary["learning_roadmap"]["resources"] = [
-                           {
-                               "title": f"{job_title} Technical Interview Guide",
-                               "type": "course",
-                               "description": f"A comprehensive course on {job_title} interview preparation",
-                               "difficulty": "intermediate",
-                               "url": "https://www.udemy.com"
-                           }
-                       ]
-                   else:
-                       logger.info(f"resources array contains {len(end_summary['learning_roadmap']['resources'])} items")
-                else:
-                    # Fallback if structured output fails
-                    logger.warning(f"Failed to get structured interview summary: {summary_response}")
-                    # Create a basic fallback summary with learning roadmap
-                    end_summary = {
-                        "passed": vague_answer_count < 3 and "don't know" not in " ".join(user_messages).lower().count(),
-                        "rating": max(0, 65 - (vague_answer_count * 10)),
-                        "improvements": [
-                            "Provide specific technical details rather than vague answers",
-                            "Share real-world examples from past experience",
-                            "Demonstrate deeper knowledge of the technologies mentioned"
-                        ],
-                        "summary": f"The candidate interviewed for the {job_title} position but gave {vague_answer_count} vague answers without sufficient technical detail. This suggests they may not have the depth of knowledge required for this role.",
-                        "learning_roadmap": {
-                            "key_areas": ["Technical fundamentals", "Interview preparation", "Practical experience"],
-                            "resources": [
-                                {
-                                    "title": f"{job_title} fundamentals",
-                                    "type": "course",
-                                    "description": "A course covering the core concepts needed for this role",
-                                    "difficulty": "beginner",
-                                    "url": "https://www.coursera.org"
-                                },
-                                {
-                                    "title": "Technical interview preparation",
-                                    "type": "book",
-                                    "description": "Guide to answering common technical questions",
-                                    "difficulty": "intermediate",
-                                    "url": "https://www.amazon.com"
-                                }
-                            ],
-                            "suggested_timeline": "2-4 weeks of focused study and practice"
-                        }
-                    }
-            except Exception as summary_error:
-                logger.error(f"Error generating structured summary: {summary_error}")
-                # Fallback in case of errors
-                end_summary = {
-                    "passed": vague_answer_count < 3,
-                    "rating": max(10, 70 - (vague_answer_count * 15)),
-                    "improvements": ["Provide specific examples rather than vague answers", "Demonstrate deeper knowledge of required technologies"],
-                    "summary": f"The candidate interviewed for the {job_title} position and gave {vague_answer_count} vague answers, suggesting they may not have the depth of knowledge required for this role.",
-                    "learning_roadmap": {
-                        "key_areas": ["Core technologies", "Communication skills", "Technical depth"],
-                        "resources": [
-                            {
-                                "title": "Technical documentation",
-                                "type": "article",
-                                "description": "Read official documentation for required technologies",
-                                "difficulty": "intermediate"
-                            }
-                        ],
-                        "suggested_timeline": "1-2 weeks of study"
-                    }
-                }
-
-            # Add to system prompt
-            system_prompt += "\n\nIMPORTANT: This is the FINAL message of the interview. You MUST end the interview now with a closing statement. DO NOT ask any more questions."
+        if should_end_interview(session):
+            # Evaluate in the background while the closing message is generated
+            summary_future = start_end_summary(interview_storage if persist_session else None, session)
+
+            # Add to the turn state
+            turn_state += "\n\nIMPORTANT: This is the FINAL message of the interview. You MUST end the interview now with a closing statement. DO NOT ask any more questions."
 
         # Generate AI response based on conversation state
         if not messages:
@@ -627,7 +559,9 @@ def handle_conversation():
             # Call get_ai_response with the right format
             ai_response = get_ai_response(
                 prompt=prompt,
-                system_prompt=system_prompt
+                system_prompt=system_prompt,
+                context=[{"role": "system", "content": turn_state}],
+                call_site="interview"
             )
         else:
             # Get the last message from the user
@@ -640,40 +574,35 @@ def handle_conversation():
                 user_input = last_message.get('message', '')
 
             # Check if the user gave a vague answer
-            is_vague_response = False
-            for pattern in vague_patterns:
-                if re.search(pattern, user_input):
-                    is_vague_response = True
-                    break
-
-            # Also check if response is too short
-            if len(user_input.strip()) < 20:
-                is_vague_response = True
+            signals = get_turn_classifier(required_skills).classify(user_input)
+            is_vague_response = signals["vague_phrase"] or signals["too_short"]
 
             # Check if the user said they don't know
-            if "dont know" in user_input.lower() or "don't know" in user_input.lower():
+            if signals["dont_know"]:
                 # Add special instruction to move on
-                system_prompt += "\n\nIMPORTANT: The candidate just indicated they don't know the answer. Acknowledge this briefly and move on to a completely different question. DO NOT repeat the same question or stay on the same topic."
+                turn_state += "\n\nIMPORTANT: The candidate just indicated they don't know the answer. Acknowledge this briefly and move on to a completely different question. DO NOT repeat the same question or stay on the same topic."
             elif is_vague_response:
                 # Add special instruction to ask for more details
-                system_prompt += f"\n\nIMPORTANT: The candidate just gave a vague answer: '{user_input}'. Politely but firmly ask for specific examples or more technical details. Tell them you need concrete examples to evaluate their knowledge. DO NOT accept this vague answer and move on. Press for specifics."
-
-            # Create context from previous messages
-            context = []
-            for msg in messages[:-1]:  # exclude the last message which we're handling separately
-                role = "user" if msg.get('isUser', True) else "assistant"
-                context.append({
-                    "role": role,
-                    "content": msg.get('message', '')
-                })
+                turn_state += f"\n\nIMPORTANT: The candidate just gave a vague answer: '{user_input}'. Politely but firmly ask for specific examples or more technical details. Tell them you need concrete examples to evaluate their knowledge. DO NOT accept this vague answer and move on. Press for specifics."
+
+            # Recent messages verbatim, older ones through the running summary, within the token budget
+            context = build_context(session, system_prompt + turn_state, user_input)
+            context.append({"role": "system", "content": turn_state})
 
             # Call get_ai_response with the context
             ai_response = get_ai_response(
                 prompt=user_input,
                 system_prompt=system_prompt,
-                context=context
+                context=context,
+                call_site="interview"
             )
 
+        # Prompt-eval figures show how much of the prompt the server could not serve from its cache
+        turn_metrics = get_last_call_metrics()
+        if turn_metrics:
+            logger.info(f"Interview turn prompt eval: {turn_metrics.get('prompt_eval_count')} tokens "
+                        f"in {turn_metrics.get('prompt_eval_ms')} ms")
+
         # Ensure we have an English response
         if ai_response.startswith("Przepraszamy") or "asystent AI" in ai_response:
             # This is an error message in Polish, return an English error
@@ -684,18 +613,42 @@ def handle_conversation():
                 "endSummary": {}
             })
 
+        if summary_future is not None:
+            if not persist_session:
+                # Legacy clients cannot poll, so they still get the summary in this response
+                end_summary = summary_future.result()
+            elif summary_future.done() and summary_future.exception() is None:
+                end_summary = summary_future.result()
+
         # Log for debugging what we're returning
         logger.info(f"Returning endSummary: {bool(end_summary)}")
         if end_summary:
             logger.info(f"EndSummary contains learning_roadmap: {'learning_roadmap' in end_summary}")
 
+        ai_message = record_ai_message(session, ai_response)
+        if turn_metrics:
+            session.setdefault('turn_metrics', []).append(turn_metrics)
+        if persist_session:
+            if summary_future is not None:
+                session['status'] = 'completed'
+            if end_summary:
+                session['end_summary'] = end_summary
+                session['end_summary_status'] = 'ready'
+            save_session(interview_storage, session)
+            schedule_summary_update(interview_storage, session)
+
         # Return the response with endSummary if needed
-        return jsonify({
-            "id": str(uuid.uuid4()),
+        response = {
+            "id": ai_message["id"],
             "isUser": False,
             "message": ai_response,
             "endSummary": end_summary
-        })
+        }
+        if persist_session:
+            response["sessionId"] = session['id']
+            # The summary and learning roadmap follow via GET /api/conversation/<session_id>/summary
+            response["summaryPending"] = summary_future is not None and not end_summary
+        return jsonify(response)
 
     except Exception as e:
         logger.error(f"Error in conversation handling: {e}", exc_info=True)
@@ -708,6 +661,54 @@ def handle_conversation():
 
         
 
+@app.route('/api/conversation/<session_id>/summary', methods=['GET'])
+def get_conversation_summary(session_id):
+    """Endpoint to poll for the end summary of an interview session"""
+    session = interview_storage.get_interview(session_id)
+    if not session or session.get('type') != 'session':
+        return jsonify({"error": f"Interview session {session_id} not found"}), 404
+
+    return jsonify(get_end_summary_status(interview_storage, session))
+
+
+@app.route('/api/interviews/analyze', methods=['POST'])
+def analyze_interviews_endpoint():
+    """
+    Endpoint to re-analyze many stored interviews at once
+
+    Expected JSON body:
+    {
+        "interview_ids": array of strings,
+        "concurrency": number (optional)
+    }
+
+    Returns:
+    Newline-delimited JSON, one {interview_id, status, analysis | error} line per
+    interview as it completes, then a {done, total, ok, failed, not_found} line
+    """
+    data = request.json or {}
+    interview_ids = data.get('interview_ids')
+
+    if not isinstance(interview_ids, list) or not interview_ids:
+        return jsonify({"error": "Missing list of interview IDs (interview_ids)"}), 400
+    if len(interview_ids) > INTERVIEW_ANALYSIS_MAX_BATCH:
+        return jsonify({"error": f"At most {INTERVIEW_ANALYSIS_MAX_BATCH} interviews can be analyzed per request"}), 400
+
+    try:
+        concurrency = int(data.get('concurrency', INTERVIEW_ANALYSIS_CONCURRENCY))
+    except (TypeError, ValueError):
+        return jsonify({"error": "concurrency must be a number"}), 400
+    concurrency = max(1, min(concurrency, INTERVIEW_ANALYSIS_MAX_CONCURRENCY))
+
+    def generate():
+        counts = {"ok": 0, "failed": 0, "not_found": 0}
+        for result in analyze_interviews(interview_storage, [str(i) for i in interview_ids], concurrency):
+            counts[result["status"]] += 1
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, "total": sum(counts.values()), **counts}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route("/api/extract-pdf", methods=["POST"])
 def extract_pdf():
     """Endpoint to extract text from uploaded PDF file and analyze it with AI"""
@@ -726,167 +727,107 @@ def extract_pdf():
         return jsonify({"error": "Invalid file format. Only PDF files are allowed."}), 400
     
     try:
-        # Save the file temporarily
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        file_bytes = file.read()
+    except Exception as e:
+        logger.error(f"Error reading uploaded file: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Error processing file: {str(e)}"}), 500
+    
+    if wants_async(request.form):
+        return queued_response(submit_task("cv_analysis", {"filename": filename}, blob=file_bytes))
+    
+    body, status_code = process_cv_upload(file_bytes, filename)
+    return jsonify(body), status_code
+
+
+def process_cv_upload(file_bytes: bytes, filename: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Extract and analyze an uploaded CV, reusing stored results for identical files
+    
+    Args:
+        file_bytes: PDF file content
+        filename: Sanitized file name (for logging)
+        
+    Returns:
+        Response body and HTTP status code
+    """
+    try:
+        # Identical uploads reuse the stored extraction and, if still valid, the analysis
+        content_hash = hashlib.sha256(file_bytes).hexdigest()
+        fingerprint = cv_analysis_fingerprint()
+        artifact = cv_storage.get_cv_artifact(content_hash)
+        
+        if artifact and artifact.get("analysis_fingerprint") == fingerprint:
+            logger.info(f"Serving cached CV analysis for {filename} ({content_hash[:12]})")
+            return {
+                "success": True,
+                "cached": True,
+                "text": artifact["text"][:5000] + ("..." if len(artifact["text"]) > 5000 or artifact["truncated"] else ""),
+                "page_count": artifact["page_count"],
+                "pages_extracted": artifact["pages_extracted"],
+                "ocr": artifact.get("ocr"),
+                "analysis": artifact["analysis"]
+            }, 200
         
-        # Extract text with pdfminer.six (you'll need to install this)
-        # pip install pdfminer.six
         try:
-            from pdfminer.high_level import extract_text
-            from pdfminer.pdfdocument import PDFDocument
-            from pdfminer.pdfparser import PDFParser
-            
-            # Extract text with more aggressive settings
-            text = ""
-            with open(filepath, 'rb') as file:
-                # Try with default settings first
-                text = extract_text(file)
-                
-                if not text.strip():
-                    # If that fails, try with more aggressive settings
-                    file.seek(0)  # Reset file pointer
-                    parser = PDFParser(file)
-                    doc = PDFDocument(parser)
-                    
-                    # Check if PDF has extraction restrictions
-                    if not doc.is_extractable:
-                        logger.warning(f"PDF {filename} has extraction restrictions")
-                    
-                    # Try again with more aggressive settings
-                    file.seek(0)  # Reset file pointer
-                    text = extract_text(file, laparams=None)  # Try without layout analysis
-                
-                if not text.strip():
-                    # Try with PyPDF2 as a fallback
-                    file.seek(0)  # Reset file pointer
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    fallback_text = ""
-                    for page_num in range(len(pdf_reader.pages)):
-                        page = pdf_reader.pages[page_num]
-                        page_text = page.extract_text()
-                        if page_text:
-                            fallback_text += page_text + "\n\n"
-                    
-                    if fallback_text.strip():
-                        text = fallback_text
+            if artifact:
+                # Text is content-addressed and still valid; only the analysis is stale
+                logger.info(f"Reusing extracted text for {filename}, analysis fingerprint changed")
+                extraction = {key: artifact.get(key) for key in ("text", "page_count", "pages_extracted", "truncated", "ocr")}
+            else:
+                # Extract text page by page from memory; only very large uploads are spilled to disk
+                with pdf_source(file_bytes, spill_dir=app.config['UPLOAD_FOLDER']) as source:
+                    extraction = extract_pdf_text(source, char_budget=PDF_CHAR_BUDGET)
+            text = extraction["text"]
             
             # If still no text, return an error
             if not text.strip():
                 logger.warning(f"Failed to extract text from {filename} with all methods")
-                return jsonify({
-                    "error": "Could not extract text from PDF. The file may be secured or contain only images.",
+                return {
+                    "error": "Could not extract text from PDF. The file may be secured or contain only unreadable images.",
                     "error_type": "extraction_failed",
                     "suggestions": [
                         "Try uploading a PDF with extractable text content",
                         "Use a PDF that was created directly from a word processor rather than a design program",
                         "Check if the PDF contains actual text rather than images of text"
                     ]
-                }), 200
+                }, 200
             
             # Process text with AI
-            logger.info(f"Successfully extracted {len(text)} characters from {filename}")
-            
-            # Prepare system prompt for CV analysis
-            system_prompt = """
-            You are a professional CV and resume analyzer. Your task is to extract key information 
-            from the given text which comes from a PDF resume or CV. Analyze the text carefully 
-            and extract the following information:
-            
-            1. Create a concise summary of the candidate's professional profile and experience
-            2. Identify the main professional role of the candidate based on their experience
-            3. Determine what type of job they might be seeking based on their background
-            4. Extract the most important technical and soft skills
-            5. Extract the most important technologies they've worked with
-            6. Extract programming languages they know
-            7. Extract frameworks they've used
-            8. Extract tools they're familiar with
-            9. Extract certifications they have
-            10. Extract major projects they've worked on
-            
-            Provide this information in a structured JSON format with the following keys:
-            - user_summary: A concise paragraph about the candidate's background and strengths
-            - user_role: An array of their primary and secondary professional roles
-            - job: The type of position they appear to be qualified for
-            - skills: A comma-separated string of their key skills (both technical and soft)
-            
-            Only include information that is actually present or can be confidently inferred from the text.
-            If the document is too long, summarize it and extract the most important information.
-            If the document is too short, provide a detailed analysis of the text.
-            If the document is in a different language, translate it to English and then analyze it.
-            If the document contains any personal information, remove it before analyzing.
-            If the document contains any sensitive information, remove it before analyzing.
-            If the document contains any confidential information, remove it before analyzing.
-            If the document contains any illegal information, remove it before analyzing.
-            If the document contains any offensive information, remove it before analyzing.
-            If the document contains any spam information, remove it before analyzing.
-            If the document contains any irrelevant information, remove it before analyzing.
-            If the document contains any duplicate information, remove it before analyzing.
-            If the document contains any misleading information, remove it before analyzing.
-            If the document contains any false information, remove it before analyzing.
-            If the document contains any outdated information, remove it before analyzing.
-            Provide this information in a structured format.
-            """
+            logger.info(f"Successfully extracted {len(text)} characters from {extraction['page_count']} pages of {filename}")
+            result = analyze_cv_text(text)
             
-            # Define schema for structured output
-            json_schema = {
-                "type": "object", 
-                "properties": {
-                    "user_summary": {"type": "string"},
-                    "user_role": {"type": "array", "items": {"type": "string"}},
-                    "job": {"type": "string"},
-                    "skills": {"type": "string"}
-                },
-                "required": ["user_summary", "user_role", "job", "skills"]
+            response = {
+                "success": True,
+                "text": text[:5000] + ("..." if len(text) > 5000 or extraction["truncated"] else ""),
+                "page_count": extraction["page_count"],
+                "pages_extracted": extraction["pages_extracted"],
+                "ocr": extraction["ocr"]
             }
+            response.update(result)
             
-            # Call AI service for CV analysis
-            structured_analysis = get_structured_output(
-                prompt=f"Analyze this resume/CV text and extract key information: {text[:3000]}...",
-                system_prompt=system_prompt,
-                schema=json_schema
-            )
+            # Only structured analyses are cached; raw fallbacks are retried next time
+            cv_storage.save_cv_artifact(content_hash, {
+                "text": text,
+                "page_count": extraction["page_count"],
+                "pages_extracted": extraction["pages_extracted"],
+                "truncated": extraction["truncated"],
+                "ocr": extraction["ocr"],
+                "analysis": result.get("analysis"),
+                "analysis_fingerprint": fingerprint if "analysis" in result else None
+            })
             
-            # Process and return the AI analysis
-            if isinstance(structured_analysis, dict) and "user_summary" in structured_analysis:
+            if "analysis" in result:
                 logger.info(f"Successfully analyzed CV for {filename}")
-                return jsonify({
-                    "success": True,
-                    "text": text[:5000] + ("..." if len(text) > 5000 else ""),
-                    "analysis": structured_analysis
-                })
-            else:
-                # Fallback if structured output fails
-                logger.warning(f"Problem with AI structured output: {structured_analysis}")
-                
-                # Try getting a regular AI response as fallback
-                ai_response = get_ai_response(
-                    prompt=f"Analyze this resume/CV text and extract key information: {text[:3000]}...",
-                    system_prompt=system_prompt
-                )
-                
-                return jsonify({
-                    "success": True,
-                    "text": text[:5000] + ("..." if len(text) > 5000 else ""),
-                    "raw_analysis": ai_response
-                })
+            return response, 200
                 
         except Exception as e:
             logger.error(f"Error in PDF processing: {str(e)}", exc_info=True)
-            return jsonify({"error": f"Error processing PDF: {str(e)}"}), 500
-        
-        finally:
-            # Remove temporary file
-            try:
-                if os.path.exists(filepath):
-                    os.unlink(filepath)
-            except Exception as cleanup_error:
-                logger.warning(f"Error removing temporary file: {str(cleanup_error)}")
+            return {"error": f"Error processing PDF: {str(e)}"}, 500
     
     except Exception as e:
         logger.error(f"Error handling uploaded file: {str(e)}", exc_info=True)
-        return jsonify({"error": f"Error processing file: {str(e)}"}), 500
+        return {"error": f"Error processing file: {str(e)}"}, 500
 
 
 @app.route("/api/generate-flashcards", methods=["POST"])
@@ -919,8 +860,11 @@ def generate_flashcards_endpoint():
             if field not in interview_result:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
 
-        # Generate flashcards
-        flashcard_set = generate_flashcards_from_interview_result(interview_result)
+        if wants_async(interview_result):
+            return queued_response(submit_task("flashcards", interview_result))
+
+        # Cached or prefetched after the end summary in most cases
+        flashcard_set = flashcard_service.get_flashcards(interview_result)
 
         return jsonify(flashcard_set), 201
 
@@ -928,6 +872,73 @@ def generate_flashcards_endpoint():
         logger.error(f"Error in flashcards endpoint: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+
+def wants_async(data=None) -> bool:
+    """Check whether the client asked for a queued task (?async=true or "async": true in the body)"""
+    value = request.args.get('async')
+    if value is None and data is not None:
+        value = data.get('async')
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def submit_task(task_type: str, payload: Dict[str, Any], blob: bytes = None) -> str:
+    """Queue a task, starting the workers on first use"""
+    task_queue.start()
+    return task_queue.submit(task_type, payload, blob=blob)
+
+def queued_response(task_id: str):
+    """202 response pointing the client at the task status and result"""
+    return jsonify({
+        "task_id": task_id,
+        "status": "queued",
+        "status_url": f"/api/tasks/{task_id}",
+        "result_url": f"/api/tasks/{task_id}/result"
+    }), 202
+
+def task_handler(run):
+    """
+    Adapt a (body, status_code) function to the task queue
+    
+    Server errors raise so the queue retries them; client errors are final results.
+    """
+    def handler(payload: Dict[str, Any], blob: bytes) -> Dict[str, Any]:
+        body, status_code = run(payload, blob)
+        if status_code >= 500:
+            raise RuntimeError(body.get("error", f"Task failed with status {status_code}"))
+        return {"status_code": status_code, "body": body}
+    return handler
+
+task_queue.register("cv_analysis", task_handler(
+    lambda payload, blob: process_cv_upload(blob, payload.get("filename", "upload.pdf"))))
+task_queue.register("job_matching", task_handler(
+    lambda payload, blob: run_job_matching(payload["profile_text"], payload.get("job_keyword", ""),
+                                           int(payload.get("limit", 10)))))
+task_queue.register("flashcards", task_handler(
+    lambda payload, blob: (flashcard_service.get_flashcards(payload), 201)))
+
+
+@app.route('/api/tasks/<task_id>', methods=['GET'])
+def get_task_status(task_id):
+    """Endpoint to check the status of a queued task"""
+    task = task_queue.get_task(task_id)
+    if not task:
+        return jsonify({"error": f"Task {task_id} not found"}), 404
+    return jsonify(task)
+
+
+@app.route('/api/tasks/<task_id>/result', methods=['GET'])
+def get_task_result(task_id):
+    """Endpoint to fetch the result of a queued task (202 while it is still pending)"""
+    task = task_queue.get_task(task_id, include_result=True)
+    if not task:
+        return jsonify({"error": f"Task {task_id} not found"}), 404
+
+    if task['status'] == 'succeeded':
+        result = task['result']
+        return jsonify(result['body']), result['status_code']
+    if task['status'] == 'failed':
+        return jsonify({"error": task['error'], "status": "failed", "task_id": task_id}), 500
+    return jsonify({"status": task['status'], "task_id": task_id, "attempts": task['attempts']}), 202
+
 # Serve static files
 @app.route('/', defaults={'path': 'index.html'})
 @app.route('/<path:path>')
@@ -953,6 +964,9 @@ if __name__ == '__main__':
     background_thread = threading.Thread(target=background_server_check, daemon=True)
     background_thread.start()
     
+    # Resume tasks queued or interrupted before the restart
+    task_queue.start()
+    
     # Check AI server status on startup
     status = check_ai_server_health(force_check=True)
     if status['is_online']:
@@ -961,5 +975,12 @@ if __name__ == '__main__':
     else:
         logger.warning("AI servers unavailable. Application will retry in background.")
     
+    # Load the routed models now so the first requests do not wait for a model load.
+    # With debug on, this script also runs in the reloader's parent process, which
+    # serves nothing; only the child it starts (WERKZEUG_RUN_MAIN set) warms up.
+    debug = True
+    if MODEL_WARMUP_ENABLED and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        model_warmup.start()
+    
     # Run the app
-    app.run(host='0.0.0.0', port=port, debug=True, threaded=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True) 
\ No newline at end of file
@@ -46,34 +46,30 @@ logger = logging.getLogger(__name__)
 FIREBASE_ENABLED = os.environ.get("FIREBASE_ENABLED", "false").lower() == "true"
 
 # Import storage interfaces after logging is configured
+# Interviews, CVs and flashcards are always stored locally; only jobs have a Firebase backend
+from app.services.local_storage import (
+    LocalInterviewStorage as InterviewStorage,
+    LocalCVStorage as CVStorage,
+    LocalFlashcardStorage as FlashcardStorage
+)
+
 if FIREBASE_ENABLED:
     try:
-        logger.info("Using Firebase storage")
-        from app.services.firebase_storage import (
-            FirebaseJobStorage as JobStorage,
-            FirebaseInterviewStorage as InterviewStorage,
-            FirebaseCVStorage as CVStorage
-        )
+        from app.services.firebase_storage import FirebaseJobStorage as JobStorage
+        logger.info("Using Firebase storage for jobs")
     except ImportError as e:
         logger.error(f"Error importing Firebase storage: {e}")
         logger.warning("Falling back to local storage")
-        from app.services.local_storage import (
-            LocalJobStorage as JobStorage,
-            LocalInterviewStorage as InterviewStorage,
-            LocalCVStorage as CVStorage
-        )
+        from app.services.local_storage import LocalJobStorage as JobStorage
 else:
     logger.info("Using local storage")
-    from app.services.local_storage import (
-        LocalJobStorage as JobStorage,
-        LocalInterviewStorage as InterviewStorage,
-        LocalCVStorage as CVStorage
-    )
+    from app.services.local_storage import LocalJobStorage as JobStorage
 
 # Storage instances
 _job_storage = None
 _interview_storage = None
 _cv_storage = None
+_flashcard_storage = None
 
 def get_job_storage():
     """Get job storage interface"""
@@ -96,10 +92,17 @@ def get_cv_storage():
         _cv_storage = CVStorage()
     return _cv_storage
 
+def get_flashcard_storage():
+    """Get flashcard storage interface"""
+    global _flashcard_storage
+    if _flashcard_storage is None:
+        _flashcard_storage = FlashcardStorage()
+    return _flashcard_storage
+
 # Create data directories
 def create_data_directories():
     """Create required data directories"""
-    dirs = ["data", "data/jobs", "data/interviews", "data/cv"]
+    dirs = ["data", "data/jobs", "data/interviews", "data/cv", "data/flashcards"]
     for d in dirs:
         os.makedirs(d, exist_ok=True)
 
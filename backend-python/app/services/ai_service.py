@@ -1,10 +1,17 @@
 import requests
 import json
 import re
+import os
 import logging
 import time
 import random
-from typing import Dict, List, Union, Optional, Any, Generator
+import threading
+from typing import Dict, List, Union, Optional, Any, Callable, Generator, Tuple
+
+from app.utils.json_repair import repair_json
+from app.utils.json_stream import JsonArrayItemParser
+from app.utils.prompt_budget import count_tokens, record_prompt_tokens
+from app.utils.schema_validation import coerce_to_schema, SchemaMismatch
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -17,6 +24,41 @@ OLLAMA_SERVERS = [
     "https://ollama4.kkhost.pl",
 ]
 
+# How long the server keeps the model (and its prompt cache) loaded after a call
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+# Context window; keep it identical across calls, changing it forces a model reload
+OLLAMA_NUM_CTX = int(os.environ["OLLAMA_NUM_CTX"]) if os.environ.get("OLLAMA_NUM_CTX") else None
+
+def _model_list(value: str) -> List[str]:
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+# Model tiers: models in order of preference (comma-separated in the environment)
+MODEL_TIERS = {
+    "small": _model_list(os.environ.get("AI_MODEL_SMALL", "qwen3:1.7b,qwen3:4b")),
+    "large": _model_list(os.environ.get("AI_MODEL_LARGE", AI_MODEL))
+}
+# Tiers tried next when none of a tier's models is installed on the server
+TIER_FALLBACKS = {"small": ["large"], "large": []}
+
+# Task (call site) -> tier or model name. Short, low-stakes tasks go to the small
+# model so the large one stays free for interview turns and evaluations.
+TASK_ROUTES = {
+    "job_matching": "small",
+    "interview_questions": "small",
+    "flashcards": "small",
+    "conversation_summary": "small",
+    "cv_analysis": "large",
+    "interview": "large",
+    "interview_analysis": "large",
+    "end_summary": "large"
+}
+DEFAULT_TASK_ROUTE = "large"
+# Overrides, e.g. AI_MODEL_ROUTES="flashcards=large,job_matching=qwen3:4b"
+for _route in _model_list(os.environ.get("AI_MODEL_ROUTES", "")):
+    if "=" in _route:
+        _task, _target = _route.split("=", 1)
+        TASK_ROUTES[_task.strip()] = _target.strip()
+
 CURRENT_SERVER = OLLAMA_SERVERS[0]
 last_server_switch_time = time.time()
 
@@ -119,33 +161,234 @@ def check_ai_server_health(force_check: bool = False) -> Dict[str, Any]:
 
     return ai_server_status
 
-def get_ai_response(
-    prompt: str,
-    system_prompt: Optional[str] = None,
-    context: Optional[List[Dict[str, str]]] = None,
-    format: Optional[Union[str, Dict[str, Any]]] = None,
-    options: Optional[Dict[str, Any]] = None
-) -> str:
+def _installed(model: str, available_models: List[str]) -> bool:
+    """Check a model name against the server's list ("qwen3" matches "qwen3:latest")"""
+    name = model if ":" in model else f"{model}:latest"
+    return model in available_models or name in available_models
+
+def route_candidates(task: Optional[str]) -> List[str]:
     """
-    Send a request to Ollama API and return the response
+    Get the models a task may run on, in order of preference
 
     Args:
-        prompt: User query
-        system_prompt: System instructions for the model
-        context: Conversation context
-        format: Optional "json" string or a JSON schema dictionary for structured output
-        options: Optional dictionary for Ollama options (e.g., temperature)
+        task: Call site name (e.g. "flashcards"); None is routed like any unknown task
 
     Returns:
-        Response from the AI model as a string
+        Models of the task's tier followed by its fallback tiers (or the
+        configured model followed by the large tier), without duplicates
     """
-    server_status = check_ai_server_health()
-    if not server_status['is_online']:
-        logger.error("get_ai_response called but no AI server is online.")
-        return "Przepraszamy, wszyscy asystenci AI są obecnie niedostępni. Prosimy spróbować ponownie za chwilę."
+    route = TASK_ROUTES.get(task or "", DEFAULT_TASK_ROUTE)
+    if route in MODEL_TIERS:
+        candidates = list(MODEL_TIERS[route])
+        for fallback in TIER_FALLBACKS.get(route, []):
+            candidates.extend(MODEL_TIERS.get(fallback, []))
+    else:
+        candidates = [route] + MODEL_TIERS["large"]
+    candidates.append(AI_MODEL)
+    return list(dict.fromkeys(candidates))
+
+def model_for_task(task: Optional[str]) -> str:
+    """
+    Pick the model for a task: the first candidate installed on the current server
+
+    Args:
+        task: Call site name
+
+    Returns:
+        Model name (AI_MODEL if no candidate is installed or the server is unknown)
+    """
+    status = ai_server_status if ai_server_status['last_checked'] else check_ai_server_health()
+    return resolve_model(task, status.get('available_models') or [])
+
+def resolve_model(task: Optional[str], available_models: List[str]) -> str:
+    """
+    Pick the model for a task on a server with the given models installed
+
+    Args:
+        task: Call site name
+        available_models: Model names reported by the server's /api/tags
+
+    Returns:
+        First installed candidate, or AI_MODEL if there is none (or the list is empty)
+    """
+    for model in route_candidates(task) if available_models else []:
+        if _installed(model, available_models):
+            return model
+    return AI_MODEL
+
+# Per task and model: calls, failures, latency, generated tokens and structured output outcomes
+_route_metrics: Dict[str, Dict[str, Dict[str, Any]]] = {}
+_route_metrics_lock = threading.Lock()
+
+def _model_metrics(task: Optional[str], model: str) -> Dict[str, Any]:
+    return _route_metrics.setdefault(task or "other", {}).setdefault(model, {
+        'calls': 0, 'failures': 0, 'total_ms': 0.0, 'eval_tokens': 0,
+        'structured': {'parsed': 0, 'repaired': 0, 'coerced': 0, 'failed': 0}
+    })
+
+def _record_route_call(task: Optional[str], model: str, elapsed: float, ok: bool) -> None:
+    last = getattr(_call_metrics, 'last', {})
+    with _route_metrics_lock:
+        metrics = _model_metrics(task, model)
+        if ok:
+            metrics['calls'] += 1
+            metrics['total_ms'] += elapsed * 1000
+            metrics['eval_tokens'] += last.get('eval_count') or 0
+        else:
+            metrics['failures'] += 1
+
+def get_model_routing() -> Dict[str, Any]:
+    """
+    Get the task to model mapping and per task, per model metrics for tuning it
+
+    Returns:
+        Dict with tiers, routes ({task: {route, model, candidates}}) and
+        metrics ({task: {model: {calls, failures, avg_ms, avg_eval_tokens, structured}}});
+        structured counts how often structured output had to be repaired or coerced, or failed
+    """
+    tasks = sorted(set(TASK_ROUTES) | set(_route_metrics))
+    routes = {
+        task: {
+            'route': TASK_ROUTES.get(task, DEFAULT_TASK_ROUTE),
+            'model': model_for_task(task),
+            'candidates': route_candidates(task)
+        }
+        for task in tasks
+    }
+    with _route_metrics_lock:
+        metrics = {
+            task: {
+                model: {
+                    'calls': m['calls'],
+                    'failures': m['failures'],
+                    'avg_ms': round(m['total_ms'] / m['calls']) if m['calls'] else None,
+                    'avg_eval_tokens': round(m['eval_tokens'] / m['calls']) if m['calls'] else None,
+                    'structured': dict(m['structured'])
+                }
+                for model, m in models.items()
+            }
+            for task, models in _route_metrics.items()
+        }
+    return {'tiers': MODEL_TIERS, 'routes': routes, 'metrics': metrics}
+
+# Called as listener(server, model, call_metrics) after each successful call
+model_call_listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+
+# Optional selector(model, default_server) -> server for the first attempt of a call
+_server_selector: Optional[Callable[[str, str], str]] = None
 
-    api_url = f"{CURRENT_SERVER}/api/chat"
+def set_server_selector(selector: Optional[Callable[[str, str], str]]) -> None:
+    """
+    Choose the server for each call's first attempt (e.g. one where the model is already loaded)
+
+    Args:
+        selector: Called with the model and CURRENT_SERVER, returns the server URL; None restores the default
+    """
+    global _server_selector
+    _server_selector = selector
+
+# Optional provider(model) -> keep_alive for calls that do not pass one (None means OLLAMA_KEEP_ALIVE)
+_keep_alive_provider: Optional[Callable[[str], Optional[str]]] = None
+
+def set_keep_alive_provider(provider: Optional[Callable[[str], Optional[str]]]) -> None:
+    """
+    Size the keep_alive of calls that do not set one (e.g. to the model's traffic)
+
+    Every call resets the server's unload timer to its keep_alive, so calls
+    must send the same value as the warm-up's keep-alive requests.
+
+    Args:
+        provider: Called with the model, returns a keep_alive such as "600s" or None; None restores the default
+    """
+    global _keep_alive_provider
+    _keep_alive_provider = provider
 
+def _keep_alive_for(model: str) -> str:
+    if _keep_alive_provider is not None:
+        try:
+            return _keep_alive_provider(model) or OLLAMA_KEEP_ALIVE
+        except Exception as e:
+            logger.warning(f"Keep-alive provider failed, using {OLLAMA_KEEP_ALIVE}: {e}")
+    return OLLAMA_KEEP_ALIVE
+
+def _select_server(model: str) -> str:
+    if _server_selector is not None:
+        try:
+            return _server_selector(model, CURRENT_SERVER) or CURRENT_SERVER
+        except Exception as e:
+            logger.warning(f"Server selector failed, using {CURRENT_SERVER}: {e}")
+    return CURRENT_SERVER
+
+def _attempt_target(call_site: Optional[str], model: Optional[str], attempt: int) -> Tuple[str, str]:
+    """
+    Pick the server and model for one attempt of a call
+
+    The first attempt may go to a server where the routed model is already
+    loaded (see set_server_selector). Retries go to CURRENT_SERVER after the
+    health check, so the model is resolved again against the models installed
+    there (AI_MODEL if none of the task's candidates is).
+
+    Args:
+        call_site: Call site name used for routing
+        model: Model requested by the caller, used as is on every attempt
+        attempt: Attempt number, starting at 0
+
+    Returns:
+        Server URL and model name
+    """
+    attempt_model = model or model_for_task(call_site)
+    server = _select_server(attempt_model) if attempt == 0 else CURRENT_SERVER
+    _call_metrics.model = attempt_model
+    return server, attempt_model
+
+def _notify_model_call(api_url: str, model: str) -> None:
+    server = api_url.rsplit("/api/", 1)[0]
+    for listener in model_call_listeners:
+        try:
+            listener(server, model, getattr(_call_metrics, 'last', {}))
+        except Exception as e:
+            logger.warning(f"Model call listener failed: {e}")
+
+# Timing figures of the last successful call, per thread
+_call_metrics = threading.local()
+
+def get_last_call_metrics() -> Dict[str, Any]:
+    """
+    Get token counts and timings reported by Ollama for this thread's last get_ai_response call
+
+    Returns:
+        Dict with prompt_eval_count, prompt_eval_ms, eval_count, eval_ms, load_ms
+        and total_ms, or an empty dict if the last call did not succeed
+    """
+    return getattr(_call_metrics, 'last', {})
+
+def _record_call_metrics(result: Dict[str, Any]) -> None:
+    """Keep the token counts and durations (nanoseconds) from an Ollama response"""
+    def ms(key):
+        return round(result[key] / 1e6, 1) if result.get(key) is not None else None
+
+    _call_metrics.last = {
+        'model': result.get('model'),
+        'prompt_eval_count': result.get('prompt_eval_count'),
+        'prompt_eval_ms': ms('prompt_eval_duration'),
+        'eval_count': result.get('eval_count'),
+        'eval_ms': ms('eval_duration'),
+        'load_ms': ms('load_duration'),
+        'total_ms': ms('total_duration')
+    }
+
+def _build_chat_payload(
+    prompt: str,
+    system_prompt: Optional[str],
+    context: Optional[List[Dict[str, str]]],
+    format: Optional[Union[str, Dict[str, Any]]],
+    options: Optional[Dict[str, Any]],
+    keep_alive: Optional[str],
+    num_ctx: Optional[int],
+    model: str,
+    stream: bool = False
+):
+    """Build the chat messages and the Ollama /api/chat payload"""
     effective_system_prompt = system_prompt if system_prompt else "You are a helpful assistant."
     if "NEVER include <think>" not in effective_system_prompt:
         effective_system_prompt += "\nNEVER include <think> tags in your responses."
@@ -164,21 +407,88 @@ def get_ai_response(
     }
     if options:
         payload_options.update(options)
+    if num_ctx or OLLAMA_NUM_CTX:
+        payload_options["num_ctx"] = num_ctx or OLLAMA_NUM_CTX
 
     payload = {
-        "model": AI_MODEL,
+        "model": model,
         "messages": messages,
         "options": payload_options,
-        "stream": False
+        "stream": stream,
+        "keep_alive": keep_alive or OLLAMA_KEEP_ALIVE
     }
 
     if format:
         payload["format"] = format
 
+    return messages, payload
+
+def get_ai_response(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    context: Optional[List[Dict[str, str]]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    options: Optional[Dict[str, Any]] = None,
+    keep_alive: Optional[str] = None,
+    num_ctx: Optional[int] = None,
+    call_site: Optional[str] = None,
+    model: Optional[str] = None
+) -> str:
+    """
+    Send a request to Ollama API and return the response
+
+    Args:
+        prompt: User query
+        system_prompt: System instructions for the model
+        context: Conversation context
+        format: Optional "json" string or a JSON schema dictionary for structured output
+        options: Optional dictionary for Ollama options (e.g., temperature)
+        keep_alive: How long the model stays loaded after the call (default: the keep-alive
+            provider's value for the model, see set_keep_alive_provider, else OLLAMA_KEEP_ALIVE)
+        num_ctx: Context window size in tokens (default OLLAMA_NUM_CTX, or the server's default)
+        call_site: Name of the calling feature; picks the model (see TASK_ROUTES) and keys the metrics
+        model: Optional model overriding the task's route
+
+    Returns:
+        Response from the AI model as a string
+    """
+    _call_metrics.last = {}
+    _call_metrics.model = model or model_for_task(call_site)
+    start_time = time.time()
+    try:
+        return _get_ai_response(prompt, system_prompt, context, format, options, keep_alive, num_ctx, call_site, model)
+    finally:
+        # Recorded for the model of the last attempt, which may differ after a server switch
+        _record_route_call(call_site, _call_metrics.model, time.time() - start_time,
+                           bool(getattr(_call_metrics, 'last', {})))
+
+def _get_ai_response(
+    prompt: str,
+    system_prompt: Optional[str],
+    context: Optional[List[Dict[str, str]]],
+    format: Optional[Union[str, Dict[str, Any]]],
+    options: Optional[Dict[str, Any]],
+    keep_alive: Optional[str],
+    num_ctx: Optional[int],
+    call_site: Optional[str],
+    model: Optional[str]
+) -> str:
+    """Send the chat request to the current server, retrying on failure (see get_ai_response)"""
+    server_status = check_ai_server_health()
+    if not server_status['is_online']:
+        logger.error("get_ai_response called but no AI server is online.")
+        return "Przepraszamy, wszyscy asystenci AI są obecnie niedostępni. Prosimy spróbować ponownie za chwilę."
+
+    messages, payload = _build_chat_payload(prompt, system_prompt, context, format, options, keep_alive, num_ctx,
+                                            model or AI_MODEL)
+
     max_retries = 2
     for attempt in range(max_retries + 1):
+        server, payload["model"] = _attempt_target(call_site, model, attempt)
+        payload["keep_alive"] = keep_alive or _keep_alive_for(payload["model"])
+        api_url = f"{server}/api/chat"
         try:
-            logger.info(f"Sending request to API: {api_url} (model: {AI_MODEL}, format: {type(format).__name__ if format else 'None'}, attempt {attempt+1}/{max_retries+1})")
+            logger.info(f"Sending request to API: {api_url} (model: {payload['model']}, format: {type(format).__name__ if format else 'None'}, attempt {attempt+1}/{max_retries+1})")
             logger.debug(f"Payload: {json.dumps(payload, indent=2)}")
 
             response = requests.post(api_url, json=payload, timeout=90)
@@ -194,13 +504,20 @@ def get_ai_response(
                     if len(content) < 50:
                         logger.info(f"Short response from AI: '{content}'")
 
+                    _record_call_metrics(result)
+                    _notify_model_call(api_url, payload["model"])
+                    record_prompt_tokens(
+                        call_site or "other",
+                        sum(count_tokens(m["content"]) for m in messages),
+                        result.get("prompt_eval_count")
+                    )
+
                     return re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL).strip()
                 except json.JSONDecodeError as e_json_decode:
                     logger.error(f"Ollama API success (200) but failed to decode JSON response: {e_json_decode}. Response text: {response.text[:500]}")
                     if attempt < max_retries:
                         logger.info("Retrying due to JSON decode error on successful status...")
                         check_ai_server_health(force_check=True)
-                        api_url = f"{CURRENT_SERVER}/api/chat"
                         continue
                     return "Przepraszamy, asystent AI zwrócił odpowiedź w nieoczekiwanym formacie."
 
@@ -208,7 +525,6 @@ def get_ai_response(
                 logger.error(f"Ollama API error: {response.status_code}, Response: {response.text[:500]}")
                 if attempt < max_retries:
                     check_ai_server_health(force_check=True)
-                    api_url = f"{CURRENT_SERVER}/api/chat"
                     logger.info(f"Retrying with server: {CURRENT_SERVER} after HTTP error.")
                     continue
                 return f"Przepraszamy, wystąpił błąd komunikacji z asystentem AI (kod {response.status_code})."
@@ -217,7 +533,6 @@ def get_ai_response(
             logger.error(f"Timeout (90s) during Ollama API communication (attempt {attempt+1})")
             if attempt < max_retries:
                 check_ai_server_health(force_check=True)
-                api_url = f"{CURRENT_SERVER}/api/chat"
                 logger.info(f"Retrying with server: {CURRENT_SERVER} after timeout.")
                 continue
             return "Przepraszamy, upłynął limit czasu oczekiwania na odpowiedź od asystenta AI."
@@ -226,17 +541,19 @@ def get_ai_response(
             logger.error(f"Generic exception during Ollama API call (attempt {attempt+1}): {e}", exc_info=True)
             if attempt < max_retries:
                 check_ai_server_health(force_check=True)
-                api_url = f"{CURRENT_SERVER}/api/chat"
                 logger.info(f"Retrying with server: {CURRENT_SERVER} after generic exception.")
                 continue
             return f"Przepraszamy, wystąpił nieoczekiwany błąd: {str(e)}."
 
     return "Nie udało się uzyskać odpowiedzi od asystenta AI po wielu próbach."
 
+STRUCTURED_OUTPUT_INSTRUCTION = "\n\nYour response MUST be a single, valid JSON object that strictly adheres to the provided schema. Do not add any explanatory text before or after the JSON object."
+
 def get_structured_output(
     prompt: str,
     system_prompt: str,
-    schema: Dict[str, Any]
+    schema: Dict[str, Any],
+    call_site: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Get structured JSON output from the AI model using Ollama's format parameter.
@@ -245,11 +562,12 @@ def get_structured_output(
         prompt: User query
         system_prompt: System instructions for the model (should guide towards JSON output)
         schema: The JSON schema dictionary to pass to Ollama's 'format' parameter.
+        call_site: Name of the calling feature for the prompt token metrics
 
     Returns:
         Parsed JSON data as a dictionary, or an error dictionary if parsing fails.
     """
-    system_prompt_for_json = f"{system_prompt}\n\nYour response MUST be a single, valid JSON object that strictly adheres to the provided schema. Do not add any explanatory text before or after the JSON object."
+    system_prompt_for_json = f"{system_prompt}{STRUCTURED_OUTPUT_INSTRUCTION}"
 
     ollama_options = {"temperature": 0.0}
 
@@ -257,9 +575,50 @@ def get_structured_output(
         prompt,
         system_prompt_for_json,
         format=schema,
-        options=ollama_options
+        options=ollama_options,
+        call_site=call_site
     )
+    return _parse_structured_response(raw_response_content, schema, call_site)
+
+# Structured output outcomes per call site: parsed as-is, repaired locally, coerced to the schema, failed
+_structured_metrics: Dict[str, Dict[str, int]] = {}
+_structured_metrics_lock = threading.Lock()
 
+def _count_structured(call_site: Optional[str], outcome: str) -> None:
+    with _structured_metrics_lock:
+        counts = _structured_metrics.setdefault(call_site or "other", {
+            'parsed': 0, 'repaired': 0, 'coerced': 0, 'failed': 0
+        })
+        counts[outcome] += 1
+    model = getattr(_call_metrics, 'model', None)
+    if model:
+        with _route_metrics_lock:
+            _model_metrics(call_site, model)['structured'][outcome] += 1
+
+def get_structured_output_metrics() -> Dict[str, Dict[str, int]]:
+    """
+    Get structured output outcomes per call site
+
+    Returns:
+        {call_site: {parsed, repaired, coerced, failed}}; repaired and coerced
+        responses were salvaged locally instead of being generated again
+    """
+    with _structured_metrics_lock:
+        return {site: dict(counts) for site, counts in _structured_metrics.items()}
+
+def _parse_structured_response(raw_response_content: str, schema: Optional[Dict[str, Any]] = None,
+                               call_site: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse the model's structured output, repairing it and fitting it to the schema where needed
+
+    Args:
+        raw_response_content: Text returned by the model (or a user-facing error message)
+        schema: The JSON schema the model was given, used to validate and coerce the result
+        call_site: Name of the calling feature for the structured output metrics
+
+    Returns:
+        Parsed JSON data as a dictionary, or an error dictionary if parsing fails.
+    """
     error_response_template = {
         "error": "Failed to get valid structured output",
         "details": "",
@@ -271,41 +630,207 @@ def get_structured_output(
     if not raw_response_content:
         logger.error("get_structured_output: Received empty content from get_ai_response.")
         error_response_template["details"] = "Received empty content from AI service"
+        _count_structured(call_site, 'failed')
         return error_response_template
 
     if raw_response_content.startswith("Przepraszamy") or raw_response_content.startswith("Nie udało się"):
         logger.error(f"get_structured_output: AI service returned a user-facing error message: {raw_response_content}")
         error_response_template["details"] = "AI service returned a non-JSON error message"
+        _count_structured(call_site, 'failed')
         return error_response_template
 
+    outcome = 'parsed'
     try:
         parsed_json = json.loads(raw_response_content)
-        logger.info("Successfully parsed structured JSON output from AI.")
-        return parsed_json
-
     except json.JSONDecodeError as e_direct_parse:
-        logger.warning(f"Failed to directly parse AI response as JSON (expected with Ollama's schema format): {e_direct_parse}. Raw content snippet: '{raw_response_content[:500]}...'")
-
-        match = re.search(r"```json\s*(\{[\s\S]*?\})\s*```", raw_response_content)
-        if match:
-            json_str = match.group(1)
-            logger.info("Found a ```json``` block, attempting to parse it as fallback.")
-            try:
-                parsed_json_fallback = json.loads(json_str)
-                logger.info("Successfully parsed JSON from ```json``` block (fallback).")
-                return parsed_json_fallback
-            except json.JSONDecodeError as e_block_parse:
-                logger.error(f"Failed to parse JSON from ```json``` block (fallback): {e_block_parse}. Block: '{json_str[:500]}...'")
-                error_response_template["error"] = "Failed to parse JSON from extracted block"
-                error_response_template["details"] = str(e_block_parse)
-                return error_response_template
-
-        logger.error(f"All attempts to parse structured output failed. Final error on direct parse: {e_direct_parse}.")
-        error_response_template["details"] = str(e_direct_parse)
+        logger.warning(f"Failed to directly parse AI response as JSON: {e_direct_parse}. Raw content snippet: '{raw_response_content[:500]}...'")
+        try:
+            # Repairing locally takes microseconds; generating again takes tens of seconds
+            parsed_json = json.loads(repair_json(raw_response_content))
+            outcome = 'repaired'
+            logger.info("Parsed structured output after local JSON repair.")
+        except ValueError as e_repair:
+            logger.error(f"All attempts to parse structured output failed. Direct parse: {e_direct_parse}. Repair: {e_repair}.")
+            error_response_template["details"] = str(e_direct_parse)
+            _count_structured(call_site, 'failed')
+            return error_response_template
+
+    if not isinstance(parsed_json, dict):
+        logger.error(f"Structured output is a {type(parsed_json).__name__}, expected an object.")
+        error_response_template["details"] = f"Expected a JSON object, got {type(parsed_json).__name__}"
+        _count_structured(call_site, 'failed')
         return error_response_template
 
-    except Exception as e_general:
-        logger.error(f"General unexpected error during structured output processing: {e_general}. Raw content: '{raw_response_content[:1000]}...'", exc_info=True)
-        error_response_template["error"] = "Unexpected error processing structured AI response"
-        error_response_template["details"] = str(e_general)
-        return error_response_template
\ No newline at end of file
+    if schema:
+        try:
+            parsed_json, issues = coerce_to_schema(parsed_json, schema)
+        except SchemaMismatch as e_schema:
+            logger.error(f"Structured output does not match the schema: {e_schema}")
+            error_response_template["error"] = "Structured output does not match the schema"
+            error_response_template["details"] = str(e_schema)
+            _count_structured(call_site, 'failed')
+            return error_response_template
+        if issues:
+            logger.warning(f"Coerced structured output to the schema ({call_site or 'other'}): {', '.join(issues[:10])}")
+            if outcome == 'parsed':
+                outcome = 'coerced'
+
+    logger.info("Successfully parsed structured JSON output from AI.")
+    _count_structured(call_site, outcome)
+    return parsed_json
+
+def stream_ai_response(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    context: Optional[List[Dict[str, str]]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    options: Optional[Dict[str, Any]] = None,
+    keep_alive: Optional[str] = None,
+    num_ctx: Optional[int] = None,
+    call_site: Optional[str] = None,
+    model: Optional[str] = None
+) -> Generator[str, None, None]:
+    """
+    Send a streaming request to Ollama API and yield the response as it is generated
+
+    Failures before the first chunk are retried like get_ai_response and end in
+    the same user-facing error message, yielded as the only chunk. A failure
+    mid-stream ends the stream early.
+
+    Args:
+        Same as get_ai_response
+
+    Returns:
+        Iterator of response text chunks
+    """
+    _call_metrics.last = {}
+    _call_metrics.model = model or model_for_task(call_site)
+    start_time = time.time()
+    produced = False
+    try:
+        for chunk in _stream_ai_response(prompt, system_prompt, context, format, options, keep_alive, num_ctx,
+                                         call_site, model):
+            produced = produced or not chunk.startswith("Przepraszamy")
+            yield chunk
+    finally:
+        # A stream closed early by the caller (e.g. after enough items) still counts as a call
+        _record_route_call(call_site, _call_metrics.model, time.time() - start_time,
+                           bool(getattr(_call_metrics, 'last', {})) or produced)
+
+def _stream_ai_response(
+    prompt: str,
+    system_prompt: Optional[str],
+    context: Optional[List[Dict[str, str]]],
+    format: Optional[Union[str, Dict[str, Any]]],
+    options: Optional[Dict[str, Any]],
+    keep_alive: Optional[str],
+    num_ctx: Optional[int],
+    call_site: Optional[str],
+    model: Optional[str]
+) -> Generator[str, None, None]:
+    """Stream the chat response from the current server (see stream_ai_response)"""
+    server_status = check_ai_server_health()
+    if not server_status['is_online']:
+        logger.error("stream_ai_response called but no AI server is online.")
+        yield "Przepraszamy, wszyscy asystenci AI są obecnie niedostępni. Prosimy spróbować ponownie za chwilę."
+        return
+
+    messages, payload = _build_chat_payload(prompt, system_prompt, context, format, options, keep_alive, num_ctx,
+                                            model or AI_MODEL, stream=True)
+
+    max_retries = 2
+    for attempt in range(max_retries + 1):
+        server, payload["model"] = _attempt_target(call_site, model, attempt)
+        payload["keep_alive"] = keep_alive or _keep_alive_for(payload["model"])
+        api_url = f"{server}/api/chat"
+        started = False
+        try:
+            logger.info(f"Sending streaming request to API: {api_url} (model: {payload['model']}, attempt {attempt+1}/{max_retries+1})")
+            with requests.post(api_url, json=payload, timeout=90, stream=True) as response:
+                if response.status_code != 200:
+                    logger.error(f"Ollama API error: {response.status_code}, Response: {response.text[:500]}")
+                    if attempt < max_retries:
+                        check_ai_server_health(force_check=True)
+                        continue
+                    yield f"Przepraszamy, wystąpił błąd komunikacji z asystentem AI (kod {response.status_code})."
+                    return
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    content = chunk.get("message", {}).get("content")
+                    if content:
+                        started = True
+                        yield content
+                    if chunk.get("done"):
+                        _record_call_metrics(chunk)
+                        _notify_model_call(api_url, payload["model"])
+                        record_prompt_tokens(
+                            call_site or "other",
+                            sum(count_tokens(m["content"]) for m in messages),
+                            chunk.get("prompt_eval_count")
+                        )
+                        return
+                logger.warning("Ollama stream ended without a final chunk")
+                return
+
+        except Exception as e:
+            if started:
+                logger.error(f"Ollama stream broke off mid-response: {e}")
+                return
+            logger.error(f"Exception during streaming Ollama API call (attempt {attempt+1}): {e}")
+            if attempt < max_retries:
+                check_ai_server_health(force_check=True)
+                logger.info(f"Retrying with server: {CURRENT_SERVER} after streaming error.")
+                continue
+            if isinstance(e, requests.exceptions.Timeout):
+                yield "Przepraszamy, upłynął limit czasu oczekiwania na odpowiedź od asystenta AI."
+            else:
+                yield f"Przepraszamy, wystąpił nieoczekiwany błąd: {str(e)}."
+            return
+
+def stream_structured_output(
+    prompt: str,
+    system_prompt: str,
+    schema: Dict[str, Any],
+    array_key: str,
+    call_site: Optional[str] = None
+) -> Generator[Dict[str, Any], None, None]:
+    """
+    Stream structured JSON output, yielding the items of one array as soon as each is complete
+
+    Args:
+        prompt: User query
+        system_prompt: System instructions for the model
+        schema: The JSON schema dictionary to pass to Ollama's 'format' parameter
+        array_key: Top-level array whose items are yielded early (e.g. "job_matches")
+        call_site: Name of the calling feature for the prompt token metrics
+
+    Returns:
+        Iterator of {"type": "item", "item": ...} events, then one
+        {"type": "done", "result": ...} with the whole parsed object (as
+        get_structured_output returns it, including error dictionaries)
+    """
+    parser = JsonArrayItemParser(array_key)
+    item_schema = schema.get("properties", {}).get(array_key, {}).get("items")
+    for chunk in stream_ai_response(
+        prompt,
+        f"{system_prompt}{STRUCTURED_OUTPUT_INSTRUCTION}",
+        format=schema,
+        options={"temperature": 0.0},
+        call_site=call_site
+    ):
+        for item in parser.feed(chunk):
+            if item_schema:
+                try:
+                    item, _ = coerce_to_schema(item, item_schema)
+                except SchemaMismatch as e:
+                    logger.warning(f"Skipping streamed {array_key} item that does not match the schema: {e}")
+                    continue
+            yield {"type": "item", "item": item}
+
+    raw_response_content = re.sub(r'<think>.*?</think>', '', parser.buffer, flags=re.DOTALL).strip()
+    yield {"type": "done", "result": _parse_structured_response(raw_response_content, schema, call_site)}
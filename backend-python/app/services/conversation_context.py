@@ -0,0 +1,205 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable
+
+from app.services.ai_service import get_ai_response
+from app.services.interview_session_service import update_session_summary
+from app.utils.prompt_budget import count_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Context window configuration
+CONVERSATION_VERBATIM_MESSAGES = int(os.environ.get("CONVERSATION_VERBATIM_MESSAGES", "6"))  # recent messages sent as-is
+CONVERSATION_TOKEN_BUDGET = int(os.environ.get("CONVERSATION_TOKEN_BUDGET", "3000"))  # per chat call, prompts included
+CONVERSATION_TRANSCRIPT_TOKEN_BUDGET = int(os.environ.get("CONVERSATION_TRANSCRIPT_TOKEN_BUDGET", "6000"))  # end evaluation
+CONVERSATION_SUMMARY_BATCH = int(os.environ.get("CONVERSATION_SUMMARY_BATCH", "4"))  # min messages folded per update; the context prefix only changes when the summary does
+CONVERSATION_SUMMARY_WORKERS = int(os.environ.get("CONVERSATION_SUMMARY_WORKERS", "2"))
+CONVERSATION_SUMMARY_MAX_WORDS = 200
+
+# Messages always kept even when they alone exceed the budget (last question and answer)
+MIN_CONTEXT_MESSAGES = 2
+
+SUMMARY_SYSTEM_PROMPT = f"""
+You maintain a running summary of a technical job interview.
+Merge the new exchanges into the existing summary. Keep every question the interviewer asked,
+the technical details the candidate gave, answers that were vague or "I don't know", and
+anything the interviewer promised to come back to. Drop greetings and small talk.
+Write plain prose in English, at most {CONVERSATION_SUMMARY_MAX_WORDS} words, and return only the summary.
+"""
+
+def _speaker(msg: Dict[str, Any]) -> str:
+    return "Candidate" if msg.get('isUser', True) else "Interviewer"
+
+def format_transcript(messages: List[Dict[str, Any]]) -> str:
+    """
+    Format messages as a compact "Speaker: text" transcript
+
+    Args:
+        messages: Messages in the frontend format ({id, isUser, message})
+
+    Returns:
+        One line per message
+    """
+    return "\n".join(f"{_speaker(msg)}: {msg.get('message', '')}" for msg in messages)
+
+def _fit_recent(messages: List[Dict[str, Any]], budget: int, cost: Callable[[Dict[str, Any]], int]) -> int:
+    """Get how many of the newest messages fit in the budget (at least MIN_CONTEXT_MESSAGES)"""
+    used = 0
+    count = 0
+    for msg in reversed(messages):
+        used += cost(msg)
+        if used > budget and count >= MIN_CONTEXT_MESSAGES:
+            break
+        count += 1
+    return count
+
+def build_context(session: Dict[str, Any], system_prompt: str, prompt: str) -> List[Dict[str, str]]:
+    """
+    Build the chat context for the next interviewer turn within the token budget
+
+    Messages already folded into the session summary are replaced by it. The
+    remaining history (the verbatim window, plus any messages the background
+    summary has not caught up with yet) is trimmed from the oldest end until the
+    whole call fits CONVERSATION_TOKEN_BUDGET.
+
+    Args:
+        session: Session data
+        system_prompt: System prompt for the call
+        prompt: User prompt for the call (the candidate's latest reply)
+
+    Returns:
+        Context messages for get_ai_response
+    """
+    history = session["messages"][:-1]
+    summary = session.get("summary") or ""
+    summary_upto = session.get("summary_upto", 0) if summary else 0
+    tail = history[summary_upto:]
+
+    context = []
+    if summary:
+        context.append({"role": "system", "content": f"Summary of the interview so far: {summary}"})
+
+    budget = CONVERSATION_TOKEN_BUDGET - count_tokens(system_prompt) - count_tokens(prompt) \
+        - sum(count_tokens(c["content"]) for c in context)
+    keep = _fit_recent(tail, budget, lambda msg: count_tokens(msg.get('message', '')))
+    if keep < len(tail):
+        logger.info(f"Context budget dropped {len(tail) - keep} older messages")
+
+    for msg in tail[len(tail) - keep:]:
+        context.append({
+            "role": "user" if msg.get('isUser', True) else "assistant",
+            "content": msg.get('message', '')
+        })
+    return context
+
+def build_transcript(session: Dict[str, Any], token_budget: int = CONVERSATION_TRANSCRIPT_TOKEN_BUDGET) -> str:
+    """
+    Build the interview transcript for the end evaluation
+
+    The full compact transcript is used when it fits; otherwise the running
+    summary stands in for the oldest messages.
+
+    Args:
+        session: Session data
+        token_budget: Maximum transcript size in tokens
+
+    Returns:
+        Transcript text
+    """
+    messages = session["messages"]
+    full = format_transcript(messages)
+    if count_tokens(full) <= token_budget:
+        return full
+
+    summary = session.get("summary") or ""
+    summary_upto = session.get("summary_upto", 0) if summary else 0
+    tail = messages[summary_upto:]
+
+    parts = []
+    if summary:
+        parts.append(f"Summary of the earlier interview: {summary}")
+    budget = token_budget - sum(count_tokens(p) for p in parts)
+    keep = _fit_recent(tail, budget, lambda msg: count_tokens(format_transcript([msg])) + 1)
+    if keep < len(tail):
+        parts.append(f"[{len(tail) - keep} earlier messages omitted]")
+    parts.append(format_transcript(tail[len(tail) - keep:]))
+
+    logger.info(f"End transcript trimmed from ~{count_tokens(full)} to ~{token_budget} tokens")
+    return "\n".join(parts)
+
+def summarize_messages(previous_summary: str, messages: List[Dict[str, Any]]) -> str:
+    """
+    Fold messages into a running summary with the AI model
+
+    Args:
+        previous_summary: Existing summary ("" for none)
+        messages: Messages to fold in, oldest first
+
+    Returns:
+        Updated summary, or "" if the AI call failed
+    """
+    prompt = f"""Existing summary:
+{previous_summary or "(none yet)"}
+
+New exchanges:
+{format_transcript(messages)}"""
+
+    response = get_ai_response(
+        prompt=prompt,
+        system_prompt=SUMMARY_SYSTEM_PROMPT,
+        options={"temperature": 0.2},
+        call_site="conversation_summary"
+    )
+    if response.startswith("Przepraszamy") or response.startswith("Nie udało się"):
+        logger.warning(f"Conversation summary failed: {response}")
+        return ""
+    return response.strip()
+
+_executor = ThreadPoolExecutor(max_workers=CONVERSATION_SUMMARY_WORKERS, thread_name_prefix="conversation-summary")
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+def schedule_summary_update(storage, session: Dict[str, Any]) -> bool:
+    """
+    Fold messages that will leave the verbatim window into the session summary, in the background
+
+    Call after the interviewer's reply has been recorded and the session saved.
+
+    Args:
+        storage: Interview storage holding the session
+        session: Session data
+
+    Returns:
+        True if an update was scheduled
+    """
+    session_id = session["id"]
+    summary_upto = session.get("summary_upto", 0)
+    fold_upto = len(session["messages"]) - CONVERSATION_VERBATIM_MESSAGES
+    if fold_upto - summary_upto < CONVERSATION_SUMMARY_BATCH or session.get("status") != "active":
+        return False
+
+    with _in_flight_lock:
+        if session_id in _in_flight:
+            return False
+        _in_flight.add(session_id)
+
+    previous_summary = session.get("summary") or ""
+    messages = [dict(msg) for msg in session["messages"][summary_upto:fold_upto]]
+
+    def run():
+        try:
+            summary = summarize_messages(previous_summary, messages)
+            if summary:
+                update_session_summary(storage, session_id, summary_upto, fold_upto, summary)
+                logger.info(f"Session {session_id} summary now covers {fold_upto} messages")
+        except Exception as e:
+            logger.error(f"Error updating summary for session {session_id}: {e}", exc_info=True)
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(session_id)
+
+    _executor.submit(run)
+    return True
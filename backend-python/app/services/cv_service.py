@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Any
+
+from app.services.ai_service import get_structured_output, get_ai_response, model_for_task
+from app.utils.prompt_budget import compact_whitespace, trim_to_tokens, tokenizer_name
+
+logger = logging.getLogger(__name__)
+
+# Prompt and schema for CV analysis (part of the cache fingerprint below)
+CV_ANALYSIS_SYSTEM_PROMPT = """
+    You are a professional CV and resume analyzer. Your task is to extract key information 
+    from the given text which comes from a PDF resume or CV. Analyze the text carefully 
+    and extract the following information:
+    
+    1. Create a concise summary of the candidate's professional profile and experience
+    2. Identify the main professional role of the candidate based on their experience
+    3. Determine what type of job they might be seeking based on their background
+    4. Extract the most important technical and soft skills
+    5. Extract the most important technologies they've worked with
+    6. Extract programming languages they know
+    7. Extract frameworks they've used
+    8. Extract tools they're familiar with
+    9. Extract certifications they have
+    10. Extract major projects they've worked on
+    
+    Provide this information in a structured JSON format with the following keys:
+    - user_summary: A concise paragraph about the candidate's background and strengths
+    - user_role: An array of their primary and secondary professional roles
+    - job: The type of position they appear to be qualified for
+    - skills: A comma-separated string of their key skills (both technical and soft)
+    
+    Only include information that is actually present or can be confidently inferred from the text.
+    If the document is too long, summarize it and extract the most important information.
+    If the document is too short, provide a detailed analysis of the text.
+    If the document is in a different language, translate it to English and then analyze it.
+    If the document contains any personal information, remove it before analyzing.
+    If the document contains any sensitive information, remove it before analyzing.
+    If the document contains any confidential information, remove it before analyzing.
+    If the document contains any illegal information, remove it before analyzing.
+    If the document contains any offensive information, remove it before analyzing.
+    If the document contains any spam information, remove it before analyzing.
+    If the document contains any irrelevant information, remove it before analyzing.
+    If the document contains any duplicate information, remove it before analyzing.
+    If the document contains any misleading information, remove it before analyzing.
+    If the document contains any false information, remove it before analyzing.
+    If the document contains any outdated information, remove it before analyzing.
+    Provide this information in a structured format.
+    """
+
+CV_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "user_summary": {"type": "string"},
+        "user_role": {"type": "array", "items": {"type": "string"}},
+        "job": {"type": "string"},
+        "skills": {"type": "string"}
+    },
+    "required": ["user_summary", "user_role", "job", "skills"]
+}
+
+# Tokens of CV text sent to the model (about the 3000 characters previously kept)
+CV_ANALYSIS_MAX_TOKENS = int(os.environ.get("CV_ANALYSIS_MAX_TOKENS", "750"))
+
+def cv_analysis_fingerprint() -> str:
+    """
+    Fingerprint of everything that determines a CV analysis besides the text
+
+    Cached analyses with a different fingerprint are stale and get regenerated.
+    """
+    payload = json.dumps({
+        "system_prompt": CV_ANALYSIS_SYSTEM_PROMPT,
+        "schema": CV_ANALYSIS_SCHEMA,
+        "max_tokens": CV_ANALYSIS_MAX_TOKENS,
+        "tokenizer": tokenizer_name(),
+        "model": model_for_task("cv_analysis")
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def analyze_cv_text(text: str) -> Dict[str, Any]:
+    """
+    Analyze CV text with AI.
+    
+    Args:
+        text: Text extracted from the CV
+        
+    Returns:
+        Dictionary with "analysis" (structured) or "raw_analysis" (plain text fallback)
+    """
+    cv_text = trim_to_tokens(compact_whitespace(text), CV_ANALYSIS_MAX_TOKENS)
+    prompt = f"Analyze this resume/CV text and extract key information: {cv_text}"
+    
+    structured_analysis = get_structured_output(
+        prompt=prompt,
+        system_prompt=CV_ANALYSIS_SYSTEM_PROMPT,
+        schema=CV_ANALYSIS_SCHEMA,
+        call_site="cv_analysis"
+    )
+    
+    if isinstance(structured_analysis, dict) and "user_summary" in structured_analysis:
+        return {"analysis": structured_analysis}
+    
+    # Fallback if structured output fails
+    logger.warning(f"Problem with AI structured output: {structured_analysis}")
+    
+    # Try getting a regular AI response as fallback
+    ai_response = get_ai_response(
+        prompt=prompt,
+        system_prompt=CV_ANALYSIS_SYSTEM_PROMPT,
+        call_site="cv_analysis"
+    )
+    return {"raw_analysis": ai_response}
@@ -1,93 +1,586 @@
+import os
+import re
+import time
+import uuid
+import socket
+import bisect
+import functools
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Firebase configuration
+FIREBASE_CREDENTIALS = os.environ.get("FIREBASE_CREDENTIALS", "firebase-credentials.json")
+FIREBASE_PROJECT_ID = os.environ.get("FIREBASE_PROJECT_ID", "demo-jobprepai")
+
+# Initialize Firebase (FIRESTORE_EMULATOR_HOST switches the client to the emulator)
+try:
+    if not firebase_admin._apps:
+        if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            firebase_admin.initialize_app(options={'projectId': FIREBASE_PROJECT_ID})
+        else:
+            firebase_admin.initialize_app(credentials.Certificate(FIREBASE_CREDENTIALS))
+    db = firestore.client()
+except Exception as e:
+    raise ImportError(f"Firebase initialization failed: {e}")
+
+# Index fields maintained on every job document for server-side filtering
+SKILLS_FIELD = "skills_normalized"
+TOKENS_FIELD = "search_tokens"
+INDEX_FIELDS = (SKILLS_FIELD, TOKENS_FIELD)
+
+# Fields fetched when descriptions are not needed
+JOB_LIST_FIELDS = [
+    "id", "title", "company", "location", "required_skills", "experience_level",
+    "salary_range", "employment_type", "remote", "created_at"
+]
+
+# Firestore limits
+MAX_ARRAY_CONTAINS_ANY = 10
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 15
+MAX_DESCRIPTION_TOKENS = 200
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("FIREBASE_JOBS_PAGE_SIZE", "100"))
+
+# Documents written before the index fields existed are backfilled once at
+# startup; a marker document in META_COLLECTION records the fields version done
+SEARCH_FIELDS_VERSION = 1  # bump when build_search_fields changes
+SEARCH_BACKFILL_ENABLED = os.environ.get("FIREBASE_SEARCH_BACKFILL", "true").lower() == "true"
+META_COLLECTION = "meta"
+
+# In-memory replica of the jobs collection kept current by a snapshot listener
+JOB_REPLICA_ENABLED = os.environ.get("FIREBASE_JOB_REPLICA", "true").lower() == "true"
+JOB_REPLICA_STARTUP_TIMEOUT = float(os.environ.get("FIREBASE_JOB_REPLICA_STARTUP_TIMEOUT", "30"))
+JOB_REPLICA_MAX_LAG = float(os.environ.get("FIREBASE_JOB_REPLICA_MAX_LAG", "10"))  # seconds
+JOB_REPLICA_RESTART_INTERVAL = 60  # seconds between listener restart attempts
+# Listeners only hear about changes, so each replica touches its own document in
+# a separate collection and listens to it; no heartbeat echo within max_lag means
+# the listener connection stalled. Keeping it out of the jobs collection means
+# other jobs listeners and readers never see it.
+JOB_REPLICA_HEARTBEAT_COLLECTION = "replica_heartbeats"
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    tokens = (t.strip('.') for t in re.split(r"[^\w+#.]+", text.lower()))
+    return [t for t in tokens if t]
+
+def build_search_fields(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the normalized index fields for a job document
+
+    Args:
+        job_data: Job data
+
+    Returns:
+        Dictionary with normalized skills and keyword search tokens
+    """
+    skills = [s.lower().strip() for s in job_data.get('required_skills', []) if isinstance(s, str)]
+
+    tokens = set()
+    # Title and skills are indexed with prefixes so partial keywords match
+    for word in _tokenize(job_data.get('title', '')) + [t for s in skills for t in _tokenize(s)] + skills:
+        for length in range(MIN_PREFIX_LENGTH, min(len(word), MAX_PREFIX_LENGTH) + 1):
+            tokens.add(word[:length])
+        tokens.add(word)
+    # Descriptions are indexed by whole words only
+    for word in _tokenize(job_data.get('description', ''))[:MAX_DESCRIPTION_TOKENS]:
+        tokens.add(word)
+
+    return {
+        SKILLS_FIELD: sorted(set(skills)),
+        TOKENS_FIELD: sorted(tokens)
+    }
+
+def _strip_index_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return job data without index fields"""
+    return {k: v for k, v in data.items() if k not in INDEX_FIELDS}
+
+def _to_job(doc) -> Dict[str, Any]:
+    """Convert a Firestore document to job data without index fields"""
+    return _strip_index_fields(doc.to_dict() or {})
+
+def _with_search_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Add index fields to a document that predates them"""
+    if all(field in data for field in INDEX_FIELDS):
+        return data
+    return {**data, **build_search_fields(data)}
+
+def _matches_filters(data: Dict[str, Any], keyword_tokens: List[str], skills_lower: List[str]) -> bool:
+    """Check a raw job document against keyword tokens and skills"""
+    if keyword_tokens or skills_lower:
+        data = _with_search_fields(data)
+    if keyword_tokens:
+        tokens = set(data.get(TOKENS_FIELD, []))
+        if any(t not in tokens for t in keyword_tokens):
+            return False
+    if skills_lower and not set(skills_lower) & set(data.get(SKILLS_FIELD, [])):
+        return False
+    return True
+
+class JobsReplica:
+    """Warm in-memory copy of the jobs collection kept current by on_snapshot"""
+
+    def __init__(self, collection, max_lag: float = JOB_REPLICA_MAX_LAG, heartbeat_collection=None):
+        """
+        Initialize the replica
+
+        Args:
+            collection: Firestore collection reference
+            max_lag: Seconds a snapshot may trail the server before reads fall back
+            heartbeat_collection: Collection holding the heartbeat documents
+                (defaults to JOB_REPLICA_HEARTBEAT_COLLECTION)
+        """
+        self.collection = collection
+        self.max_lag = max_lag
+        if heartbeat_collection is None:
+            heartbeat_collection = db.collection(JOB_REPLICA_HEARTBEAT_COLLECTION)
+        self._heartbeat_ref = heartbeat_collection.document(f"{socket.gethostname()}_{os.getpid()}_{uuid.uuid4().hex[:8]}")
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        # (job ID, document ID) sorted, updated per snapshot so reads never sort
+        self._order: List[Tuple[str, str]] = []
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._watch = None
+        self._heartbeat_watch = None
+        self._generation = 0
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._last_start_attempt = 0.0
+        self.last_snapshot_at = None
+        self.last_snapshot_lag = 0.0
+        self.last_heartbeat_at = None
+        self.snapshots_received = 0
+        self.fallback_reads = 0
+
+    def start(self, timeout: float = JOB_REPLICA_STARTUP_TIMEOUT) -> bool:
+        """
+        Attach the snapshot listeners, start the heartbeat and wait for the initial fill
+
+        Args:
+            timeout: Seconds to wait for the first snapshot
+
+        Returns:
+            True if the replica is ready
+        """
+        if not self._attach():
+            return False
+
+        if self._heartbeat_thread is None:
+            self._heartbeat_stop.clear()
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="jobs-replica-heartbeat", daemon=True)
+            self._heartbeat_thread.start()
+
+        if not self._ready.wait(timeout):
+            logger.warning(f"Jobs replica not ready after {timeout}s, reading Firestore directly")
+            return False
+
+        logger.info(f"Jobs replica ready with {len(self._docs)} documents")
+        return True
+
+    def _attach(self) -> bool:
+        """(Re)subscribe both listeners from an empty replica; readers fall back until the first snapshot"""
+        with self._lock:
+            self._last_start_attempt = time.time()
+            old_watches = self._detach()
+            self._docs.clear()
+            self._order.clear()
+            self.last_snapshot_at = None
+            self.last_heartbeat_at = None
+            # Callbacks still queued on the old listeners carry an old generation and are ignored
+            self._generation += 1
+            generation = self._generation
+            try:
+                # The first snapshot delivers the whole collection, later ones only changes
+                self._watch = self.collection.on_snapshot(functools.partial(self._on_snapshot, generation))
+                self._heartbeat_watch = self._heartbeat_ref.on_snapshot(functools.partial(self._on_heartbeat, generation))
+                attached = True
+            except Exception as e:
+                logger.error(f"Error starting jobs replica listener: {e}")
+                attached = False
+
+        # Closing a listener waits for its callback thread, which may be waiting for the lock
+        self._unsubscribe(old_watches)
+        return attached
+
+    def _detach(self) -> List[Any]:
+        """Take the listeners off the replica; caller holds the lock and unsubscribes them after releasing it"""
+        self._ready.clear()
+        watches = [w for w in (self._watch, self._heartbeat_watch) if w is not None]
+        self._watch = None
+        self._heartbeat_watch = None
+        return watches
+
+    @staticmethod
+    def _unsubscribe(watches: List[Any]) -> None:
+        for watch in watches:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Error stopping jobs replica listener: {e}")
+
+    def stop(self) -> None:
+        """Detach the snapshot listeners, stop the heartbeat and remove its document"""
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(timeout=5)
+            self._heartbeat_thread = None
+        with self._lock:
+            watches = self._detach()
+        self._unsubscribe(watches)
+        try:
+            self._heartbeat_ref.delete()
+        except Exception as e:
+            logger.warning(f"Error removing jobs replica heartbeat: {e}")
+
+    def _heartbeat(self) -> None:
+        """
+        Touch the heartbeat document every max_lag / 2 and restart dropped or stalled listeners
+
+        This is the only place listeners are restarted (at most once per
+        restart interval), so request threads never block on it.
+        """
+        interval = self.max_lag / 2
+        while True:
+            try:
+                self._heartbeat_ref.set({'at': time.time()})
+            except Exception as e:
+                logger.warning(f"Error writing jobs replica heartbeat: {e}")
+
+            stalled = self.is_stalled()
+            if (not self.is_listening() or stalled) and time.time() - self._last_start_attempt > JOB_REPLICA_RESTART_INTERVAL:
+                logger.warning(f"Jobs replica listener is {'stalled' if stalled else 'not active'}, restarting")
+                self._attach()
+
+            if self._heartbeat_stop.wait(interval):
+                return
+
+    def _set_doc(self, doc_id: str, data: Optional[Dict[str, Any]]) -> None:
+        """Store or remove (data None) a document, keeping the sorted order; caller holds the lock"""
+        old = self._docs.pop(doc_id, None)
+        if old is not None:
+            entry = (str(old.get('id', doc_id)), doc_id)
+            index = bisect.bisect_left(self._order, entry)
+            if index < len(self._order) and self._order[index] == entry:
+                del self._order[index]
+        if data is not None:
+            self._docs[doc_id] = data
+            bisect.insort(self._order, (str(data.get('id', doc_id)), doc_id))
+
+    def _on_snapshot(self, generation: int, docs, changes, read_time) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    self._set_doc(doc.id, None)
+                else:
+                    self._set_doc(doc.id, _with_search_fields(doc.to_dict() or {}))
+
+            now = time.time()
+            self.last_snapshot_at = now
+            self.snapshots_received += 1
+            try:
+                self.last_snapshot_lag = max(0.0, now - read_time.timestamp())
+            except Exception:
+                self.last_snapshot_lag = 0.0
+
+        self._ready.set()
+
+    def _on_heartbeat(self, generation: int, docs, changes, read_time) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self.last_heartbeat_at = time.time()
+
+    def is_listening(self) -> bool:
+        """Whether both snapshot listeners are still attached"""
+        return all(
+            watch is not None and getattr(watch, "is_active", True)
+            for watch in (self._watch, self._heartbeat_watch)
+        )
+
+    def is_stalled(self) -> bool:
+        """Whether no heartbeat echo arrived within max_lag"""
+        last = self.last_heartbeat_at or self._last_start_attempt
+        return time.time() - last > self.max_lag
+
+    def is_fresh(self) -> bool:
+        """
+        Whether reads can be served from the replica
+
+        Fresh means the listeners are attached, the heartbeat echoed within
+        max_lag and the last jobs snapshot trailed the server by at most
+        max_lag. The heartbeat thread restarts listeners that are not.
+        """
+        if not self._ready.is_set() or not self.is_listening() or self.is_stalled():
+            return False
+        return self.last_snapshot_lag <= self.max_lag
+
+    def record_fallback(self) -> None:
+        """Count a read that went to Firestore because the replica could not serve it"""
+        with self._lock:
+            self.fallback_reads += 1
+
+    def put(self, job_id: str, data: Dict[str, Any]) -> None:
+        """Apply a local write so it is visible before the listener echoes it"""
+        with self._lock:
+            self._set_doc(job_id, data)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a raw job document"""
+        with self._lock:
+            return self._docs.get(job_id)
+
+    def values(self, start_after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Snapshot of the raw job documents, ordered by job ID
+
+        Args:
+            start_after: Only documents whose job ID sorts after this cursor
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._order, (str(start_after), chr(0x10FFFF))) if start_after else 0
+            return [self._docs[doc_id] for _, doc_id in self._order[start:]]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get replica staleness metrics"""
+        return {
+            'ready': self._ready.is_set(),
+            'listening': self.is_listening(),
+            'documents': len(self._docs),
+            'snapshots_received': self.snapshots_received,
+            'last_snapshot_age_seconds': round(time.time() - self.last_snapshot_at, 3) if self.last_snapshot_at else None,
+            'last_snapshot_lag_seconds': round(self.last_snapshot_lag, 3),
+            'last_heartbeat_age_seconds': round(time.time() - self.last_heartbeat_at, 3) if self.last_heartbeat_at else None,
+            'max_lag_seconds': self.max_lag,
+            'fallback_reads': self.fallback_reads
+        }
+
 class FirebaseJobStorage:
     """Firebase storage implementation for jobs"""
-    
-    def __init__(self):
-        """Initialize Firebase storage for jobs"""
+
+    def __init__(self, use_replica: bool = JOB_REPLICA_ENABLED, backfill: bool = SEARCH_BACKFILL_ENABLED):
+        """
+        Initialize Firebase storage for jobs
+        
+        Args:
+            use_replica: Serve reads from a snapshot-listener replica of the collection
+            backfill: Backfill index fields on old documents in the background
+                (when False, the documents are assumed to be indexed already)
+        """
         self.collection = db.collection('jobs')
+        self.last_read_count = 0
+        self.save_listeners = []
+        # Until the backfill is done, filters run here instead of in the query
+        self.search_fields_ready = not backfill
+        if backfill:
+            threading.Thread(target=self.ensure_search_fields, name="jobs-search-backfill", daemon=True).start()
+        self.replica = None
+        if use_replica:
+            self.replica = JobsReplica(self.collection)
+            self.replica.start()
         # Remove the sample data initialization
         # self._initialize_sample_data()
-    
+
     # You can either remove this method entirely or modify it to not do anything
     def _initialize_sample_data(self):
         """This method is now disabled - will not initialize sample data"""
         logger.info("Sample data initialization is disabled")
         return
-    
-    def list_jobs(self, keyword: str = "") -> List[Dict[str, Any]]:
+
+    def _build_query(
+        self,
+        keyword_tokens: List[str],
+        skills: List[str],
+        limit: Optional[int],
+        start_after: Optional[str],
+        include_description: bool
+    ):
+        """Build a Firestore query pushing filters, paging and projection to the server"""
+        query = self.collection
+
+        # Firestore allows a single array filter per query: prefer the keyword
+        if keyword_tokens:
+            query = query.where(filter=FieldFilter(TOKENS_FIELD, "array_contains", keyword_tokens[0]))
+        elif skills:
+            query = query.where(filter=FieldFilter(SKILLS_FIELD, "array_contains_any", skills[:MAX_ARRAY_CONTAINS_ANY]))
+
+        if limit or start_after:
+            query = query.order_by("id")
+            if start_after:
+                query = query.start_after({"id": start_after})
+            if limit:
+                query = query.limit(limit)
+
+        if not include_description:
+            query = query.select(JOB_LIST_FIELDS + list(INDEX_FIELDS))
+
+        return query
+
+    def list_jobs_page(
+        self,
+        keyword: str = "",
+        skills: Optional[List[str]] = None,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        start_after: Optional[str] = None,
+        include_description: bool = True
+    ) -> Dict[str, Any]:
+        """
+        List one page of jobs, filtered on the server
+
+        Args:
+            keyword: Optional keyword matched against title, skills and description words
+            skills: Optional skills, a job matches if it requires any of them
+            limit: Page size (None for no limit)
+            start_after: Job ID cursor returned as next_cursor by the previous page
+            include_description: Whether to fetch job descriptions
+
+        Returns:
+            Dictionary with jobs and next_cursor (None on the last page)
+        """
+        keyword_tokens = sorted(_tokenize(keyword), key=len, reverse=True)
+        skills_lower = [s.lower().strip() for s in (skills or []) if s]
+
+        if self.replica is not None:
+            if self.replica.is_fresh():
+                return self._list_from_replica(keyword_tokens, skills_lower, limit, start_after, include_description)
+            self.replica.record_fallback()
+
+        if self.search_fields_ready:
+            query = self._build_query(keyword_tokens, skills_lower, limit, start_after, include_description)
+        else:
+            # Old documents have no index fields to query on: filter every document here
+            query = self._build_query([], [], limit, start_after, True)
+
+        jobs = []
+        read_count = 0
+        last_id = None
+        for doc in query.stream():
+            read_count += 1
+            data = doc.to_dict() or {}
+            last_id = data.get('id', doc.id)
+
+            # Remaining filters that could not be combined into the same query
+            if not _matches_filters(data, keyword_tokens, skills_lower):
+                continue
+
+            job = _strip_index_fields(data)
+            if not include_description:
+                job.pop('description', None)
+            jobs.append(job)
+
+        self.last_read_count = read_count
+        logger.info(f"Retrieved {len(jobs)} jobs from Firebase ({read_count} document reads)")
+
+        next_cursor = last_id if limit and read_count >= limit else None
+        return {"jobs": jobs, "next_cursor": next_cursor}
+
+    def _list_from_replica(
+        self,
+        keyword_tokens: List[str],
+        skills_lower: List[str],
+        limit: Optional[int],
+        start_after: Optional[str],
+        include_description: bool
+    ) -> Dict[str, Any]:
+        """Serve a page of jobs from the in-memory replica"""
+        jobs = []
+        for data in self.replica.values(start_after):
+            if not _matches_filters(data, keyword_tokens, skills_lower):
+                continue
+
+            job = _strip_index_fields(data)
+            if not include_description:
+                job.pop('description', None)
+            jobs.append(job)
+
+            if limit and len(jobs) >= limit:
+                return {"jobs": jobs, "next_cursor": job.get('id')}
+
+        self.last_read_count = 0
+        return {"jobs": jobs, "next_cursor": None}
+
+    def list_jobs(
+        self,
+        keyword: str = "",
+        skills: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+        include_description: bool = True
+    ) -> List[Dict[str, Any]]:
         """
         List all jobs, optionally filtered by keyword
-        
+
         Args:
             keyword: Optional keyword to filter jobs
-            
+            skills: Optional skills, a job matches if it requires any of them
+            limit: Optional maximum number of jobs (one page)
+            start_after: Optional job ID cursor for pagination
+            include_description: Whether to fetch job descriptions
+
         Returns:
             List of job data
         """
         try:
-            # Get all jobs
-            jobs = []
-            docs = self.collection.stream()
-            
-            for doc in docs:
-                jobs.append(doc.to_dict())
-            
-            logger.info(f"Retrieved {len(jobs)} jobs from Firebase")
-            
-            if not keyword:
-                return jobs
-            
-            # Filter by keyword in title, description, or skills
-            keyword_lower = keyword.lower()
-            filtered_jobs = []
-            
-            for job in jobs:
-                title = job.get('title', '').lower()
-                description = job.get('description', '').lower()
-                required_skills = [s.lower() for s in job.get('required_skills', [])]
-                
-                if (keyword_lower in title or 
-                    keyword_lower in description or 
-                    any(keyword_lower in skill for skill in required_skills)):
-                    filtered_jobs.append(job)
-            
-            logger.info(f"Filtered to {len(filtered_jobs)} jobs with keyword '{keyword}'")
-            return filtered_jobs
-            
+            page = self.list_jobs_page(
+                keyword=keyword,
+                skills=skills,
+                limit=limit,
+                start_after=start_after,
+                include_description=include_description
+            )
+            return page["jobs"]
+
         except Exception as e:
             logger.error(f"Error listing jobs: {e}")
             return []
-    
+
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a specific job by ID
-        
+
         Args:
             job_id: Job ID
-            
+
         Returns:
             Job data or None if not found
         """
         try:
+            if self.replica is not None and self.replica.is_fresh():
+                data = self.replica.get(job_id)
+                if data is not None:
+                    return _strip_index_fields(data)
+                # Not in the replica yet: it may have been created moments ago
+                self.replica.record_fallback()
+
             doc_ref = self.collection.document(job_id)
             doc = doc_ref.get()
-            
+
             if doc.exists:
-                return doc.to_dict()
+                return _to_job(doc)
             else:
                 logger.warning(f"Job {job_id} not found")
                 return None
-                
+
         except Exception as e:
             logger.error(f"Error getting job {job_id}: {e}")
             return None
-    
+
     def save_job(self, job_data: Dict[str, Any]) -> str:
         """
         Save a job
-        
+
         Args:
             job_data: Job data
-            
+
         Returns:
             Job ID
         """
@@ -95,18 +588,124 @@ class FirebaseJobStorage:
             # Ensure job has an ID
             if 'id' not in job_data:
                 job_data['id'] = f"job_{int(time.time())}_{str(time.time()).split('.')[-1]}"
-            
+
             # Set created_at if not present
             if 'created_at' not in job_data:
                 job_data['created_at'] = time.time()
-            
-            # Save to Firestore
+
+            # Save to Firestore together with the index fields
+            document = {**job_data, **build_search_fields(job_data)}
             doc_ref = self.collection.document(job_data['id'])
-            doc_ref.set(job_data)
-            
+            doc_ref.set(document)
+            if self.replica is not None:
+                self.replica.put(job_data['id'], document)
+
             logger.info(f"Saved job {job_data['id']}")
+            for listener in self.save_listeners:
+                try:
+                    listener(job_data)
+                except Exception as e:
+                    logger.error(f"Job save listener failed for {job_data['id']}: {e}", exc_info=True)
             return job_data['id']
-            
+
         except Exception as e:
             logger.error(f"Error saving job: {e}")
-            return ""
\ No newline at end of file
+            return ""
+
+    def get_question_pool(self, job_id: str, pool_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a pre-generated interview question pool for a job
+
+        Args:
+            job_id: Job ID
+            pool_key: Pool key (experience level and difficulty)
+
+        Returns:
+            Pool data or None if none has been generated
+        """
+        try:
+            doc = self.collection.document(str(job_id)).collection('question_pools').document(pool_key).get()
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            logger.error(f"Error getting question pool {pool_key} for job {job_id}: {e}")
+            return None
+
+    def save_question_pool(self, job_id: str, pool_key: str, pool: Dict[str, Any]) -> bool:
+        """
+        Save an interview question pool in the job's question_pools subcollection
+
+        Args:
+            job_id: Job ID
+            pool_key: Pool key (experience level and difficulty)
+            pool: Pool data
+
+        Returns:
+            True if successful
+        """
+        try:
+            pool['updated_at'] = time.time()
+            self.collection.document(str(job_id)).collection('question_pools').document(pool_key).set(pool)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving question pool {pool_key} for job {job_id}: {e}")
+            return False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get read metrics, including replica staleness"""
+        return {
+            'last_read_count': self.last_read_count,
+            'replica': self.replica.get_metrics() if self.replica is not None else {'enabled': False}
+        }
+
+    def ensure_search_fields(self) -> bool:
+        """
+        Backfill index fields once per SEARCH_FIELDS_VERSION, tracked by a marker document
+
+        Returns:
+            True once every job document has the current index fields
+        """
+        marker = db.collection(META_COLLECTION).document(f"{self.collection.id}_search_fields")
+        try:
+            doc = marker.get()
+            if not doc.exists or (doc.to_dict() or {}).get('version', 0) < SEARCH_FIELDS_VERSION:
+                updated = self.backfill_search_fields()
+                marker.set({'version': SEARCH_FIELDS_VERSION, 'updated': updated, 'at': time.time()})
+            self.search_fields_ready = True
+        except Exception as e:
+            logger.error(f"Error backfilling job search fields, filtering without them: {e}")
+        return self.search_fields_ready
+
+    def backfill_search_fields(self, batch_size: int = 400) -> int:
+        """
+        Add index fields to job documents written before they existed
+
+        Args:
+            batch_size: Number of documents per write batch
+
+        Returns:
+            Number of updated documents
+        """
+        updated = 0
+        batch = db.batch()
+        pending = 0
+
+        for doc in self.collection.stream():
+            data = doc.to_dict() or {}
+            fields = build_search_fields(data)
+            if all(data.get(k) == v for k, v in fields.items()):
+                continue
+
+            batch.update(doc.reference, fields)
+            pending += 1
+            if pending >= batch_size:
+                batch.commit()
+                updated += pending
+                batch = db.batch()
+                pending = 0
+
+        if pending:
+            batch.commit()
+            updated += pending
+
+        logger.info(f"Backfilled search fields on {updated} job documents")
+        return updated
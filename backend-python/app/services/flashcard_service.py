@@ -1,11 +1,76 @@
-import logging
+import os
+import copy
+import json
+import time
 import uuid
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
 from typing import Dict, Any, List
 
-from app.services.ai_service import get_structured_output, get_ai_response
+from app.services.ai_service import get_structured_output, get_ai_response, model_for_task
+from app.utils.prompt_budget import fit_sections, tokenizer_name
 
 logger = logging.getLogger(__name__)
 
+# Speculative generation after an end summary
+FLASHCARD_PREFETCH_ENABLED = os.environ.get("FLASHCARD_PREFETCH_ENABLED", "true").lower() == "true"
+FLASHCARD_WORKERS = int(os.environ.get("FLASHCARD_WORKERS", "2"))
+
+# Tokens for the interview summary and improvement points in the prompt
+FLASHCARD_INPUT_TOKENS = int(os.environ.get("FLASHCARD_INPUT_TOKENS", "1500"))
+
+# Interview result fields that determine the generated set
+FLASHCARD_INPUT_FIELDS = ("summary", "improvements", "passed", "rating")
+
+# System prompt for flashcard generation
+FLASHCARD_SYSTEM_PROMPT = """
+You are an AI assistant that generates educational flashcards based on interview results.
+Create a set of flashcards with front (question) and back (answer) based on the interview summary and areas for improvement.
+
+Follow these guidelines:
+1. Create concise, focused questions on the front of each card
+2. Provide comprehensive but concise answers on the back of each card
+3. Cover both strengths mentioned in the summary and areas for improvement
+4. Focus on actionable learning points that will help in future interviews
+5. Create between 5-10 flashcards depending on the richness of the content
+
+Format the output as a JSON object with:
+- "id": A unique identifier (use "temp-id", it will be replaced)
+- "title": A descriptive title for the flashcard set
+- "description": A brief description of what the flashcards cover
+- "cards": An array of card objects, each with:
+  - "id": A numerical ID for the card (1, 2, 3, etc.)
+  - "front": The question or prompt (front of the flashcard)
+  - "back": The answer or explanation (back of the flashcard)
+
+Only include information that is present in the provided interview data.
+"""
+
+# Schema for structured output
+FLASHCARD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "cards": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "number"},
+                    "front": {"type": "string"},
+                    "back": {"type": "string"}
+                },
+                "required": ["id", "front", "back"]
+            }
+        }
+    },
+    "required": ["id", "title", "description", "cards"]
+}
+
 def generate_flashcards_from_interview_result(interview_result: Dict[str, Any]) -> Dict[str, Any]:
     """
     Generate flashcards from interview results using AI.
@@ -23,59 +88,18 @@ def generate_flashcards_from_interview_result(interview_result: Dict[str, Any])
         passed = interview_result.get('passed', False)
         rating = interview_result.get('rating', 0)
         
-        # Prepare system prompt for flashcard generation
-        system_prompt = """
-        You are an AI assistant that generates educational flashcards based on interview results.
-        Create a set of flashcards with front (question) and back (answer) based on the interview summary and areas for improvement.
-        
-        Follow these guidelines:
-        1. Create concise, focused questions on the front of each card
-        2. Provide comprehensive but concise answers on the back of each card
-        3. Cover both strengths mentioned in the summary and areas for improvement
-        4. Focus on actionable learning points that will help in future interviews
-        5. Create between 5-10 flashcards depending on the richness of the content
-        
-        Format the output as a JSON object with:
-        - "id": A unique identifier (use "temp-id", it will be replaced)
-        - "title": A descriptive title for the flashcard set
-        - "description": A brief description of what the flashcards cover
-        - "cards": An array of card objects, each with:
-          - "id": A numerical ID for the card (1, 2, 3, etc.)
-          - "front": The question or prompt (front of the flashcard)
-          - "back": The answer or explanation (back of the flashcard)
-        
-        Only include information that is present in the provided interview data.
-        """
-        
-        # Define schema for structured output
-        json_schema = {
-            "type": "object",
-            "properties": {
-                "id": {"type": "string"},
-                "title": {"type": "string"},
-                "description": {"type": "string"},
-                "cards": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "id": {"type": "number"},
-                            "front": {"type": "string"},
-                            "back": {"type": "string"}
-                        },
-                        "required": ["id", "front", "back"]
-                    }
-                }
-            },
-            "required": ["id", "title", "description", "cards"]
-        }
+        # Improvement points come first: they are what the cards should drill
+        fitted = fit_sections([
+            {"name": "improvements", "items": [str(item) for item in improvements], "priority": 1},
+            {"name": "summary", "text": summary, "priority": 2}
+        ], FLASHCARD_INPUT_TOKENS, call_site="flashcards")
         
         # Create the prompt with interview data
         interview_data = f"""
-        Interview Summary: {summary}
+        Interview Summary: {fitted['summary']}
         
         Areas for Improvement:
-        {' '.join([f'- {item}' for item in improvements])}
+        {' '.join([f'- {item}' for item in fitted['improvements']])}
         
         Interview Result: {'Passed' if passed else 'Failed'}
         Rating: {rating}/100
@@ -84,8 +108,9 @@ def generate_flashcards_from_interview_result(interview_result: Dict[str, Any])
         # Call AI service for flashcard generation
         flashcard_set = get_structured_output(
             prompt=f"Generate educational flashcards from this interview result: {interview_data}",
-            system_prompt=system_prompt,
-            schema=json_schema
+            system_prompt=FLASHCARD_SYSTEM_PROMPT,
+            schema=FLASHCARD_SCHEMA,
+            call_site="flashcards"
         )
         
         # Replace the temporary ID with a real UUID
@@ -96,4 +121,151 @@ def generate_flashcards_from_interview_result(interview_result: Dict[str, Any])
                 
     except Exception as e:
         logger.error(f"Error generating flashcards: {e}", exc_info=True)
-        raise e  # Re-raise the exception instead of falling back to default data
\ No newline at end of file
+        raise e  # Re-raise the exception instead of falling back to default data
+
+def flashcard_cache_key(interview_result: Dict[str, Any]) -> str:
+    """
+    Hash of everything that determines a flashcard set
+
+    Covers the interview result fields plus the prompt, schema and model, so
+    cached sets go stale when any of those change. userId is not part of it.
+
+    Args:
+        interview_result: Interview result (summary, improvements, passed, rating)
+
+    Returns:
+        Hex digest
+    """
+    payload = json.dumps({
+        "result": {field: interview_result.get(field) for field in FLASHCARD_INPUT_FIELDS},
+        "system_prompt": FLASHCARD_SYSTEM_PROMPT,
+        "schema": FLASHCARD_SCHEMA,
+        "model": model_for_task("flashcards"),
+        "input_tokens": FLASHCARD_INPUT_TOKENS,
+        "tokenizer": tokenizer_name()
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _is_complete_set(flashcard_set: Any) -> bool:
+    return isinstance(flashcard_set, dict) and "error" not in flashcard_set and bool(flashcard_set.get("cards"))
+
+def _issue(flashcard_set: Any) -> Any:
+    """Copy a shared set for one request, with its own id and creation time"""
+    if not _is_complete_set(flashcard_set):
+        return flashcard_set
+    issued = copy.deepcopy(flashcard_set)
+    issued["id"] = str(uuid.uuid4())
+    issued["created_at"] = time.time()
+    return issued
+
+class FlashcardService:
+    """Flashcard sets cached by interview result, generated ahead of the request when possible"""
+
+    def __init__(self, flashcard_storage):
+        """
+        Initialize the service
+
+        Args:
+            flashcard_storage: Storage for generated sets keyed by flashcard_cache_key
+        """
+        self.storage = flashcard_storage
+        self._executor = ThreadPoolExecutor(max_workers=FLASHCARD_WORKERS, thread_name_prefix="flashcards")
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._metrics = {'requests': 0, 'cache_hits': 0, 'joined_prefetch': 0, 'generated': 0, 'prefetched': 0, 'failures': 0}
+
+    def get_flashcards(self, interview_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the flashcard set for an interview result
+
+        Returns the cached set, waits for a generation already running for the
+        same result, or generates (and caches) a new one. The cache is shared
+        by every user with the same result, so each call gets its own copy
+        with a fresh id and created_at.
+
+        Args:
+            interview_result: Interview result (summary, improvements, passed, rating)
+
+        Returns:
+            A CardSet object with id, title, description and cards
+        """
+        key = flashcard_cache_key(interview_result)
+        with self._lock:
+            self._metrics['requests'] += 1
+
+        cached = self.storage.get_flashcard_set(key)
+        if cached:
+            with self._lock:
+                self._metrics['cache_hits'] += 1
+            logger.info(f"Serving cached flashcards ({key[:12]})")
+            return _issue(cached)
+
+        future, started = self._start(key, interview_result)
+        if not started:
+            with self._lock:
+                self._metrics['joined_prefetch'] += 1
+            logger.info(f"Waiting for flashcards already being generated ({key[:12]})")
+        return _issue(future.result())
+
+    def prefetch(self, interview_result: Dict[str, Any]) -> bool:
+        """
+        Generate the set for an interview result in the background if it is not cached
+
+        Args:
+            interview_result: Interview result (e.g. a finished end summary)
+
+        Returns:
+            True if a generation was started
+        """
+        if not FLASHCARD_PREFETCH_ENABLED:
+            return False
+
+        key = flashcard_cache_key(interview_result)
+        if self.storage.get_flashcard_set(key):
+            return False
+
+        _, started = self._start(key, interview_result)
+        if started:
+            with self._lock:
+                self._metrics['prefetched'] += 1
+            logger.info(f"Prefetching flashcards ({key[:12]})")
+        return started
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get cache and generation counters"""
+        with self._lock:
+            return {**self._metrics, 'in_flight': len(self._in_flight)}
+
+    def _start(self, key: str, interview_result: Dict[str, Any]):
+        """Get the running generation for a key, or start one; returns (future, started)"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = self._executor.submit(self._generate, key, dict(interview_result))
+            self._in_flight[key] = future
+            return future, True
+
+    def _generate(self, key: str, interview_result: Dict[str, Any]) -> Dict[str, Any]:
+        start_time = time.time()
+        try:
+            flashcard_set = generate_flashcards_from_interview_result(interview_result)
+            if _is_complete_set(flashcard_set):
+                # Saved before leaving the in-flight map so a new request finds one or the other
+                self.storage.save_flashcard_set(key, flashcard_set)
+                with self._lock:
+                    self._metrics['generated'] += 1
+                logger.info(f"Generated flashcards ({key[:12]}) in {time.time() - start_time:.2f}s")
+            else:
+                # Incomplete output is returned as before but not cached
+                with self._lock:
+                    self._metrics['failures'] += 1
+                logger.warning(f"Flashcard generation ({key[:12]}) returned no cards, not caching it")
+            return flashcard_set
+        except Exception:
+            with self._lock:
+                self._metrics['failures'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
@@ -0,0 +1,114 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Iterator, Tuple
+
+from app.services.interview_service import analyze_interview_responses
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Batch analysis configuration
+INTERVIEW_ANALYSIS_CONCURRENCY = int(os.environ.get("INTERVIEW_ANALYSIS_CONCURRENCY", "4"))  # match the model servers' parallel slots
+INTERVIEW_ANALYSIS_MAX_CONCURRENCY = 16
+INTERVIEW_ANALYSIS_MAX_BATCH = int(os.environ.get("INTERVIEW_ANALYSIS_MAX_BATCH", "200"))  # interview IDs per request
+INTERVIEW_ANALYSIS_WRITE_BATCH = int(os.environ.get("INTERVIEW_ANALYSIS_WRITE_BATCH", "10"))  # results per storage write
+
+def interview_answers(interview: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Pair each candidate reply with the interviewer message it answered
+
+    Args:
+        interview: Stored interview session ({messages: [{isUser, message}]})
+
+    Returns:
+        Questions and responses, index-aligned
+    """
+    questions = []
+    responses = []
+    last_interviewer_message = ""
+    for msg in interview.get('messages', []):
+        text = msg.get('message', '')
+        if msg.get('isUser', True):
+            questions.append(last_interviewer_message)
+            responses.append(text)
+        else:
+            last_interviewer_message = text
+    return questions, responses
+
+def analyze_interview(interview: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Analyze one stored interview's answers
+
+    Args:
+        interview: Stored interview session
+
+    Returns:
+        Analysis (strengths, areas_for_improvement, overall_feedback, ...)
+        or a dictionary with an "error" key
+    """
+    job = interview.get('job') or {}
+    questions, responses = interview_answers(interview)
+    return analyze_interview_responses(
+        responses,
+        job_title=job.get('title', ''),
+        job_description=job.get('description', ''),
+        required_skills=job.get('required_skills', []),
+        questions_asked=questions
+    )
+
+def analyze_interviews(storage, interview_ids: List[str],
+                       concurrency: int = INTERVIEW_ANALYSIS_CONCURRENCY) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze many stored interviews concurrently, yielding results as they complete
+
+    Interviews are loaded with one storage read; successful analyses are saved
+    on the interviews in batches of INTERVIEW_ANALYSIS_WRITE_BATCH. Closing the
+    generator early saves the results so far and cancels analyses not yet started.
+
+    Args:
+        storage: Interview storage
+        interview_ids: Interview IDs to analyze (duplicates are ignored)
+        concurrency: Maximum analyses in flight
+
+    Returns:
+        Iterator of {interview_id, status, analysis | error}, in completion order
+    """
+    interview_ids = list(dict.fromkeys(interview_ids))
+    interviews = storage.get_interviews(interview_ids)
+    for interview_id in interview_ids:
+        if interview_id not in interviews:
+            yield {"interview_id": interview_id, "status": "not_found", "error": "Interview not found"}
+
+    start_time = time.time()
+    pending_writes = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="interview-analysis")
+    try:
+        futures = {
+            executor.submit(analyze_interview, interview): interview_id
+            for interview_id, interview in interviews.items()
+        }
+        for future in as_completed(futures):
+            interview_id = futures[future]
+            try:
+                analysis = future.result()
+            except Exception as e:
+                logger.error(f"Error analyzing interview {interview_id}: {e}", exc_info=True)
+                analysis = {"error": str(e)}
+
+            if "error" in analysis:
+                yield {"interview_id": interview_id, "status": "failed", "error": analysis["error"]}
+                continue
+
+            pending_writes[interview_id] = {"analysis": analysis, "analyzed_at": time.time()}
+            if len(pending_writes) >= INTERVIEW_ANALYSIS_WRITE_BATCH:
+                storage.update_interview_fields(pending_writes)
+                pending_writes = {}
+            yield {"interview_id": interview_id, "status": "ok", "analysis": analysis}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if pending_writes:
+            storage.update_interview_fields(pending_writes)
+        logger.info(f"Batch analysis of {len(interviews)} interviews finished in {time.time() - start_time:.2f}s "
+                    f"(concurrency {concurrency})")
@@ -3,18 +3,21 @@ import json
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-import sys
 import os
 import re
 import random
 
-# Add parent directory to path to allow imports
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from services.ai_service import get_ai_response, get_structured_output
+from app.services.ai_service import get_ai_response, get_structured_output
+from app.utils.prompt_budget import fit_sections, remaining_budget, trim_to_tokens
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Prompt budgets (tokens)
+INTERVIEW_DESCRIPTION_TOKENS = 50  # job description in the interviewer system prompt (about 200 characters)
+QUESTION_DESCRIPTION_TOKENS = 75  # job description when generating or analyzing questions (about 300 characters)
+INTERVIEW_ANALYSIS_PROMPT_TOKENS = int(os.environ.get("INTERVIEW_ANALYSIS_PROMPT_TOKENS", "4000"))
+
 # Import storage functionality (placeholder - implement based on your storage solution)
 # from services.data_service import save_interview, get_interview, update_interview
 
@@ -47,7 +50,7 @@ def create_interview_system_prompt(job_title: str, company_name: Optional[str] =
     This prompt is used when the AI needs to ask a question or react.
     """
     company_context = f" at {company_name}" if company_name else ""
-    description_context = f"\nKey responsibilities and technologies might include: {job_description[:200]}..." if job_description else ""
+    description_context = f"\nKey responsibilities and technologies might include: {trim_to_tokens(job_description, INTERVIEW_DESCRIPTION_TOKENS)}" if job_description else ""
     skills_context = f"\nKey required skills are: {', '.join(required_skills)}" if required_skills else ""
 
     return f"""You are a friendly, professional, and engaging AI hiring manager conducting a technical interview for the {job_title} role{company_context}.
@@ -60,7 +63,7 @@ Respond in Polish, using natural Polish phrasing.
 NEVER include <think> tags in your responses.
 """
 
-def generate_interview_questions(job_data: Dict[str, Any], skills: List[str], experience_level: str, difficulty: str = "medium", num_questions: int = 5) -> List[str]:
+def generate_interview_questions(job_data: Dict[str, Any], skills: List[str], experience_level: str, difficulty: str = "medium", num_questions: int = 5, language: str = "Polish") -> List[str]:
     """
     Generate a list of interview questions using AI based on job data and candidate profile.
     Args:
@@ -69,6 +72,7 @@ def generate_interview_questions(job_data: Dict[str, Any], skills: List[str], ex
         experience_level: Candidate's experience level.
         difficulty: Desired difficulty (easy, medium, hard).
         num_questions: Number of questions to generate.
+        language: Language of the questions.
     Returns:
         A list of question strings.
     """
@@ -81,7 +85,7 @@ def generate_interview_questions(job_data: Dict[str, Any], skills: List[str], ex
         "properties": {
             "interview_questions": {
                 "type": "array",
-                "description": f"A list of exactly {num_questions} distinct technical interview questions for a {job_title} candidate with {experience_level} experience, considering these skills: {', '.join(skills if skills else ['general relevant skills'])}. Difficulty: {difficulty}. Questions should be in Polish.",
+                "description": f"A list of exactly {num_questions} distinct technical interview questions for a {job_title} candidate with {experience_level} experience, considering these skills: {', '.join(skills if skills else ['general relevant skills'])}. Difficulty: {difficulty}. Questions should be in {language}.",
                 "items": {"type": "string"}
             }
         },
@@ -92,18 +96,18 @@ def generate_interview_questions(job_data: Dict[str, Any], skills: List[str], ex
 Candidate's stated experience level: {experience_level}.
 Candidate's known skills: {', '.join(skills) if skills else 'Not specified, focus on general skills for the role.'}
 Job required skills: {', '.join(required_skills) if required_skills else 'General for the role.'}
-Job description snippet: {job_description[:300]}...
+Job description snippet: {trim_to_tokens(job_description, QUESTION_DESCRIPTION_TOKENS)}
 
 Desired difficulty for questions: {difficulty}.
 Focus on questions that assess problem-solving abilities and practical knowledge.
-Ensure questions are in Polish.
+Ensure questions are in {language}.
 """
     
-    system_prompt = "You are an AI assistant specialized in generating high-quality technical interview questions. Provide the output in the specified JSON format. Questions should be in Polish."
+    system_prompt = f"You are an AI assistant specialized in generating high-quality technical interview questions. Provide the output in the specified JSON format. Questions should be in {language}."
     
     try:
         logger.info(f"Generating {num_questions} interview questions for {job_title} ({difficulty}).")
-        response = get_structured_output(prompt, system_prompt, schema)
+        response = get_structured_output(prompt, system_prompt, schema, call_site="interview_questions")
         if response and "interview_questions" in response and isinstance(response["interview_questions"], list):
             questions = response["interview_questions"]
             logger.info(f"Successfully generated {len(questions)} questions.")
@@ -136,17 +140,17 @@ def analyze_interview_responses(
     if not user_responses:
         return {"error": "No responses to analyze."}
 
-    responses_text = ""
     if questions_asked and len(questions_asked) == len(user_responses):
-        for i, question in enumerate(questions_asked):
-            responses_text += f"Pytanie {i+1}: {question}\nOdpowiedź kandydata {i+1}: {user_responses[i]}\n\n"
+        exchanges = [
+            f"Pytanie {i+1}: {question}\nOdpowiedź kandydata {i+1}: {user_responses[i]}"
+            for i, question in enumerate(questions_asked)
+        ]
     else:
-        for i, response in enumerate(user_responses):
-            responses_text += f"Odpowiedź kandydata {i+1}: {response}\n\n"
+        exchanges = [f"Odpowiedź kandydata {i+1}: {response}" for i, response in enumerate(user_responses)]
 
     job_context = f" stanowisko {job_title}."
     if job_description:
-        job_context += f" Opis stanowiska: {job_description[:300]}..."
+        job_context += f" Opis stanowiska: {trim_to_tokens(job_description, QUESTION_DESCRIPTION_TOKENS)}"
     if required_skills:
         job_context += f" Wymagane umiejętności: {', '.join(required_skills)}."
 
@@ -176,7 +180,10 @@ def analyze_interview_responses(
         "required": ["strengths", "areas_for_improvement", "overall_feedback"]
     }
 
-    prompt = f"""Przeanalizuj poniższy transkrypt odpowiedzi kandydata z rozmowy kwalifikacyjnej na{job_context}
+    system_prompt = "Jesteś doświadczonym menedżerem HR specjalizującym się w analizie rozmów kwalifikacyjnych i udzielaniu feedbacku. Odpowiedź musi być w formacie JSON zgodnym z podanym schematem, w języku polskim."
+
+    def build_prompt(responses_text: str) -> str:
+        return f"""Przeanalizuj poniższy transkrypt odpowiedzi kandydata z rozmowy kwalifikacyjnej na{job_context}
 
 Transkrypt odpowiedzi:
 {responses_text}
@@ -190,12 +197,18 @@ Twoim zadaniem jest ocena tych odpowiedzi. Zidentyfikuj:
 Informacje zwrotne powinny być konstruktywne, profesjonalne i pomocne dla kandydata.
 Odpowiedz w języku polskim.
 """
-    
-    system_prompt = "Jesteś doświadczonym menedżerem HR specjalizującym się w analizie rozmów kwalifikacyjnych i udzielaniu feedbacku. Odpowiedź musi być w formacie JSON zgodnym z podanym schematem, w języku polskim."
+
+    # Every exchange keeps a share of the budget; long answers are cut at sentence ends
+    fitted = fit_sections(
+        [{"name": "exchanges", "items": exchanges}],
+        remaining_budget(INTERVIEW_ANALYSIS_PROMPT_TOKENS, system_prompt, build_prompt("")),
+        call_site="interview_analysis"
+    )
+    prompt = build_prompt("".join(f"{exchange}\n\n" for exchange in fitted["exchanges"]))
 
     try:
         logger.info(f"Analyzing {len(user_responses)} interview responses for {job_title}.")
-        analysis = get_structured_output(prompt, system_prompt, schema)
+        analysis = get_structured_output(prompt, system_prompt, schema, call_site="interview_analysis")
         if analysis and "strengths" in analysis and "areas_for_improvement" in analysis and "overall_feedback" in analysis:
             logger.info("Successfully analyzed interview responses.")
             return analysis
@@ -0,0 +1,245 @@
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterator, Set
+
+from app.utils.turn_classifier import get_turn_classifier
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Interview length limits
+TECHNICAL_QUESTION_LIMIT = 5
+MAX_AI_MESSAGES = 10  # fallback end condition when question counting misses
+
+def new_session(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create the state for a new interview session
+
+    Args:
+        job: Job being interviewed for
+
+    Returns:
+        Session data (not yet persisted)
+    """
+    now = time.time()
+    return {
+        "id": f"session_{int(now)}_{str(uuid.uuid4())[:8]}",
+        "type": "session",
+        "job_id": job.get("id"),
+        "job": job,
+        "status": "active",
+        "messages": [],
+        "ai_message_count": 0,
+        "user_message_count": 0,
+        "technical_questions_asked": 0,
+        "previous_questions": [],
+        "vague_answer_count": 0,
+        "vague_answers": [],
+        # Whether the last AI message was a question, and if so whether it was technical
+        "pending_question_technical": None,
+        # Running summary of messages[:summary_upto], maintained in the background
+        "summary": "",
+        "summary_upto": 0,
+        "end_summary": {},
+        "created_at": now
+    }
+
+def record_ai_message(session: Dict[str, Any], text: str, message_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Append an interviewer message and update the question counters
+
+    Args:
+        session: Session data, updated in place
+        text: Message text
+        message_id: Optional message ID (generated if omitted)
+
+    Returns:
+        The stored message
+    """
+    message = {"id": message_id or str(uuid.uuid4()), "isUser": False, "message": text}
+    session["messages"].append(message)
+    session["ai_message_count"] += 1
+
+    signals = get_turn_classifier(session["job"].get("required_skills", [])).classify(text)
+    if signals["is_question"]:
+        is_technical = signals["technical"]
+        if is_technical:
+            session["technical_questions_asked"] += 1
+            session["previous_questions"].append(text)
+        session["pending_question_technical"] = is_technical
+    else:
+        session["pending_question_technical"] = None
+
+    return message
+
+def record_user_message(session: Dict[str, Any], text: str, message_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Append a candidate reply and, if it answers a question, score it for vagueness
+
+    Args:
+        session: Session data, updated in place
+        text: Reply text
+        message_id: Optional message ID (generated if omitted)
+
+    Returns:
+        The stored message
+    """
+    message = {"id": message_id or str(uuid.uuid4()), "isUser": True, "message": text}
+    session["messages"].append(message)
+    session["user_message_count"] += 1
+
+    question_technical = session["pending_question_technical"]
+    session["pending_question_technical"] = None
+    if question_technical is None:
+        return message
+
+    # A short answer to a technical question should contain technical details
+    classifier = get_turn_classifier(session["job"].get("required_skills", []))
+    if classifier.is_vague(classifier.classify(text), question_technical):
+        session["vague_answer_count"] += 1
+        session["vague_answers"].append(text)
+
+    return message
+
+def session_from_messages(job: Dict[str, Any], messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build session state by replaying a full client-side history (legacy requests)
+
+    Args:
+        job: Job being interviewed for
+        messages: Messages in the frontend format ({id, isUser, message})
+
+    Returns:
+        Session data equivalent to having recorded each message in turn
+    """
+    session = new_session(job)
+    for msg in messages:
+        if msg.get('isUser', True):
+            record_user_message(session, msg.get('message', ''), msg.get('id'))
+        else:
+            record_ai_message(session, msg.get('message', ''), msg.get('id'))
+    return session
+
+def should_end_interview(session: Dict[str, Any]) -> bool:
+    """
+    Check whether the interview should close after the candidate's latest reply
+
+    Args:
+        session: Session data
+
+    Returns:
+        True if enough technical questions were asked (or the message cap was hit)
+        and the candidate has just answered
+    """
+    messages = session["messages"]
+    enough = session["technical_questions_asked"] >= TECHNICAL_QUESTION_LIMIT \
+        or session["ai_message_count"] >= MAX_AI_MESSAGES
+    return enough and len(messages) >= 2 and messages[-1].get('isUser', False)
+
+_session_locks: Dict[str, threading.Lock] = {}
+_session_locks_lock = threading.Lock()
+
+def _session_lock(session_id: str) -> threading.Lock:
+    with _session_locks_lock:
+        lock = _session_locks.get(session_id)
+        if lock is None:
+            lock = _session_locks[session_id] = threading.Lock()
+        return lock
+
+_turns_in_flight: Set[str] = set()
+
+@contextmanager
+def session_turn(session_id: str) -> Iterator[bool]:
+    """
+    Claim a session for one conversation turn, from loading it to saving the reply
+
+    The model call takes seconds, so a second turn is refused rather than
+    queued; otherwise both would reply to the same state and one write would
+    be lost. The session lock is not held meanwhile, so background summary
+    updates still go through.
+
+    Args:
+        session_id: Session ID
+
+    Yields:
+        True if this turn holds the session, False if another turn does
+    """
+    with _session_locks_lock:
+        claimed = session_id not in _turns_in_flight
+        if claimed:
+            _turns_in_flight.add(session_id)
+    try:
+        yield claimed
+    finally:
+        if claimed:
+            with _session_locks_lock:
+                _turns_in_flight.discard(session_id)
+
+def save_session(storage, session: Dict[str, Any]) -> str:
+    """
+    Save a session, keeping results written in the background meanwhile
+
+    Those are a newer running summary and a finished end summary.
+
+    Args:
+        storage: Interview storage
+        session: Session data
+
+    Returns:
+        Session ID
+    """
+    with _session_lock(session["id"]):
+        stored = storage.get_interview(session["id"])
+        if stored and stored.get("summary_upto", 0) > session.get("summary_upto", 0):
+            session["summary"] = stored["summary"]
+            session["summary_upto"] = stored["summary_upto"]
+        if stored and session.get("end_summary_status") == "pending" \
+                and stored.get("end_summary_status") in ("ready", "failed"):
+            session["end_summary"] = stored.get("end_summary", {})
+            session["end_summary_status"] = stored["end_summary_status"]
+        return storage.save_interview(session)
+
+def update_session_summary(storage, session_id: str, expected_upto: int, summary_upto: int, summary: str) -> bool:
+    """
+    Store a new running summary if the session has not moved on without it
+
+    Args:
+        storage: Interview storage
+        session_id: Session ID
+        expected_upto: summary_upto the new summary was built from
+        summary_upto: Number of leading messages the new summary covers
+        summary: Summary text
+
+    Returns:
+        True if the summary was stored
+    """
+    with _session_lock(session_id):
+        session = storage.get_interview(session_id)
+        if not session or session.get("summary_upto", 0) != expected_upto:
+            return False
+        session["summary"] = summary
+        session["summary_upto"] = summary_upto
+        storage.update_interview(session_id, session)
+        return True
+
+def update_session(storage, session_id: str, updates: Dict[str, Any]) -> bool:
+    """
+    Set fields on a stored session
+
+    Args:
+        storage: Interview storage
+        session_id: Session ID
+        updates: Fields to set
+
+    Returns:
+        True if the session exists and was updated
+    """
+    with _session_lock(session_id):
+        session = storage.get_interview(session_id)
+        if not session:
+            return False
+        session.update(updates)
+        return storage.update_interview(session_id, session)
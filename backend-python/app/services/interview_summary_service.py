@@ -0,0 +1,317 @@
+import os
+import copy
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Any, Callable, Optional
+
+from app.services.ai_service import get_structured_output
+from app.services.conversation_context import build_transcript
+from app.services.interview_session_service import update_session
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# End summaries run next to the closing message instead of before it
+INTERVIEW_SUMMARY_WORKERS = int(os.environ.get("INTERVIEW_SUMMARY_WORKERS", "4"))
+
+# Called with each generated end summary (e.g. to prepare follow-up content)
+end_summary_listeners: List[Callable[[Dict[str, Any]], Any]] = []
+
+def generate_end_summary(session: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluate a finished interview and build the learning roadmap
+
+    Args:
+        session: Session data with the full interview
+
+    Returns:
+        End summary (passed, rating, improvements, summary, learning_roadmap);
+        a heuristic fallback if the AI evaluation fails
+    """
+    job = session["job"]
+    job_title = job.get('title', 'the position')
+    company = job.get('company', 'our company')
+    skills_text = ', '.join(job.get('required_skills', []))
+    vague_answer_count = session["vague_answer_count"]
+    messages = session["messages"]
+
+    user_messages = [msg.get('message', '') for msg in messages if msg.get('isUser', True)]
+    # Generate summary as JSON instead of string
+    summary_prompt = f"""
+    You are an AI evaluating a technical interview for a {job_title} position at {company}.
+
+    The interview has concluded, and now you need to evaluate the candidate based on their answers.
+
+    Required Skills for the position: {skills_text}
+
+    CRITICAL EVALUATION INSTRUCTIONS:
+    1. Carefully analyze the depth and specificity of answers
+    2. Penalize vague answers significantly - if the candidate gave {vague_answer_count} vague answers, their rating should be reduced by at least {vague_answer_count * 10} points
+    3. Look for specific examples and technical details in the answers
+    4. Be strict in evaluating whether the candidate demonstrated actual knowledge
+    5. Be especially critical of answers that just say "Yes, I know that" without elaboration
+    6. If most answers are vague or lack depth, the candidate should not pass
+    7. To pass, a candidate must demonstrate actual knowledge, not just claim to have it
+    8. Rating should reflect demonstrated skill, not just claimed experience
+
+    IMPORTANT: You must produce a JSON object with the following fields:
+    1. "passed": a boolean indicating if the candidate passed the interview (true/false)
+    2. "rating": a number from 1 to 100 representing the candidate's performance
+    3. "improvements": an array of strings with at least 2 specific areas where the candidate could improve
+    4. "summary": a detailed paragraph evaluating the candidate's performance
+    5. "learning_roadmap": an object with the following structure:
+       a. "key_areas": an array of 3-5 strings representing specific skills or topics the candidate should focus on
+       b. "resources": an array of objects, each representing a learning resource with:
+          - "title": string - name of the resource
+          - "type": string - one of "article", "course", "book", "video", or "practice"
+          - "description": string - brief description of the resource
+          - "difficulty": string - one of "beginner", "intermediate", or "advanced"
+          - "url": string (optional) - a URL to a general learning platform like Coursera, Udemy, etc.
+       c. "suggested_timeline": string - a brief timeline for learning these skills
+
+    Based on the candidate's performance in the interview, create a personalized learning roadmap to help them improve in areas where they struggled.
+
+    Here is the conversation between the interviewer and the candidate to evaluate:
+    {build_transcript(session)}
+
+    Important evaluation factors:
+    - The candidate gave {vague_answer_count} vague answers during the interview
+    - Vague answers should significantly reduce their score
+    - If more than 2 answers were vague, the candidate should likely not pass
+
+    Analyze their answers carefully. Evaluate technical knowledge, communication skills, and relevant experience.
+    If they frequently said "I don't know" or gave vague or incorrect answers, they should receive a lower score and not pass.
+    If they demonstrated good understanding of the required skills with specific examples, they should receive a higher score and likely pass.
+
+    Return ONLY the JSON object with these fields and nothing else.
+    """
+
+    # Try to get a structured output for the summary
+    try:
+        # Define the schema for structured output
+        json_schema = {
+            "type": "object",
+            "properties": {
+                "passed": {"type": "boolean"},
+                "rating": {"type": "integer", "minimum": 1, "maximum": 100},
+                "improvements": {"type": "array", "items": {"type": "string"}},
+                "summary": {"type": "string"},
+                "learning_roadmap": {
+                    "type": "object",
+                    "properties": {
+                        "key_areas": {"type": "array", "items": {"type": "string"}},
+                        "resources": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "title": {"type": "string"},
+                                    "type": {"type": "string", "enum": ["article", "course", "book", "video", "practice"]},
+                                    "description": {"type": "string"},
+                                    "difficulty": {"type": "string", "enum": ["beginner", "intermediate", "advanced"]},
+                                    "url": {"type": "string"}
+                                },
+                                "required": ["title", "type", "description", "difficulty"]
+                            }
+                        },
+                        "suggested_timeline": {"type": "string"}
+                    },
+                    "required": ["key_areas", "resources", "suggested_timeline"]
+                }
+            },
+            "required": ["passed", "rating", "improvements", "summary", "learning_roadmap"]
+        }
+
+        # Get structured JSON output
+        summary_response = get_structured_output(
+            prompt=f"Evaluate this technical interview with {vague_answer_count} vague responses out of {len(user_messages)} total responses",
+            system_prompt=summary_prompt,
+            schema=json_schema,
+            call_site="end_summary"
+        )
+
+
+        # Check if we got a valid response
+        if isinstance(summary_response, dict) and "passed" in summary_response:
+           end_summary = summary_response
+
+           # Ensure the rating reflects vague answers
+           if vague_answer_count > 0:
+               # Decrease rating based on vague answers
+               end_summary["rating"] = max(0, min(end_summary["rating"], 100 - (vague_answer_count * 10)))
+
+               # If 3 or more vague answers, candidate should not pass
+               if vague_answer_count >= 3:
+                   end_summary["passed"] = False
+
+           # Ensure improvements mention vague answers if they were an issue
+           if vague_answer_count > 0 and not any("specific" in imp.lower() or "detail" in imp.lower() or "vague" in imp.lower() or "elaborate" in imp.lower() for imp in end_summary.get("improvements", [])):
+               if "improvements" not in end_summary:
+                   end_summary["improvements"] = []
+               end_summary["improvements"].append("Provide specific examples and details rather than vague answers")
+
+           # Debug the learning_roadmap structure
+           logger.info(f"Raw summary response: {json.dumps(summary_response, indent=2)}")
+
+           if "learning_roadmap" not in end_summary:
+               logger.error("learning_roadmap field is missing entirely")
+           elif not end_summary["learning_roadmap"]:
+               logger.error("learning_roadmap field is empty or null")
+           elif "resources" not in end_summary["learning_roadmap"]:
+               logger.error("resources field is missing from learning_roadmap")
+           elif not end_summary["learning_roadmap"]["resources"]:
+               logger.error("resources array is empty")
+               # Force the resources array to contain expected data
+               end_summary["learning_roadmap"]["resources"] = [
+                   {
+                       "title": f"{job_title} Technical Interview Guide",
+                       "type": "course",
+                       "description": f"A comprehensive course on {job_title} interview preparation",
+                       "difficulty": "intermediate",
+                       "url": "https://www.udemy.com"
+                   }
+               ]
+           else:
+               logger.info(f"resources array contains {len(end_summary['learning_roadmap']['resources'])} items")
+        else:
+            # Fallback if structured output fails
+            logger.warning(f"Failed to get structured interview summary: {summary_response}")
+            # Create a basic fallback summary with learning roadmap
+            end_summary = {
+                "passed": vague_answer_count < 3 and "don't know" not in " ".join(user_messages).lower(),
+                "rating": max(0, 65 - (vague_answer_count * 10)),
+                "improvements": [
+                    "Provide specific technical details rather than vague answers",
+                    "Share real-world examples from past experience",
+                    "Demonstrate deeper knowledge of the technologies mentioned"
+                ],
+                "summary": f"The candidate interviewed for the {job_title} position but gave {vague_answer_count} vague answers without sufficient technical detail. This suggests they may not have the depth of knowledge required for this role.",
+                "learning_roadmap": {
+                    "key_areas": ["Technical fundamentals", "Interview preparation", "Practical experience"],
+                    "resources": [
+                        {
+                            "title": f"{job_title} fundamentals",
+                            "type": "course",
+                            "description": "A course covering the core concepts needed for this role",
+                            "difficulty": "beginner",
+                            "url": "https://www.coursera.org"
+                        },
+                        {
+                            "title": "Technical interview preparation",
+                            "type": "book",
+                            "description": "Guide to answering common technical questions",
+                            "difficulty": "intermediate",
+                            "url": "https://www.amazon.com"
+                        }
+                    ],
+                    "suggested_timeline": "2-4 weeks of focused study and practice"
+                }
+            }
+    except Exception as summary_error:
+        logger.error(f"Error generating structured summary: {summary_error}")
+        # Fallback in case of errors
+        end_summary = {
+            "passed": vague_answer_count < 3,
+            "rating": max(10, 70 - (vague_answer_count * 15)),
+            "improvements": ["Provide specific examples rather than vague answers", "Demonstrate deeper knowledge of required technologies"],
+            "summary": f"The candidate interviewed for the {job_title} position and gave {vague_answer_count} vague answers, suggesting they may not have the depth of knowledge required for this role.",
+            "learning_roadmap": {
+                "key_areas": ["Core technologies", "Communication skills", "Technical depth"],
+                "resources": [
+                    {
+                        "title": "Technical documentation",
+                        "type": "article",
+                        "description": "Read official documentation for required technologies",
+                        "difficulty": "intermediate"
+                    }
+                ],
+                "suggested_timeline": "1-2 weeks of study"
+            }
+        }
+
+    return end_summary
+
+_executor = ThreadPoolExecutor(max_workers=INTERVIEW_SUMMARY_WORKERS, thread_name_prefix="interview-summary")
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+def start_end_summary(storage, session: Dict[str, Any]) -> Future:
+    """
+    Generate the end summary in the background
+
+    For stored sessions the result is written to the session as end_summary,
+    with end_summary_status going from "pending" to "ready".
+
+    Args:
+        storage: Interview storage holding the session, or None for a session that is not stored
+        session: Session data (end_summary_status is set to "pending")
+
+    Returns:
+        Future resolving to the end summary
+    """
+    session_id = session["id"]
+    snapshot = copy.deepcopy(session)
+    session["end_summary_status"] = "pending"
+
+    with _in_flight_lock:
+        future = _in_flight.get(session_id)
+        if future is not None:
+            return future
+
+        def run():
+            start_time = time.time()
+            try:
+                end_summary = generate_end_summary(snapshot)
+                logger.info(f"End summary for {session_id} took {time.time() - start_time:.2f}s")
+                if storage is not None:
+                    update_session(storage, session_id, {"end_summary": end_summary, "end_summary_status": "ready"})
+                for listener in end_summary_listeners:
+                    try:
+                        listener(end_summary)
+                    except Exception as e:
+                        logger.error(f"End summary listener failed for {session_id}: {e}", exc_info=True)
+                return end_summary
+            except Exception as e:
+                logger.error(f"Error generating end summary for {session_id}: {e}", exc_info=True)
+                if storage is not None:
+                    update_session(storage, session_id, {"end_summary_status": "failed"})
+                raise
+            finally:
+                with _in_flight_lock:
+                    _in_flight.pop(session_id, None)
+
+        future = _executor.submit(run)
+        _in_flight[session_id] = future
+        return future
+
+def get_end_summary_status(storage, session: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the end summary of a stored session for polling clients
+
+    A pending summary with no task in this process (e.g. after a restart) is
+    generated again.
+
+    Args:
+        storage: Interview storage holding the session
+        session: Session data
+
+    Returns:
+        Dict with status ("active", "pending", "ready" or "failed") and endSummary
+    """
+    status = session.get("end_summary_status")
+    if status is None:
+        return {"status": "active" if session.get("status") == "active" else "ready",
+                "endSummary": session.get("end_summary") or {}}
+
+    if status == "pending":
+        with _in_flight_lock:
+            running = session["id"] in _in_flight
+        if not running:
+            logger.warning(f"End summary for {session['id']} was not running, restarting it")
+            start_end_summary(storage, session)
+
+    end_summary = (session.get("end_summary") or {}) if status == "ready" else {}
+    return {"status": status, "endSummary": end_summary}
@@ -0,0 +1,298 @@
+import os
+import json
+import mmap
+import struct
+import logging
+import threading
+import uuid
+import weakref
+from collections.abc import Mapping
+from typing import Dict, List, Any, Optional, Iterator
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# File layout:
+#   header  | record table (fixed-width rows) | string heap (UTF-8)
+CATALOG_MAGIC = b"JPAICAT1"
+CATALOG_VERSION = 1
+HEADER_STRUCT = struct.Struct("<8sIIQ")  # magic, version, record count, heap offset
+
+# String columns stored in the heap, in record order
+STRING_COLUMNS = (
+    "id",
+    "title",
+    "company",
+    "location",
+    "description",
+    "salary_range",
+    "employment_type",
+    "required_skills",
+    "skills_lower",
+    "extra"
+)
+COLUMN_INDEX = {name: i for i, name in enumerate(STRING_COLUMNS)}
+
+# Columns exposed as job keys (the rest are internal)
+JOB_STRING_KEYS = STRING_COLUMNS[:7]
+
+# (offset, length) per string column, presence bitmask, experience level code
+RECORD_STRUCT = struct.Struct(f"<{len(STRING_COLUMNS) * 2}IHB1x")
+
+# Separator for list columns (never appears in skill names)
+LIST_SEPARATOR = "\x1f"
+
+EXPERIENCE_CODES = {'junior': 1, 'mid': 2, 'senior': 3, 'expert': 4, 'lead': 5}
+EXPERIENCE_NAMES = {code: name for name, code in EXPERIENCE_CODES.items()}
+
+class JobRecord(Mapping):
+    """Read-only view of one job in a catalog, decoding fields on access"""
+
+    __slots__ = ("_catalog", "_index", "_extra")
+
+    def __init__(self, catalog: "JobCatalog", index: int):
+        self._catalog = catalog
+        self._index = index
+        self._extra = None
+
+    def _get_extra(self) -> Dict[str, Any]:
+        if self._extra is None:
+            raw = self._catalog._column(self._index, COLUMN_INDEX["extra"])
+            self._extra = json.loads(raw) if raw else {}
+        return self._extra
+
+    def __getitem__(self, key: str) -> Any:
+        if key in JOB_STRING_KEYS:
+            value = self._catalog._column(self._index, COLUMN_INDEX[key])
+        elif key == "required_skills":
+            value = self._catalog._list_column(self._index, COLUMN_INDEX["required_skills"])
+        elif key == "experience_level" and self._catalog._experience_code(self._index):
+            return EXPERIENCE_NAMES[self._catalog._experience_code(self._index)]
+        else:
+            value = None
+
+        if value is None:
+            return self._get_extra()[key]
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for key in JOB_STRING_KEYS:
+            if self._catalog._has_column(self._index, COLUMN_INDEX[key]):
+                yield key
+        if self._catalog._has_column(self._index, COLUMN_INDEX["required_skills"]):
+            yield "required_skills"
+        if self._catalog._experience_code(self._index):
+            yield "experience_level"
+        yield from self._get_extra()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def skills_lower(self) -> List[str]:
+        """Lowercased required skills, decoded without touching other columns"""
+        return self._catalog._list_column(self._index, COLUMN_INDEX["skills_lower"]) or []
+
+    def copy(self) -> Dict[str, Any]:
+        """Materialize the record as a plain dict"""
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"JobRecord(id={self.get('id')!r})"
+
+class JobCatalog:
+    """Memory-mapped, read-only job catalog shared across worker processes"""
+
+    def __init__(self, path: str):
+        """
+        Open a catalog file
+
+        Args:
+            path: Path to a file written by build_job_catalog
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self.version = _file_identity(os.fstat(self._file.fileno()))
+        # Records hold a reference to their catalog, so the map is released once the last one is dropped
+        self._finalizer = weakref.finalize(self, _release, self._mm, self._file)
+
+        magic, version, count, heap_offset = HEADER_STRUCT.unpack_from(self._mm, 0)
+        if magic != CATALOG_MAGIC or version != CATALOG_VERSION:
+            self.close()
+            raise ValueError(f"Not a job catalog file: {path}")
+
+        self._count = count
+        self._table_offset = HEADER_STRUCT.size
+        self._heap_offset = heap_offset
+        self._id_index = None
+
+    def close(self):
+        """Release the memory map"""
+        self._finalizer()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[JobRecord]:
+        for i in range(self._count):
+            yield JobRecord(self, i)
+
+    def _record(self, index: int):
+        return RECORD_STRUCT.unpack_from(self._mm, self._table_offset + index * RECORD_STRUCT.size)
+
+    def _has_column(self, index: int, column: int) -> bool:
+        return bool(self._record(index)[-2] & (1 << column))
+
+    def _experience_code(self, index: int) -> int:
+        return self._record(index)[-1]
+
+    def _column(self, index: int, column: int) -> Optional[str]:
+        record = self._record(index)
+        if not record[-2] & (1 << column):
+            return None
+        start = self._heap_offset + record[column * 2]
+        return self._mm[start:start + record[column * 2 + 1]].decode('utf-8')
+
+    def _list_column(self, index: int, column: int) -> Optional[List[str]]:
+        value = self._column(index, column)
+        if value is None:
+            return None
+        return value.split(LIST_SEPARATOR) if value else []
+
+    def get(self, job_id: Any) -> Optional[JobRecord]:
+        """
+        Get a job record by ID
+
+        Args:
+            job_id: Job ID (compared as a string, so 5 and "5" find the same job)
+
+        Returns:
+            Job record or None if not found
+        """
+        if self._id_index is None:
+            # Non-string ids (e.g. ints) live in the extra column; index both by str() like the JSON lookup did
+            index_by_id = {}
+            for i in range(self._count):
+                record_id = JobRecord(self, i).get("id")
+                if record_id is not None:
+                    index_by_id.setdefault(str(record_id), i)
+            self._id_index = index_by_id
+
+        index = self._id_index.get(str(job_id))
+        return JobRecord(self, index) if index is not None else None
+
+def _release(mm: mmap.mmap, file) -> None:
+    """Close a catalog's memory map and file"""
+    mm.close()
+    file.close()
+
+def _file_identity(stat: os.stat_result) -> tuple:
+    """Identify a version of a catalog file (a rebuild replaces the inode)"""
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def build_job_catalog(jobs: List[Dict[str, Any]], path: str) -> int:
+    """
+    Write jobs to a catalog file (atomically replacing any existing one)
+
+    Args:
+        jobs: List of job data
+        path: Destination path
+
+    Returns:
+        Number of records written
+    """
+    heap = bytearray()
+    table = bytearray()
+
+    def add_string(value: str):
+        encoded = value.encode('utf-8')
+        offset = len(heap)
+        heap.extend(encoded)
+        return offset, len(encoded)
+
+    for job in jobs:
+        values = [None] * len(STRING_COLUMNS)
+        extra = {}
+
+        for key, value in job.items():
+            if key in JOB_STRING_KEYS and isinstance(value, str):
+                values[COLUMN_INDEX[key]] = value
+            elif key == "required_skills" and isinstance(value, list) and all(isinstance(s, str) for s in value):
+                values[COLUMN_INDEX["required_skills"]] = LIST_SEPARATOR.join(value)
+                values[COLUMN_INDEX["skills_lower"]] = LIST_SEPARATOR.join(s.lower() for s in value)
+            elif key == "experience_level" and value in EXPERIENCE_CODES:
+                continue
+            else:
+                extra[key] = value
+
+        if extra:
+            values[COLUMN_INDEX["extra"]] = json.dumps(extra, ensure_ascii=False)
+
+        fields = []
+        presence = 0
+        for column, value in enumerate(values):
+            if value is None:
+                fields.extend((0, 0))
+            else:
+                presence |= 1 << column
+                fields.extend(add_string(value))
+
+        experience_code = EXPERIENCE_CODES.get(job.get("experience_level"), 0)
+        table.extend(RECORD_STRUCT.pack(*fields, presence, experience_code))
+
+    heap_offset = HEADER_STRUCT.size + len(table)
+    header = HEADER_STRUCT.pack(CATALOG_MAGIC, CATALOG_VERSION, len(jobs), heap_offset)
+
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(table)
+            f.write(heap)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    logger.info(f"Built job catalog {path} with {len(jobs)} jobs ({heap_offset + len(heap)} bytes)")
+    return len(jobs)
+
+_open_catalogs: Dict[str, JobCatalog] = {}
+_open_lock = threading.Lock()
+
+def open_job_catalog(path: str) -> Optional[JobCatalog]:
+    """
+    Open a catalog, reusing the mapping until the file is replaced
+
+    The previous mapping is released as soon as no record handed out from it
+    is still referenced.
+
+    Args:
+        path: Catalog file path
+
+    Returns:
+        Catalog or None if the file does not exist or is invalid
+    """
+    try:
+        version = _file_identity(os.stat(path))
+    except OSError:
+        return None
+
+    with _open_lock:
+        catalog = _open_catalogs.get(path)
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        try:
+            catalog = JobCatalog(path)
+        except Exception as e:
+            logger.error(f"Error opening job catalog {path}: {e}")
+            return None
+
+        _open_catalogs[path] = catalog
+        return catalog
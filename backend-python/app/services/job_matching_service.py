@@ -1,18 +1,26 @@
 import logging
 import uuid
-from typing import Dict, List, Any, Optional
-import sys
+from typing import Dict, List, Any, Iterator, Optional
 import os
 import re
 import json
 
-# Add parent directory to path to allow imports
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from services.ai_service import get_structured_output
+from app.services.ai_service import get_structured_output, stream_structured_output
+from app.utils.prompt_budget import fit_sections, remaining_budget
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Prompt budget for AI job matching (tokens, system prompt included)
+JOB_MATCHING_PROMPT_TOKENS = int(os.environ.get("JOB_MATCHING_PROMPT_TOKENS", "6000"))
+JOB_MATCHING_PROFILE_MAX_TOKENS = 1500  # about the 6000 characters previously kept
+JOB_MATCHING_DESCRIPTION_MAX_TOKENS = 75  # about the 300 characters previously kept per job
+
+# Job list layout in the matching prompt: "table" (header plus one delimited row per job) or "json"
+JOB_PROMPT_FORMAT = os.environ.get("JOB_PROMPT_FORMAT", "table").lower()
+JOB_TABLE_COLUMNS = ["id", "title", "level", "skills", "description"]
+JOB_TABLE_DELIMITER = " | "
+
 # Job categories and keywords
 JOB_CATEGORIES = {
     "tech": ["developer", "software", "programmer", "engineer", "devops", "data", "it", "web", "frontend", "backend", "fullstack", 
@@ -92,25 +100,71 @@ def match_job_to_skills(job: Dict[str, Any], user_skills: List[str], experience_
         logger.error(f"Error matching job to skills: {e}")
         return 30  # Default minimum match
 
-def match_jobs_with_ai(profile_text: str, job_keyword: str = "", jobs: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+def _table_cell(value: str) -> str:
+    """Keep a value on one line and free of the column delimiter"""
+    return re.sub(r'\s+', ' ', str(value)).replace("|", "/").strip()
+
+def encode_jobs_for_prompt(jobs: List[Dict[str, Any]], descriptions: List[str],
+                           prompt_format: str = JOB_PROMPT_FORMAT):
     """
-    Match jobs using AI. Returns list with snake_case keys.
+    Encode the job list for the matching prompt
+
+    The table layout names each column once and refers to jobs by short ids
+    (J1, J2, ...) instead of repeating keys, quotes and long storage ids.
+
+    Args:
+        jobs: Jobs to list
+        descriptions: Description text per job (already fitted to the budget)
+        prompt_format: "table" or "json"
+
+    Returns:
+        Tuple of the encoded text and a mapping of prompt job id to storage job id
     """
-    # Return empty list if no jobs provided
-    if not jobs:
-        logger.warning("No jobs provided to match_jobs_with_ai")
-        return []
-    
-    logger.info(f"Starting AI job matching (snake_case) with {len(jobs)} jobs, keyword: '{job_keyword}'")
-    
-    # Clean text - remove excess whitespace and limit length
+    if prompt_format == "json":
+        job_data_for_ai = []
+        for job, description in zip(jobs, descriptions):
+            job_data_for_ai.append({
+                "id": job.get('id', ''),
+                "title": job.get('title', ''),
+                "description": description,
+                "required_skills": job.get('required_skills', []),
+                "experience_level": job.get('experience_level', 'junior')
+            })
+        return json.dumps(job_data_for_ai, indent=2), {str(job.get('id', '')): str(job.get('id', '')) for job in jobs}
+
+    rows = [JOB_TABLE_DELIMITER.join(JOB_TABLE_COLUMNS)]
+    id_map = {}
+    for i, (job, description) in enumerate(zip(jobs, descriptions), start=1):
+        short_id = f"J{i}"
+        id_map[short_id] = str(job.get('id', ''))
+        rows.append(JOB_TABLE_DELIMITER.join([
+            short_id,
+            _table_cell(job.get('title', '')),
+            _table_cell(job.get('experience_level', 'junior')),
+            _table_cell(", ".join(job.get('required_skills', []))),
+            _table_cell(description)
+        ]))
+    return "\n".join(rows), id_map
+
+def _prepare_matching(profile_text: str, job_keyword: str, jobs: List[Dict[str, Any]],
+                      prompt_format: str) -> Dict[str, Any]:
+    """
+    Build the AI matching request and the data needed to map and fall back on its result
+
+    Args:
+        profile_text: User profile description
+        job_keyword: Optional keyword to focus the matching
+        jobs: Jobs to match
+        prompt_format: Job list layout in the prompt
+
+    Returns:
+        Dictionary with prompt, system_prompt, schema, id_map, jobs_by_id and the
+        profile skills and experience level used by the fallback
+    """
+    # Clean text - remove excess whitespace (length is fitted to the prompt budget below)
     clean_profile_text = re.sub(r'\s+', ' ', profile_text).strip()
     clean_job_keyword = re.sub(r'\s+', ' ', job_keyword).strip()
     
-    # Truncate if too long
-    if len(clean_profile_text) > 6000: # Slightly reduced to make space for keyword and prompt
-        clean_profile_text = clean_profile_text[:6000] + "..."
-    
     # Extract skills from profile for fallback
     from app.utils.skill_extractor import extract_skills_from_text # Moved here to be used in fallback too
     extracted_profile_skills_data = {}
@@ -124,17 +178,6 @@ def match_jobs_with_ai(profile_text: str, job_keyword: str = "", jobs: List[Dict
         skills_for_fallback_matching = []
         experience_for_fallback = "junior"
 
-    # Prepare list of job details for AI
-    job_data_for_ai = []
-    for job in jobs:
-        job_data_for_ai.append({
-            "id": job.get('id', ''),
-            "title": job.get('title', ''),
-            "description": job.get('description', '')[:300] + "...",
-            "required_skills": job.get('required_skills', []),
-            "experience_level": job.get('experience_level', 'junior')
-        })
-    
     # Define schema for structured output
     schema = {
         "type": "object",
@@ -180,24 +223,88 @@ def match_jobs_with_ai(profile_text: str, job_keyword: str = "", jobs: List[Dict
         },
         "required": ["job_matches", "extracted_user_skills"]
     }
-    #cwel
-    # Prepare prompt for AI
-    prompt = f"""Analyze profile and keyword to find matches.
-Profile: {clean_profile_text}
+    # System prompt for AI
+    system_prompt = """AI job matching assistant. Match candidates to jobs. Prioritize keyword. Provide reasoning. Output MUST be JSON per schema using snake_case keys. Respond in Polish if input is Polish, else English.
+    """
+    
+    layout_note = (f"Job List columns are separated by '{JOB_TABLE_DELIMITER.strip()}'; use the id column value as job_id. "
+                   if prompt_format != "json" else "")
+    
+    def build_prompt(profile: str, descriptions: List[str]) -> str:
+        job_list, _ = encode_jobs_for_prompt(jobs, descriptions, prompt_format)
+        return f"""Analyze profile and keyword to find matches.
+Profile: {profile}
 Keyword: {clean_job_keyword if clean_job_keyword else "Not specified"}
-Job List ({len(job_data_for_ai)}):
-{json.dumps(job_data_for_ai, indent=2)}
-Instructions: Your primary task is to match jobs based on the provided Keyword. If a Keyword is specified (and not "Not specified"), you MUST focus your matching on jobs that align with this Keyword. These keyword-matched jobs should be ranked highest. If no jobs align well with the Keyword, or after listing keyword-matched jobs, you may then consider jobs that match the Profile. Assess suitability for each job. Determine match_percentage, reasoning, matching_skills, and missing_skills. Extract extracted_user_skills from the profile. Return up to 10 matches, ordered by relevance (keyword matches first). Use snake_case keys in JSON output.
+Job List ({len(jobs)}):
+{job_list}
+{layout_note}Instructions: Your primary task is to match jobs based on the provided Keyword. If a Keyword is specified (and not "Not specified"), you MUST focus your matching on jobs that align with this Keyword. These keyword-matched jobs should be ranked highest. If no jobs align well with the Keyword, or after listing keyword-matched jobs, you may then consider jobs that match the Profile. Assess suitability for each job. Determine match_percentage, reasoning, matching_skills, and missing_skills. Extract extracted_user_skills from the profile. Return up to 10 matches, ordered by relevance (keyword matches first). Use snake_case keys in JSON output.
     """
     
-    # System prompt for AI
-    system_prompt = """AI job matching assistant. Match candidates to jobs. Prioritize keyword. Provide reasoning. Output MUST be JSON per schema using snake_case keys. Respond in Polish if input is Polish, else English.
+    # Profile first, then job descriptions share what is left of the budget
+    fitted = fit_sections([
+        {"name": "profile", "text": clean_profile_text, "priority": 1,
+         "max_tokens": JOB_MATCHING_PROFILE_MAX_TOKENS},
+        {"name": "descriptions", "items": [job.get('description', '') for job in jobs], "priority": 2,
+         "max_tokens": JOB_MATCHING_DESCRIPTION_MAX_TOKENS}
+    ], remaining_budget(JOB_MATCHING_PROMPT_TOKENS, system_prompt, build_prompt("", [""] * len(jobs))),
+        call_site="job_matching")
+    clean_profile_text = fitted["profile"]
+    prompt = build_prompt(clean_profile_text, fitted["descriptions"])
+    _, id_map = encode_jobs_for_prompt(jobs, [""] * len(jobs), prompt_format)
+    jobs_by_id = {str(job.get("id")): job for job in jobs}
+    
+    return {
+        "prompt": prompt,
+        "system_prompt": system_prompt,
+        "schema": schema,
+        "id_map": id_map,
+        "jobs_by_id": jobs_by_id,
+        "fallback_skills": skills_for_fallback_matching,
+        "fallback_experience": experience_for_fallback
+    }
+
+def _match_result(ai_match: Dict[str, Any], plan: Dict[str, Any],
+                  extracted_skills: List[str]) -> Optional[Dict[str, Any]]:
+    """Merge one AI match into a copy of its job, or None if the job id is unknown"""
+    # Short prompt ids map back to storage ids; a storage id given directly is accepted too
+    job_id = str(ai_match.get("job_id", "")).strip()
+    id_map = plan["id_map"]
+    original_job_data = plan["jobs_by_id"].get(id_map.get(job_id, id_map.get(job_id.upper(), job_id)))
+    if not original_job_data:
+        return None
+    
+    job_result = original_job_data.copy()
+    # Update with AI results (ensure keys match AI output/schema)
+    job_result["match_percentage"] = ai_match.get("match_percentage", 30)
+    job_result["matching_skills"] = ai_match.get("matching_skills", [])
+    job_result["missing_skills"] = ai_match.get("missing_skills", [])
+    job_result["reasoning"] = ai_match.get("reasoning", "No reasoning.")
+    job_result["ai_extracted_user_skills"] = extracted_skills
+    return job_result
+
+def match_jobs_with_ai(profile_text: str, job_keyword: str = "", jobs: List[Dict[str, Any]] = None,
+                       prompt_format: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Match jobs using AI. Returns list with snake_case keys.
+
+    Args:
+        profile_text: User profile description
+        job_keyword: Optional keyword to focus the matching
+        jobs: Jobs to match
+        prompt_format: Job list layout in the prompt (default JOB_PROMPT_FORMAT)
     """
+    # Return empty list if no jobs provided
+    if not jobs:
+        logger.warning("No jobs provided to match_jobs_with_ai")
+        return []
+    
+    logger.info(f"Starting AI job matching (snake_case) with {len(jobs)} jobs, keyword: '{job_keyword}'")
+    plan = _prepare_matching(profile_text, job_keyword, jobs, prompt_format or JOB_PROMPT_FORMAT)
     
     matched_jobs_final_snake = []
     try:
         logger.info("Sending request to AI for job matching (snake_case).")
-        ai_results = get_structured_output(prompt, system_prompt, schema)
+        ai_results = get_structured_output(plan["prompt"], plan["system_prompt"], plan["schema"], call_site="job_matching")
         
         if "error" in ai_results:
             raise Exception(f"AI service failed: {ai_results.get('details')}")
@@ -209,17 +316,8 @@ Instructions: Your primary task is to match jobs based on the provided Keyword.
         
         if job_matches_from_ai:
             for ai_match in job_matches_from_ai:
-                job_id = ai_match.get("job_id")
-                original_job_data = next((job for job in jobs if str(job.get("id")) == str(job_id)), None)
-                
-                if original_job_data:
-                    job_result = original_job_data.copy()
-                    # Update with AI results (ensure keys match AI output/schema)
-                    job_result["match_percentage"] = ai_match.get("match_percentage", 30)
-                    job_result["matching_skills"] = ai_match.get("matching_skills", [])
-                    job_result["missing_skills"] = ai_match.get("missing_skills", [])
-                    job_result["reasoning"] = ai_match.get("reasoning", "No reasoning.")
-                    job_result["ai_extracted_user_skills"] = extracted_skills_by_ai
+                job_result = _match_result(ai_match, plan, extracted_skills_by_ai)
+                if job_result:
                     matched_jobs_final_snake.append(job_result) # Append directly (already snake_case)
             
             matched_jobs_final_snake.sort(key=lambda x: x.get("match_percentage", 0), reverse=True)
@@ -231,6 +329,70 @@ Instructions: Your primary task is to match jobs based on the provided Keyword.
     except Exception as e:
         logger.error(f"Error during AI job matching: {e}. Falling back.", exc_info=True)
 
+    return _fallback_matches(jobs, job_keyword, plan["fallback_skills"], plan["fallback_experience"])
+
+def stream_jobs_with_ai(profile_text: str, job_keyword: str = "", jobs: List[Dict[str, Any]] = None,
+                        prompt_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Match jobs using AI, yielding each match as soon as the model has written it
+
+    Matches arrive in the model's order (most relevant first, as instructed);
+    the final event carries the ids sorted by match percentage. If the AI
+    call fails before any match was produced, the fallback matches are
+    yielded instead.
+
+    Args:
+        profile_text: User profile description
+        job_keyword: Optional keyword to focus the matching
+        jobs: Jobs to match
+        prompt_format: Job list layout in the prompt (default JOB_PROMPT_FORMAT)
+
+    Returns:
+        Iterator of {"type": "match", "match": job} events followed by one
+        {"type": "done", "total_matches", "order", "extracted_user_skills", "fallback"} event
+    """
+    if not jobs:
+        logger.warning("No jobs provided to stream_jobs_with_ai")
+        yield {"type": "done", "total_matches": 0, "order": [], "extracted_user_skills": [], "fallback": False}
+        return
+    
+    logger.info(f"Starting streamed AI job matching with {len(jobs)} jobs, keyword: '{job_keyword}'")
+    plan = _prepare_matching(profile_text, job_keyword, jobs, prompt_format or JOB_PROMPT_FORMAT)
+    
+    matches = []
+    extracted_skills = []
+    for event in stream_structured_output(plan["prompt"], plan["system_prompt"], plan["schema"],
+                                          array_key="job_matches", call_site="job_matching"):
+        if event["type"] == "item":
+            # Skills are listed after the matches, so streamed matches carry them only in the final event
+            job_result = _match_result(event["item"], plan, [])
+            if job_result:
+                matches.append(job_result)
+                yield {"type": "match", "match": job_result}
+        elif "error" not in event["result"]:
+            extracted_skills = event["result"].get("extracted_user_skills", [])
+        else:
+            logger.error(f"Streamed AI job matching failed: {event['result'].get('details')}")
+    
+    fallback = not matches
+    if fallback:
+        logger.warning("Streamed AI matching returned no results. Falling back.")
+        matches = _fallback_matches(jobs, job_keyword, plan["fallback_skills"], plan["fallback_experience"])
+        for job_result in matches:
+            yield {"type": "match", "match": job_result}
+    
+    order = [job["id"] for job in sorted(matches, key=lambda x: x.get("match_percentage", 0), reverse=True)]
+    yield {
+        "type": "done",
+        "total_matches": len(matches),
+        "order": order,
+        "extracted_user_skills": extracted_skills,
+        "fallback": fallback
+    }
+
+def _fallback_matches(jobs: List[Dict[str, Any]], job_keyword: str, skills_for_fallback_matching: List[str],
+                      experience_for_fallback: str) -> List[Dict[str, Any]]:
+    """Match jobs by extracted profile skills and keyword when the AI matching fails"""
     # Fallback to simpler matching method using extracted skills if AI fails or returns no results
     logger.info(f"Using fallback (snake_case): {len(skills_for_fallback_matching)} skills, {experience_for_fallback} experience, keyword '{job_keyword}'")
     
@@ -1,4 +1,6 @@
 import os
+import re
+import copy
 import json
 import logging
 import uuid
@@ -6,10 +8,21 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 import sys
 import time
+import threading
+
+from app.services.storage_codecs import get_codec, decode_payload
+from app.services.job_catalog import build_job_catalog, open_job_catalog
+from app.services.write_behind import get_write_behind_queue
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# How often a job catalog is checked for rebuilds by other processes (seconds)
+JOB_CATALOG_CHECK_INTERVAL = float(os.environ.get("JOB_CATALOG_CHECK_INTERVAL", "2"))
+
+# Server-side interview sessions (IDs from new_session) are stored one file per session
+SESSION_ID_PATTERN = re.compile(r"session_[A-Za-z0-9_-]+")
+
 # Sample jobs (imported from parent module if available)
 try:
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -21,14 +34,20 @@ except ImportError:
 class BaseLocalStorage:
     """Base class for local storage implementations"""
     
-    def __init__(self, directory: str):
+    def __init__(self, directory: str, codec: Optional[str] = None):
         """
         Initialize local storage
         
         Args:
             directory: Directory to store data
+            codec: Optional codec name used for writes (defaults to STORAGE_CODEC)
         """
         self.directory = directory
+        self.codec = get_codec(codec)
+        self.write_behind = None
+        self._state_lock = threading.RLock()
+        # File path -> (mtime, size) as last read or written by this process
+        self._file_versions: Dict[str, Any] = {}
         os.makedirs(directory, exist_ok=True)
     
     def _generate_id(self, prefix: str = "") -> str:
@@ -39,11 +58,83 @@ class BaseLocalStorage:
         """Get file path for an item"""
         return os.path.join(self.directory, f"{item_id}.json")
     
+    def _read_file(self, file_path: str) -> Any:
+        """Read and decode a data file, detecting the codec it was written with"""
+        with open(file_path, 'rb') as f:
+            return decode_payload(f.read())
+    
+    def _write_file(self, file_path: str, data: Any) -> None:
+        """Encode and atomically write a data file with the configured codec"""
+        with self._state_lock:
+            payload = self.codec.encode(data)
+        
+        tmp_path = f"{file_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, file_path)
+            self._file_versions[file_path] = self._file_version(file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    
+    def _persist(self, file_path: str, data: Any) -> bool:
+        """
+        Write a data file now, or schedule it on the write-behind queue
+        
+        With write-behind, data must be the in-memory state object: it is
+        encoded at flush time, so later changes are coalesced into one write.
+        """
+        if self.write_behind is not None and self.write_behind.submit(file_path, lambda: self._write_file(file_path, data)):
+            return True
+        
+        self._write_file(file_path, data)
+        return True
+    
+    def _caching(self) -> bool:
+        """Check if data files are kept in memory (write-behind enabled and not refused)"""
+        return self.write_behind is not None and self.write_behind.active
+    
+    @staticmethod
+    def _file_version(file_path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(file_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+    
+    def _load_cached(self, attr: str, file_path: str) -> Any:
+        """
+        Load a data file, keeping it in memory (in attribute attr) when write-behind is enabled
+        
+        The in-memory copy is reloaded if the file changed on disk since this
+        process last read or wrote it, unless a write of ours is still pending.
+        """
+        with self._state_lock:
+            cache = getattr(self, attr)
+            if cache is not None and self._caching():
+                unchanged = self._file_versions.get(file_path) == self._file_version(file_path)
+                if unchanged or self.write_behind.is_pending(file_path):
+                    return cache
+                logger.warning(f"{file_path} changed on disk, reloading")
+            
+            data = self._read_file(file_path) if os.path.exists(file_path) else {}
+            self._file_versions[file_path] = self._file_version(file_path)
+            setattr(self, attr, data if self._caching() else None)
+            return data
+    
+    def _detached(self, value: Any) -> Any:
+        """
+        Copy data handed out of (or into) the in-memory state, so callers cannot mutate it while a flush encodes it
+        
+        Pass only the records being returned or stored, never the whole cached file.
+        """
+        return copy.deepcopy(value) if self._caching() else value
+    
     def _save_item(self, item_id: str, data: Dict[str, Any]) -> bool:
         """Save item to a file"""
         try:
-            with open(self._get_file_path(item_id), 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self._write_file(self._get_file_path(item_id), data)
             return True
         except Exception as e:
             logger.error(f"Error saving item {item_id}: {e}")
@@ -54,8 +145,7 @@ class BaseLocalStorage:
         try:
             file_path = self._get_file_path(item_id)
             if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return self._read_file(file_path)
             return None
         except Exception as e:
             logger.error(f"Error getting item {item_id}: {e}")
@@ -68,8 +158,7 @@ class BaseLocalStorage:
             for filename in os.listdir(self.directory):
                 if filename.endswith('.json'):
                     file_path = os.path.join(self.directory, filename)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        items.append(json.load(f))
+                    items.append(self._read_file(file_path))
         except Exception as e:
             logger.error(f"Error listing items: {e}")
         return items
@@ -77,10 +166,24 @@ class BaseLocalStorage:
 class LocalJobStorage(BaseLocalStorage):
     """Local storage implementation for jobs"""
     
-    def __init__(self, data_file: str = "data/jobs.json"):
-        """Initialize local storage with data file path"""
-        super().__init__('data/jobs')
+    def __init__(self, data_file: str = "data/jobs.json", codec: Optional[str] = None, catalog_file: Optional[str] = None):
+        """
+        Initialize local storage with data file path
+        
+        Args:
+            data_file: Job data file
+            codec: Optional codec name used for writes
+            catalog_file: Optional memory-mapped catalog used for reads (defaults to JOB_CATALOG_FILE)
+        """
+        super().__init__('data/jobs', codec)
         self.data_file = data_file
+        self.catalog_file = catalog_file if catalog_file is not None else os.environ.get("JOB_CATALOG_FILE", "")
+        self.question_pools_file = os.path.join(os.path.dirname(data_file), "question_pools.json")
+        self.write_behind = get_write_behind_queue()
+        self._question_pools_cache = None
+        self.save_listeners = []
+        self._catalog = None
+        self._catalog_checked = 0.0
         self._ensure_data_dir()
         
         # Initialize with sample data if file doesn't exist
@@ -136,8 +239,7 @@ class LocalJobStorage(BaseLocalStorage):
         """Load job data from file"""
         try:
             if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return self._read_file(self.data_file)
             return []
         except Exception as e:
             logger.error(f"Error loading job data: {e}")
@@ -147,43 +249,128 @@ class LocalJobStorage(BaseLocalStorage):
         """Save job data to file"""
         try:
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self._write_file(self.data_file, data)
             return True
         except Exception as e:
             logger.error(f"Error saving job data: {e}")
             return False
     
-    def list_jobs(self, keyword: str = "") -> List[Dict[str, Any]]:
+    def _rebuild_catalog(self, jobs: List[Dict[str, Any]]) -> None:
+        """Rebuild the read-only catalog from job data"""
+        try:
+            build_job_catalog(jobs, self.catalog_file)
+        except Exception as e:
+            logger.error(f"Error building job catalog: {e}")
+    
+    def _get_catalog(self):
         """
-        List all jobs, optionally filtered by keyword
+        Get the memory-mapped catalog, rebuilding it if the data file is newer
+        
+        Writes through this storage reopen the catalog right away; the files
+        are only checked every JOB_CATALOG_CHECK_INTERVAL seconds for changes
+        made by other processes.
+        """
+        if not self.catalog_file:
+            return None
+        
+        now = time.monotonic()
+        catalog = self._catalog
+        if catalog is not None and now - self._catalog_checked < JOB_CATALOG_CHECK_INTERVAL:
+            return catalog
+        
+        try:
+            if (not os.path.exists(self.catalog_file) or
+                    os.path.getmtime(self.catalog_file) < os.path.getmtime(self.data_file)):
+                self._rebuild_catalog(self._load_data())
+        except OSError as e:
+            logger.error(f"Error checking job catalog: {e}")
+        
+        self._catalog = open_job_catalog(self.catalog_file)
+        self._catalog_checked = now
+        return self._catalog
+    
+    def _iter_jobs(self):
+        """Iterate jobs from the catalog if enabled, otherwise from the data file"""
+        catalog = self._get_catalog()
+        if catalog is not None:
+            return catalog
+        return self._load_data()
+    
+    def list_jobs_page(
+        self,
+        keyword: str = "",
+        skills: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+        include_description: bool = True
+    ) -> Dict[str, Any]:
+        """
+        List one page of jobs, optionally filtered by keyword and skills
         
         Args:
             keyword: Optional keyword to filter jobs
+            skills: Optional skills, a job matches if it requires any of them
+            limit: Optional page size
+            start_after: Job ID cursor returned as next_cursor by the previous page
+            include_description: Kept for parity with Firebase storage (catalog records decode descriptions lazily)
             
         Returns:
-            List of job data
+            Dictionary with jobs and next_cursor (None on the last page)
         """
-        jobs = self._load_data()
-        
-        if not keyword:
-            return jobs
-        
-        # Filter by keyword in title, description, or skills
+        jobs = self._iter_jobs()
         keyword_lower = keyword.lower()
+        skills_lower = set(s.lower() for s in (skills or []) if s)
         filtered_jobs = []
+        skipping = bool(start_after)
         
         for job in jobs:
-            title = job.get('title', '').lower()
-            description = job.get('description', '').lower()
-            required_skills = [s.lower() for s in job.get('required_skills', [])]
+            if skipping:
+                skipping = str(job.get('id')) != str(start_after)
+                continue
+            
+            required_skills = getattr(job, 'skills_lower', None)
+            if required_skills is None:
+                required_skills = [s.lower() for s in job.get('required_skills', [])]
+            
+            # Filter by keyword in title, skills, or description
+            # (description last, so catalog records only decode it when needed)
+            if keyword_lower and not (
+                keyword_lower in job.get('title', '').lower() or 
+                any(keyword_lower in skill for skill in required_skills) or 
+                keyword_lower in job.get('description', '').lower()):
+                continue
             
-            if (keyword_lower in title or 
-                keyword_lower in description or 
-                any(keyword_lower in skill for skill in required_skills)):
-                filtered_jobs.append(job)
+            if skills_lower and not skills_lower & set(required_skills):
+                continue
+            
+            filtered_jobs.append(job)
+            if limit and len(filtered_jobs) >= limit:
+                return {"jobs": filtered_jobs, "next_cursor": str(job.get('id'))}
+        
+        return {"jobs": filtered_jobs, "next_cursor": None}
+    
+    def list_jobs(
+        self,
+        keyword: str = "",
+        skills: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None,
+        include_description: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        List all jobs, optionally filtered by keyword
         
-        return filtered_jobs
+        Args:
+            keyword: Optional keyword to filter jobs
+            skills: Optional skills, a job matches if it requires any of them
+            limit: Optional maximum number of jobs (one page)
+            start_after: Optional job ID cursor for pagination
+            include_description: Kept for parity with Firebase storage
+            
+        Returns:
+            List of job data
+        """
+        return self.list_jobs_page(keyword, skills, limit, start_after, include_description)["jobs"]
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -195,6 +382,10 @@ class LocalJobStorage(BaseLocalStorage):
         Returns:
             Job data or None if not found
         """
+        catalog = self._get_catalog()
+        if catalog is not None:
+            return catalog.get(job_id)
+        
         jobs = self._load_data()
         
         for job in jobs:
@@ -235,23 +426,77 @@ class LocalJobStorage(BaseLocalStorage):
                 jobs.append(job_data)
         
         self._save_data(jobs)
+        if self.catalog_file:
+            self._rebuild_catalog(jobs)
+            self._catalog = open_job_catalog(self.catalog_file)
+            self._catalog_checked = time.monotonic()
+        for listener in self.save_listeners:
+            try:
+                listener(job_data)
+            except Exception as e:
+                logger.error(f"Job save listener failed for {job_id}: {e}", exc_info=True)
         return job_id
+    
+    def _load_question_pools(self) -> Dict[str, Any]:
+        """Load question pools (job ID -> pool key -> pool) from file"""
+        try:
+            return self._load_cached('_question_pools_cache', self.question_pools_file)
+        except Exception as e:
+            logger.error(f"Error loading question pools: {e}")
+            return {}
+    
+    def get_question_pool(self, job_id: str, pool_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a pre-generated interview question pool for a job
+        
+        Args:
+            job_id: Job ID
+            pool_key: Pool key (experience level and difficulty)
+            
+        Returns:
+            Pool data or None if none has been generated
+        """
+        with self._state_lock:
+            pools = self._load_question_pools()
+            return self._detached(pools.get(str(job_id), {}).get(pool_key))
+    
+    def save_question_pool(self, job_id: str, pool_key: str, pool: Dict[str, Any]) -> bool:
+        """
+        Save an interview question pool for a job
+        
+        Args:
+            job_id: Job ID
+            pool_key: Pool key (experience level and difficulty)
+            pool: Pool data
+            
+        Returns:
+            True if successful
+        """
+        with self._state_lock:
+            pools = self._load_question_pools()
+            pool['updated_at'] = time.time()
+            pools.setdefault(str(job_id), {})[pool_key] = self._detached(pool)
+            
+            try:
+                return self._persist(self.question_pools_file, pools)
+            except Exception as e:
+                logger.error(f"Error saving question pools: {e}")
+                return False
 
 class LocalInterviewStorage(BaseLocalStorage):
     """Local storage implementation for interviews"""
     
-    def __init__(self, data_file: str = "data/interviews.json"):
+    def __init__(self, data_file: str = "data/interviews.json", codec: Optional[str] = None):
         """Initialize local storage with data file path"""
-        super().__init__('data/interviews')
+        super().__init__('data/interviews', codec)
         self.data_file = data_file
+        self.write_behind = get_write_behind_queue()
+        self._cache = None
     
     def _load_data(self) -> Dict[str, Any]:
-        """Load interview data from file"""
+        """Load interview data from file (kept in memory when write-behind is enabled)"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
+            return self._load_cached('_cache', self.data_file)
         except Exception as e:
             logger.error(f"Error loading interview data: {e}")
             return {}
@@ -260,13 +505,42 @@ class LocalInterviewStorage(BaseLocalStorage):
         """Save interview data to file"""
         try:
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
+            return self._persist(self.data_file, data)
         except Exception as e:
             logger.error(f"Error saving interview data: {e}")
             return False
     
+    def _session_path(self, interview_id: str) -> Optional[str]:
+        """
+        Get the file of a server-side interview session, or None for other interviews
+        
+        Sessions are rewritten on every conversation turn, so each has its own
+        small file (written straight through) instead of living in the shared
+        data file. Session IDs come from clients, hence the strict pattern.
+        """
+        if not SESSION_ID_PATTERN.fullmatch(str(interview_id)):
+            return None
+        return self._get_file_path(interview_id)
+    
+    def _save_session(self, session_id: str, session: Dict[str, Any]) -> bool:
+        """Write a session to its own file, moving it out of the shared data file on first save"""
+        file_path = self._session_path(session_id)
+        first_save = not os.path.exists(file_path)
+        try:
+            self._write_file(file_path, session)
+        except Exception as e:
+            logger.error(f"Error saving interview session {session_id}: {e}")
+            return False
+        
+        if first_save:
+            # Sessions created before they had their own files
+            with self._state_lock:
+                interviews = self._load_data()
+                if session_id in interviews:
+                    del interviews[session_id]
+                    self._save_data(interviews)
+        return True
+    
     def get_interview(self, interview_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a specific interview by ID
@@ -277,8 +551,13 @@ class LocalInterviewStorage(BaseLocalStorage):
         Returns:
             Interview data or None if not found
         """
-        interviews = self._load_data()
-        return interviews.get(interview_id)
+        session_path = self._session_path(interview_id)
+        if session_path is not None and os.path.exists(session_path):
+            return self._get_item(interview_id)
+        
+        with self._state_lock:
+            interviews = self._load_data()
+            return self._detached(interviews.get(interview_id))
     
     def save_interview(self, interview_data: Dict[str, Any]) -> str:
         """
@@ -290,17 +569,20 @@ class LocalInterviewStorage(BaseLocalStorage):
         Returns:
             Interview ID
         """
-        interviews = self._load_data()
-        
         interview_id = interview_data.get('id')
         if not interview_id:
             interview_id = f"interview_{int(time.time())}_{str(uuid.uuid4())[:8]}"
             interview_data['id'] = interview_id
-        
         interview_data['updated_at'] = time.time()
-        interviews[interview_id] = interview_data
         
-        self._save_data(interviews)
+        if self._session_path(interview_id) is not None:
+            self._save_session(interview_id, interview_data)
+            return interview_id
+        
+        with self._state_lock:
+            interviews = self._load_data()
+            interviews[interview_id] = self._detached(interview_data)
+            self._save_data(interviews)
         return interview_id
     
     def update_interview(self, interview_id: str, interview_data: Dict[str, Any]) -> bool:
@@ -314,16 +596,80 @@ class LocalInterviewStorage(BaseLocalStorage):
         Returns:
             True if successful
         """
-        interviews = self._load_data()
-        
-        if interview_id not in interviews:
-            return False
-        
-        interview_data['updated_at'] = time.time()
-        interviews[interview_id] = interview_data
-        
-        return self._save_data(interviews)
-    
+        if self._session_path(interview_id) is not None:
+            if self.get_interview(interview_id) is None:
+                return False
+            interview_data['updated_at'] = time.time()
+            return self._save_session(interview_id, interview_data)
+        
+        with self._state_lock:
+            interviews = self._load_data()
+            
+            if interview_id not in interviews:
+                return False
+            
+            interview_data['updated_at'] = time.time()
+            interviews[interview_id] = self._detached(interview_data)
+            
+            return self._save_data(interviews)
+
+    def get_interviews(self, interview_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several interviews with a single load of the data file
+
+        Args:
+            interview_ids: Interview IDs
+
+        Returns:
+            Mapping of ID to interview data for the IDs that exist
+        """
+        found = {}
+        for interview_id in interview_ids:
+            session_path = self._session_path(interview_id)
+            if session_path is not None and os.path.exists(session_path):
+                found[interview_id] = self._get_item(interview_id)
+        
+        with self._state_lock:
+            interviews = self._load_data()
+            found.update(self._detached({i: interviews[i] for i in interview_ids if i in interviews and i not in found}))
+        return {i: found[i] for i in interview_ids if i in found}
+
+    def update_interview_fields(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Merge fields into several interviews and write the data file once
+
+        Args:
+            updates: Mapping of interview ID to the fields to set
+
+        Returns:
+            Number of interviews updated
+        """
+        updated = 0
+        now = time.time()
+        shared_updates = {}
+        for interview_id, fields in updates.items():
+            session_path = self._session_path(interview_id)
+            if session_path is None or not os.path.exists(session_path):
+                shared_updates[interview_id] = fields
+                continue
+            session = self._get_item(interview_id)
+            if session is not None and self._save_session(interview_id, {**session, **fields, 'updated_at': now}):
+                updated += 1
+
+        with self._state_lock:
+            interviews = self._load_data()
+
+            shared_updated = 0
+            for interview_id, fields in shared_updates.items():
+                if interview_id not in interviews:
+                    continue
+                interviews[interview_id] = {**interviews[interview_id], **self._detached(fields), 'updated_at': now}
+                shared_updated += 1
+
+            if shared_updated:
+                self._save_data(interviews)
+        return updated + shared_updated
+
     def list_interviews(self, job_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         List all interviews, optionally filtered by job ID
@@ -334,14 +680,14 @@ class LocalInterviewStorage(BaseLocalStorage):
         Returns:
             List of interview data
         """
-        interviews = self._load_data()
-        
-        # Convert to list
-        interview_list = list(interviews.values())
+        with self._state_lock:
+            interviews = self._load_data()
+            
+            # Filter by job ID if provided, then copy only the matches
+            interview_list = [i for i in interviews.values() if not job_id or i.get('job_id') == job_id]
+            interview_list = self._detached(interview_list)
         
-        # Filter by job ID if provided
-        if job_id:
-            interview_list = [i for i in interview_list if i.get('job_id') == job_id]
+        interview_list.extend(s for s in self._list_items() if not job_id or s.get('job_id') == job_id)
         
         # Sort by creation time (descending)
         interview_list.sort(key=lambda x: x.get('created_at', 0), reverse=True)
@@ -351,24 +697,45 @@ class LocalInterviewStorage(BaseLocalStorage):
 class LocalCVStorage(BaseLocalStorage):
     """Local storage implementation for CV analyses"""
     
-    def __init__(self, data_dir: str = "data/cv"):
+    def __init__(self, data_dir: str = "data/cv", codec: Optional[str] = None):
         """Initialize local storage with data directory path"""
-        super().__init__(data_dir)
+        super().__init__(data_dir, codec)
         self.data_dir = data_dir
         self.analysis_file = os.path.join(data_dir, "analysis.json")
+        # One file per content hash, so artifacts are never all loaded at once
+        self.artifacts_dir = os.path.join(data_dir, "artifacts")
+        self.write_behind = get_write_behind_queue()
+        self._analysis_cache = None
         self._ensure_data_dir()
+        self._migrate_artifacts_file()
     
     def _ensure_data_dir(self):
-        """Ensure data directory exists"""
+        """Ensure data directories exist"""
         os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.artifacts_dir, exist_ok=True)
+    
+    def _migrate_artifacts_file(self):
+        """Split the former single artifacts.json into one file per content hash"""
+        legacy_file = os.path.join(self.data_dir, "artifacts.json")
+        if not os.path.exists(legacy_file):
+            return
+        try:
+            artifacts = self._read_file(legacy_file)
+            for content_hash, artifact in artifacts.items():
+                self._write_file(self._get_artifact_path(content_hash), artifact)
+            os.remove(legacy_file)
+            logger.info(f"Migrated {len(artifacts)} CV artifacts to {self.artifacts_dir}")
+        except Exception as e:
+            logger.error(f"Error migrating CV artifacts: {e}")
+    
+    def _get_artifact_path(self, content_hash: str) -> str:
+        """Get the file path for a CV artifact"""
+        return os.path.join(self.artifacts_dir, f"{content_hash}.json")
     
     def _load_analysis_data(self) -> Dict[str, Any]:
-        """Load CV analysis data from file"""
+        """Load CV analysis data from file (kept in memory when write-behind is enabled)"""
         try:
-            if os.path.exists(self.analysis_file):
-                with open(self.analysis_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
+            return self._load_cached('_analysis_cache', self.analysis_file)
         except Exception as e:
             logger.error(f"Error loading CV analysis data: {e}")
             return {}
@@ -376,13 +743,52 @@ class LocalCVStorage(BaseLocalStorage):
     def _save_analysis_data(self, data: Dict[str, Any]) -> bool:
         """Save CV analysis data to file"""
         try:
-            with open(self.analysis_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
+            return self._persist(self.analysis_file, data)
         except Exception as e:
             logger.error(f"Error saving CV analysis data: {e}")
             return False
     
+    def get_cv_artifact(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the extraction and analysis artifact stored for a CV file
+        
+        Args:
+            content_hash: SHA-256 of the uploaded file bytes
+            
+        Returns:
+            Artifact data or None if the file has not been seen
+        """
+        try:
+            file_path = self._get_artifact_path(content_hash)
+            if os.path.exists(file_path):
+                return self._read_file(file_path)
+            return None
+        except Exception as e:
+            logger.error(f"Error getting CV artifact {content_hash}: {e}")
+            return None
+    
+    def save_cv_artifact(self, content_hash: str, artifact: Dict[str, Any]) -> bool:
+        """
+        Save the extraction and analysis artifact for a CV file
+        
+        Args:
+            content_hash: SHA-256 of the uploaded file bytes
+            artifact: Extracted text, analysis and the analysis fingerprint
+            
+        Returns:
+            True if successful
+        """
+        artifact['content_hash'] = content_hash
+        artifact['updated_at'] = time.time()
+        
+        # Written once per upload, so straight to disk rather than through write-behind
+        try:
+            self._write_file(self._get_artifact_path(content_hash), artifact)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving CV artifact {content_hash}: {e}")
+            return False
+    
     def save_cv_file(self, content: str, job_id: str) -> str:
         """
         Save a CV file
@@ -417,17 +823,18 @@ class LocalCVStorage(BaseLocalStorage):
         Returns:
             Analysis ID
         """
-        analyses = self._load_analysis_data()
-        
-        analysis_id = analysis_data.get('id')
-        if not analysis_id:
-            analysis_id = f"analysis_{int(time.time())}_{str(uuid.uuid4())[:8]}"
-            analysis_data['id'] = analysis_id
-        
-        analysis_data['created_at'] = time.time()
-        analyses[analysis_id] = analysis_data
-        
-        self._save_analysis_data(analyses)
+        with self._state_lock:
+            analyses = self._load_analysis_data()
+            
+            analysis_id = analysis_data.get('id')
+            if not analysis_id:
+                analysis_id = f"analysis_{int(time.time())}_{str(uuid.uuid4())[:8]}"
+                analysis_data['id'] = analysis_id
+            
+            analysis_data['created_at'] = time.time()
+            analyses[analysis_id] = self._detached(analysis_data)
+            
+            self._save_analysis_data(analyses)
         return analysis_id
     
     def get_cv_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
@@ -440,8 +847,9 @@ class LocalCVStorage(BaseLocalStorage):
         Returns:
             Analysis data or None if not found
         """
-        analyses = self._load_analysis_data()
-        return analyses.get(analysis_id)
+        with self._state_lock:
+            analyses = self._load_analysis_data()
+            return self._detached(analyses.get(analysis_id))
     
     def list_cv_analyses(self, job_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -453,16 +861,50 @@ class LocalCVStorage(BaseLocalStorage):
         Returns:
             List of analysis data
         """
-        analyses = self._load_analysis_data()
-        
-        # Convert to list
-        analysis_list = list(analyses.values())
-        
-        # Filter by job ID if provided
-        if job_id:
-            analysis_list = [a for a in analysis_list if a.get('job_id') == job_id]
+        with self._state_lock:
+            analyses = self._load_analysis_data()
+            
+            # Filter by job ID if provided, then copy only the matches
+            analysis_list = [a for a in analyses.values() if not job_id or a.get('job_id') == job_id]
+            analysis_list = self._detached(analysis_list)
         
         # Sort by creation time (descending)
         analysis_list.sort(key=lambda x: x.get('created_at', 0), reverse=True)
         
-        return analysis_list 
\ No newline at end of file
+        return analysis_list 
+class LocalFlashcardStorage(BaseLocalStorage):
+    """Local storage implementation for generated flashcard sets"""
+    
+    def __init__(self, data_dir: str = "data/flashcards", codec: Optional[str] = None):
+        """Initialize local storage with one file per flashcard set"""
+        super().__init__(data_dir, codec)
+    
+    def get_flashcard_set(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a generated flashcard set
+        
+        Args:
+            cache_key: Hash of the interview result the set was generated from
+            
+        Returns:
+            Flashcard set or None if not generated yet
+        """
+        entry = self._get_item(cache_key)
+        return entry.get('flashcard_set') if entry else None
+    
+    def save_flashcard_set(self, cache_key: str, flashcard_set: Dict[str, Any]) -> bool:
+        """
+        Save a generated flashcard set
+        
+        Args:
+            cache_key: Hash of the interview result the set was generated from
+            flashcard_set: Flashcard set
+            
+        Returns:
+            True if successful
+        """
+        return self._save_item(cache_key, {
+            'cache_key': cache_key,
+            'flashcard_set': flashcard_set,
+            'created_at': time.time()
+        })
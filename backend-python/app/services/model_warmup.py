@@ -0,0 +1,386 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Any, Deque, Optional, Set
+
+import requests
+
+from app.services import ai_service
+from app.services.ai_service import (
+    OLLAMA_SERVERS,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_NUM_CTX,
+    TASK_ROUTES,
+    resolve_model
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Warm-up configuration
+MODEL_WARMUP_ENABLED = os.environ.get("MODEL_WARMUP_ENABLED", "true").lower() == "true"
+# Preload every routed model at start instead of only the default one; needs VRAM for all tiers at once
+MODEL_WARMUP_PRELOAD_ALL = os.environ.get("MODEL_WARMUP_PRELOAD_ALL", "false").lower() == "true"
+MODEL_WARMUP_INTERVAL = float(os.environ.get("MODEL_WARMUP_INTERVAL", "60"))  # seconds between residency checks
+MODEL_WARMUP_LOAD_TIMEOUT = float(os.environ.get("MODEL_WARMUP_LOAD_TIMEOUT", "180"))  # loading a large model is slow
+MODEL_WARMUP_TRAFFIC_WINDOW = float(os.environ.get("MODEL_WARMUP_TRAFFIC_WINDOW", "3600"))  # seconds of calls considered
+MODEL_WARMUP_MIN_KEEP_ALIVE = 300  # seconds
+MODEL_WARMUP_MAX_KEEP_ALIVE = 7200  # seconds
+# Keep a model loaded for this many average gaps between its calls
+MODEL_WARMUP_GAP_FACTOR = 3
+# A call whose load took longer than this found the model cold
+COLD_LOAD_MS = 1000
+
+EXPIRES_AT_FRACTION_RE = re.compile(r"(\.\d{6})\d+")
+
+def _parse_expires_at(value: Optional[str]) -> Optional[float]:
+    """Convert Ollama's expires_at (RFC 3339 with nanoseconds) to a timestamp"""
+    if not value:
+        return None
+    try:
+        value = EXPIRES_AT_FRACTION_RE.sub(r"\1", value.replace("Z", "+00:00"))
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+def _model_key(name: str) -> str:
+    return name if ":" in name else f"{name}:latest"
+
+class ModelWarmup:
+    """
+    Keeps the routed models loaded on every healthy server
+
+    At start the default model (every routed model with
+    MODEL_WARMUP_PRELOAD_ALL) is preloaded on each online server, stopping
+    on a server as soon as a preload evicts a model that was loaded there.
+    Afterwards the servers' loaded models (/api/ps) are checked every
+    MODEL_WARMUP_INTERVAL seconds, and models that received calls within
+    MODEL_WARMUP_TRAFFIC_WINDOW are kept loaded with keep-alive requests
+    sized to their call rate; real calls send the same sized keep-alive, so
+    they do not reset it. Idle models are left to unload. A server where
+    reloading a model evicted another model with traffic is taken to be full,
+    and nothing is reloaded there until it has unloaded something.
+    """
+
+    def __init__(self, servers: Optional[List[str]] = None, interval: float = MODEL_WARMUP_INTERVAL,
+                 preload_all: bool = MODEL_WARMUP_PRELOAD_ALL):
+        """
+        Initialize the warm-up service
+
+        Args:
+            servers: Ollama server URLs (default OLLAMA_SERVERS)
+            interval: Seconds between residency checks
+            preload_all: Preload every routed model at start, not only the default one
+        """
+        self.servers = list(servers or OLLAMA_SERVERS)
+        self.interval = interval
+        self.preload_all = preload_all
+        self._lock = threading.Lock()
+        # server -> {online, checked_at, available_models, loaded: {model: {expires_at, size_vram}}}
+        self._servers: Dict[str, Dict[str, Any]] = {}
+        self._calls: Dict[str, Deque[float]] = {}
+        self._metrics = {'preloads': 0, 'preload_failures': 0, 'keep_alives': 0, 'cold_calls': 0, 'warm_calls': 0}
+        self._load_ms: Dict[str, float] = {}
+        # server -> number of models loaded when a reload there evicted a model with traffic
+        self._full: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start preloading and the residency loop, and route calls to warm servers"""
+        if self._thread:
+            return
+        ai_service.model_call_listeners.append(self.record_call)
+        ai_service.set_server_selector(self.pick_server)
+        ai_service.set_keep_alive_provider(self.call_keep_alive)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+        self._thread.start()
+        logger.info(f"Model warm-up started for {len(self.servers)} servers (check every {self.interval:.0f}s)")
+
+    def stop(self) -> None:
+        """Stop the residency loop and the warm server routing"""
+        self._stop.set()
+        if self.record_call in ai_service.model_call_listeners:
+            ai_service.model_call_listeners.remove(self.record_call)
+        ai_service.set_server_selector(None)
+        ai_service.set_keep_alive_provider(None)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self) -> None:
+        self.warm_all()
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error in model warm-up loop: {e}", exc_info=True)
+
+    def wanted_models(self, available_models: List[str]) -> Set[str]:
+        """Models the tasks route to on a server with the given models installed"""
+        return {resolve_model(task, available_models) for task in list(TASK_ROUTES) + [None]}
+
+    def check_server(self, server: str) -> Dict[str, Any]:
+        """
+        Refresh a server's installed (/api/tags) and loaded (/api/ps) models
+
+        Args:
+            server: Server URL
+
+        Returns:
+            The server's state
+        """
+        state = {'online': False, 'checked_at': time.time(), 'available_models': [], 'loaded': {}}
+        try:
+            tags = requests.get(f"{server}/api/tags", timeout=3)
+            if tags.status_code == 200:
+                state['available_models'] = [m.get("name") for m in tags.json().get("models", [])]
+                state['online'] = True
+                ps = requests.get(f"{server}/api/ps", timeout=3)
+                if ps.status_code == 200:
+                    state['loaded'] = {
+                        _model_key(m.get("name") or m.get("model", "")): {
+                            'expires_at': _parse_expires_at(m.get("expires_at")),
+                            'size_vram': m.get("size_vram")
+                        }
+                        for m in ps.json().get("models", [])
+                    }
+        except Exception as e:
+            logger.warning(f"Model warm-up could not reach {server}: {e}")
+        with self._lock:
+            self._servers[server] = state
+        return state
+
+    def preload(self, server: str, model: str, keep_alive: Optional[str] = None, counter: str = 'preloads') -> bool:
+        """
+        Load a model on a server without generating anything
+
+        Uses the same num_ctx as real calls; a different context size would
+        make the server reload the model on the next call.
+
+        Args:
+            server: Server URL
+            model: Model name
+            keep_alive: How long the server keeps it loaded (default OLLAMA_KEEP_ALIVE)
+            counter: Metric counting the request ("preloads" or "keep_alives")
+
+        Returns:
+            True if the model is loaded
+        """
+        payload: Dict[str, Any] = {"model": model, "keep_alive": keep_alive or OLLAMA_KEEP_ALIVE}
+        if OLLAMA_NUM_CTX:
+            payload["options"] = {"num_ctx": OLLAMA_NUM_CTX}
+        start_time = time.time()
+        try:
+            response = requests.post(f"{server}/api/generate", json=payload, timeout=MODEL_WARMUP_LOAD_TIMEOUT)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+            load_ms = (response.json().get("load_duration") or 0) / 1e6
+        except Exception as e:
+            logger.warning(f"Preloading {model} on {server} failed: {e}")
+            with self._lock:
+                self._metrics['preload_failures'] += 1
+            return False
+
+        with self._lock:
+            self._metrics[counter] += 1
+            self._load_ms[model] = round(load_ms, 1)
+            state = self._servers.setdefault(server, {'online': True, 'available_models': [], 'loaded': {}})
+            state.setdefault('loaded', {})[_model_key(model)] = {'expires_at': None, 'size_vram': None}
+        logger.info(f"Loaded {model} on {server} in {time.time() - start_time:.1f}s (keep_alive {payload['keep_alive']})")
+        return True
+
+    def warm_all(self) -> None:
+        """
+        Preload the start-up models that are not loaded yet on each online server
+
+        /api/ps does not report free VRAM, so a server is taken to be full
+        once a preload made it unload another model; nothing more is preloaded there.
+        """
+        for server in self.servers:
+            state = self.check_server(server)
+            if not state['online']:
+                continue
+            if self.preload_all:
+                models = sorted(self.wanted_models(state['available_models']))
+            else:
+                models = [resolve_model(None, state['available_models'])]
+            for model in models:
+                if _model_key(model) in state['loaded']:
+                    continue
+                loaded_before = set(state['loaded'])
+                if not self.preload(server, model):
+                    continue
+                state = self.check_server(server)
+                evicted = loaded_before - set(state['loaded'])
+                if evicted:
+                    logger.warning(f"Preloading {model} on {server} unloaded {', '.join(sorted(evicted))}; "
+                                   f"no room for more models there")
+                    break
+
+    def keep_alive_for(self, model: str, now: Optional[float] = None) -> Optional[float]:
+        """
+        Size a model's keep-alive to its recent traffic
+
+        Args:
+            model: Model name
+            now: Current time (default time.time())
+
+        Returns:
+            Seconds to keep the model loaded, or None if it had no calls in the traffic window
+        """
+        now = now or time.time()
+        with self._lock:
+            calls = [t for t in self._calls.get(model, ()) if now - t <= MODEL_WARMUP_TRAFFIC_WINDOW]
+        if not calls:
+            return None
+        # Average gap between calls, counting the time since the oldest one
+        gap = (now - calls[0]) / len(calls)
+        return max(MODEL_WARMUP_MIN_KEEP_ALIVE, min(MODEL_WARMUP_MAX_KEEP_ALIVE, gap * MODEL_WARMUP_GAP_FACTOR))
+
+    def call_keep_alive(self, model: str) -> Optional[str]:
+        """Keep-alive for real calls (ai_service keep-alive provider): the same sized value the refresh sends"""
+        keep_alive = self.keep_alive_for(model)
+        return f"{int(keep_alive)}s" if keep_alive is not None else None
+
+    def _busy_models(self, now: float) -> Set[str]:
+        """Keys of the models that had calls within the traffic window"""
+        with self._lock:
+            models = list(self._calls)
+        return {_model_key(model) for model in models if self.keep_alive_for(model, now) is not None}
+
+    def refresh(self) -> None:
+        """Re-check residency and extend or reload the models that still get traffic"""
+        now = time.time()
+        for server in self.servers:
+            state = self.check_server(server)
+            if not state['online']:
+                continue
+            with self._lock:
+                if server in self._full and len(state['loaded']) < self._full[server]:
+                    # Something unloaded since the server filled up, so there is room to try again
+                    del self._full[server]
+                full = server in self._full
+            for model in sorted(self.wanted_models(state['available_models'])):
+                keep_alive = self.keep_alive_for(model, now)
+                if keep_alive is None:
+                    continue
+                loaded = state['loaded'].get(_model_key(model))
+                expires_at = loaded.get('expires_at') if loaded else None
+                # Extend before the model would unload before the next check
+                if loaded and expires_at and expires_at - now > self.interval * 2:
+                    continue
+                if loaded:
+                    self.preload(server, model, keep_alive=f"{int(keep_alive)}s", counter='keep_alives')
+                    continue
+                if full:
+                    continue
+
+                loaded_before = set(state['loaded'])
+                if not self.preload(server, model, keep_alive=f"{int(keep_alive)}s"):
+                    continue
+                state = self.check_server(server)
+                evicted = sorted((loaded_before - set(state['loaded'])) & self._busy_models(now))
+                if evicted:
+                    # Two busy models do not fit: reloading one would only evict the other on every check
+                    logger.warning(f"Reloading {model} on {server} unloaded {', '.join(evicted)}, which still "
+                                   f"gets traffic; not reloading models there until one unloads")
+                    with self._lock:
+                        self._full[server] = len(state['loaded'])
+                    full = True
+
+    def record_call(self, server: str, model: str, call_metrics: Dict[str, Any]) -> None:
+        """
+        Note a finished model call (ai_service call listener)
+
+        Args:
+            server: Server that answered
+            model: Model used
+            call_metrics: Timings reported for the call (load_ms shows a cold start)
+        """
+        now = time.time()
+        cold = (call_metrics.get('load_ms') or 0) > COLD_LOAD_MS
+        with self._lock:
+            calls = self._calls.setdefault(model, deque())
+            calls.append(now)
+            while calls and now - calls[0] > MODEL_WARMUP_TRAFFIC_WINDOW:
+                calls.popleft()
+            self._metrics['cold_calls' if cold else 'warm_calls'] += 1
+            state = self._servers.get(server)
+            if state is not None:
+                state.setdefault('loaded', {}).setdefault(_model_key(model), {'expires_at': None, 'size_vram': None})
+        if cold:
+            logger.info(f"Call to {model} on {server} waited {call_metrics.get('load_ms')}ms for the model to load")
+
+    def pick_server(self, model: str, default_server: str) -> str:
+        """
+        Prefer a server where the model is loaded (ai_service server selector)
+
+        Args:
+            model: Model for the call
+            default_server: Server the call would use otherwise
+
+        Returns:
+            default_server if the model is warm there or warm nowhere, otherwise a server where it is warm
+        """
+        key = _model_key(model)
+        now = time.time()
+        with self._lock:
+            warm = [
+                server for server, state in self._servers.items()
+                if state.get('online') and key in state.get('loaded', {})
+                and (state['loaded'][key].get('expires_at') or now + 1) > now
+            ]
+        if not warm or default_server in warm:
+            return default_server
+        logger.info(f"{model} is cold on {default_server}, using {warm[0]}")
+        return warm[0]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get per-server residency, traffic per model and warm-up counters"""
+        now = time.time()
+        with self._lock:
+            servers = {
+                server: {
+                    'online': state.get('online', False),
+                    'checked_at': state.get('checked_at'),
+                    'loaded': {
+                        model: {
+                            'expires_in': round(info['expires_at'] - now) if info.get('expires_at') else None,
+                            'size_vram': info.get('size_vram')
+                        }
+                        for model, info in state.get('loaded', {}).items()
+                    }
+                }
+                for server, state in self._servers.items()
+            }
+            traffic = {model: len(calls) for model, calls in self._calls.items()}
+            metrics = dict(self._metrics)
+            load_ms = dict(self._load_ms)
+            full = sorted(self._full)
+        return {
+            'enabled': self._thread is not None,
+            'preload_all': self.preload_all,
+            'servers': servers,
+            'full_servers': full,
+            'calls_in_window': traffic,
+            'keep_alive_s': {model: self.keep_alive_for(model, now) for model in traffic},
+            'last_load_ms': load_ms,
+            **metrics
+        }
+
+_warmup: Optional[ModelWarmup] = None
+_warmup_lock = threading.Lock()
+
+def get_model_warmup() -> ModelWarmup:
+    """Get the shared warm-up service (started by the caller)"""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = ModelWarmup()
+        return _warmup
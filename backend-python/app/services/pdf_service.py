@@ -0,0 +1,366 @@
+import os
+import sys
+import time
+import types
+import atexit
+import tempfile
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterator
+
+import PyPDF2
+
+# Page functions live in a side-effect-free module so pool workers can import them
+from app.services.pdf_worker import PdfSource, _open, extract_page_text, ocr_page, PDF_OCR_TIMEOUT
+
+try:
+    from multiprocessing.context import ForkServerContext, ForkServerProcess
+except ImportError:
+    # No forkserver on Windows; the pool falls back to the default start method
+    ForkServerContext = ForkServerProcess = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Extraction pool configuration
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGE_TIMEOUT = float(os.environ.get("PDF_PAGE_TIMEOUT", "30"))  # seconds per page
+PDF_CHAR_BUDGET = int(os.environ.get("PDF_CHAR_BUDGET", "5000"))  # stop extracting after this many characters
+PDF_SPILL_THRESHOLD = int(os.environ.get("PDF_SPILL_THRESHOLD", str(8 * 1024 * 1024)))  # bytes kept in memory
+# Where in-memory uploads are shared with pool workers (memory-backed on Linux)
+PDF_SHARE_DIR = os.environ.get("PDF_SHARE_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+# OCR fallback for pages without a text layer
+PDF_OCR_ENABLED = os.environ.get("PDF_OCR_ENABLED", "true").lower() == "true"
+PDF_OCR_MAX_PAGES = int(os.environ.get("PDF_OCR_MAX_PAGES", "10"))
+PDF_OCR_TARGET_PIXELS = 3000  # long edge of the rasterized page
+PDF_OCR_MIN_DPI = 150
+PDF_OCR_MAX_DPI = 300
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+if ForkServerProcess is not None:
+    # Stand-in for __main__ while a worker is launched (no __file__, so nothing to re-import)
+    _worker_main = types.ModuleType("__main__")
+    _launch_lock = threading.Lock()
+
+    class _WorkerProcess(ForkServerProcess):
+        """
+        Forkserver process that does not re-run the server script
+
+        multiprocessing makes every child import the parent's __main__ as
+        __mp_main__, which for app.py would rebuild the storages, the jobs
+        replica, the write-behind flusher, the task queue and the warm-up in each
+        worker. Workers only need app.services.pdf_worker, so the launch data is
+        built while __main__ is swapped for an empty module.
+        """
+
+        @staticmethod
+        def _Popen(process_obj):
+            with _launch_lock:
+                main_module = sys.modules["__main__"]
+                sys.modules["__main__"] = _worker_main
+                try:
+                    return ForkServerProcess._Popen(process_obj)
+                finally:
+                    sys.modules["__main__"] = main_module
+
+    class _WorkerContext(ForkServerContext):
+        Process = _WorkerProcess
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared extraction process pool (None when running inline)"""
+    global _pool
+    if PDF_WORKERS <= 1:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            # forkserver avoids forking the multi-threaded web server process
+            if ForkServerContext is not None and "forkserver" in multiprocessing.get_all_start_methods():
+                context = _WorkerContext()
+                context.set_forkserver_preload(["app.services.pdf_worker"])
+            else:
+                context = multiprocessing.get_context()
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context)
+            atexit.register(_pool.shutdown, wait=False)
+            logger.info(f"Started PDF extraction pool with {PDF_WORKERS} workers")
+        return _pool
+
+@contextmanager
+def pdf_source(file_bytes: bytes, spill_dir: Optional[str] = None) -> Iterator[PdfSource]:
+    """
+    Provide an uploaded PDF to the extractors without touching disk when possible
+
+    Files above PDF_SPILL_THRESHOLD are written to a uniquely named temporary
+    file (removed on exit) so they are not copied to every worker process.
+
+    Args:
+        file_bytes: Uploaded file contents
+        spill_dir: Directory for spilled files (defaults to the system temp dir)
+
+    Yields:
+        The bytes themselves or the path of the spilled file
+    """
+    if len(file_bytes) <= PDF_SPILL_THRESHOLD:
+        yield file_bytes
+        return
+
+    with _spill(file_bytes, spill_dir) as path:
+        yield path
+
+@contextmanager
+def _spill(file_bytes: bytes, spill_dir: Optional[str]) -> Iterator[str]:
+    """Write PDF bytes to a uniquely named temporary file, removed on exit"""
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=spill_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(file_bytes)
+        logger.info(f"Spilled {len(file_bytes)} byte PDF to {path}")
+        yield path
+    finally:
+        try:
+            os.unlink(path)
+        except OSError as e:
+            logger.warning(f"Error removing spilled PDF {path}: {e}")
+
+@contextmanager
+def _worker_source(source: PdfSource, page_count: int) -> Iterator[PdfSource]:
+    """
+    Hand pool workers a path instead of pickling the whole PDF into every task
+
+    In-memory uploads are shared through a file in PDF_SHARE_DIR, which is
+    memory-backed on Linux, for as long as the extraction runs.
+    """
+    if page_count < 2 or _get_pool() is None:
+        yield source
+        return
+
+    with _shared_file(source) as path:
+        yield path
+
+@contextmanager
+def _shared_file(source: PdfSource) -> Iterator[str]:
+    """Get a path for the PDF, writing in-memory uploads to PDF_SHARE_DIR"""
+    if not isinstance(source, (bytes, bytearray)):
+        yield source
+        return
+
+    with _spill(source, PDF_SHARE_DIR) as path:
+        yield path
+
+def count_pages(source: PdfSource) -> int:
+    """
+    Count pages in a PDF
+
+    Args:
+        source: PDF bytes or path
+
+    Returns:
+        Number of pages
+    """
+    reader = PyPDF2.PdfReader(_open(source))
+    if reader.is_encrypted:
+        logger.warning("PDF is encrypted, extraction may fail")
+    return len(reader.pages)
+
+def ocr_dpi(width_pt: float, height_pt: float) -> int:
+    """
+    Pick a rasterization DPI so the page's long edge is about PDF_OCR_TARGET_PIXELS
+
+    Args:
+        width_pt: Page width in points
+        height_pt: Page height in points
+
+    Returns:
+        DPI clamped to the configured range
+    """
+    long_edge_inches = max(width_pt, height_pt, 1) / 72
+    dpi = int(PDF_OCR_TARGET_PIXELS / long_edge_inches)
+    return max(PDF_OCR_MIN_DPI, min(PDF_OCR_MAX_DPI, dpi))
+
+def _iter_ocr(source: PdfSource, jobs: List[tuple]) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Yield OCR results (None on failure) in job order
+
+    At most one page per pool worker is in flight, so closing the generator
+    early leaves the remaining pages unrendered.
+    """
+    pool = _get_pool()
+    if pool is None or len(jobs) < 2:
+        for page, dpi in jobs:
+            try:
+                yield ocr_page(source, page["page"], dpi)
+            except Exception as e:
+                logger.error(f"OCR of page {page['page'] + 1} failed: {e}")
+                yield None
+        return
+
+    in_flight = deque()
+    next_job = 0
+    try:
+        while next_job < len(jobs) or in_flight:
+            while next_job < len(jobs) and len(in_flight) < PDF_WORKERS:
+                page, dpi = jobs[next_job]
+                in_flight.append((page, pool.submit(ocr_page, source, page["page"], dpi)))
+                next_job += 1
+
+            page, future = in_flight.popleft()
+            try:
+                yield future.result(timeout=PDF_OCR_TIMEOUT + PDF_PAGE_TIMEOUT)
+            except Exception as e:
+                logger.error(f"OCR of page {page['page'] + 1} failed: {e}")
+                future.cancel()
+                yield None
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+def ocr_empty_pages(source: PdfSource, pages: List[Dict[str, Any]], char_budget: Optional[int] = None) -> Dict[str, Any]:
+    """
+    OCR pages whose text extraction came back empty, in parallel
+
+    Pages are OCRed in page order and rendering stops once char_budget
+    characters of OCR text have been produced.
+
+    Args:
+        source: PDF path (bytes work too, but pdf2image then writes its own temp file)
+        pages: Per-page results, updated in place with OCR text
+        char_budget: Characters still wanted (None for no limit)
+
+    Returns:
+        OCR report with per-page timings
+    """
+    empty_pages = [p for p in pages if not p["text"]]
+    skipped = max(0, len(empty_pages) - PDF_OCR_MAX_PAGES)
+    empty_pages = empty_pages[:PDF_OCR_MAX_PAGES]
+    if not empty_pages:
+        return {"pages": 0, "skipped": skipped, "over_budget": 0, "timings": [], "total_seconds": 0}
+
+    start_time = time.time()
+    reader = PyPDF2.PdfReader(_open(source))
+    jobs = []
+    for page in empty_pages:
+        box = reader.pages[page["page"]].mediabox
+        jobs.append((page, ocr_dpi(float(box.width), float(box.height))))
+
+    timings = []
+    ocr_chars = 0
+    results = _iter_ocr(source, jobs)
+    try:
+        for (page, dpi), result in zip(jobs, results):
+            if result is None:
+                timings.append({"page": page["page"] + 1, "dpi": dpi, "seconds": None})
+                continue
+            page.update(result)
+            timings.append({"page": page["page"] + 1, "dpi": dpi, "seconds": result["seconds"]})
+            ocr_chars += len(result["text"])
+            if char_budget is not None and ocr_chars >= char_budget:
+                break
+    finally:
+        results.close()
+    over_budget = len(jobs) - len(timings)
+
+    total_seconds = round(time.time() - start_time, 3)
+    measured = [t["seconds"] for t in timings if t["seconds"] is not None]
+    if measured:
+        logger.info(f"OCR of {len(measured)} pages took {total_seconds}s "
+                    f"({sum(measured) / len(measured):.2f}s per page, {skipped} pages over the cap, "
+                    f"{over_budget} left once the character budget was reached)")
+
+    return {"pages": len(timings), "skipped": skipped, "over_budget": over_budget, "timings": timings, "total_seconds": total_seconds}
+
+def iter_pdf_pages(source: PdfSource, page_count: int) -> Iterator[Dict[str, Any]]:
+    """
+    Yield page results in page order as they are extracted
+
+    At most one page per pool worker is in flight, so closing the generator
+    early leaves the remaining pages unparsed.
+
+    Args:
+        source: PDF bytes or path
+        page_count: Number of pages in the file
+
+    Yields:
+        Per-page results from extract_page_text
+    """
+    pool = _get_pool()
+
+    if pool is None or page_count < 2:
+        for i in range(page_count):
+            yield extract_page_text(source, i)
+        return
+
+    in_flight = deque()
+    next_page = 0
+    try:
+        while next_page < page_count or in_flight:
+            while next_page < page_count and len(in_flight) < PDF_WORKERS:
+                in_flight.append((next_page, pool.submit(extract_page_text, source, next_page)))
+                next_page += 1
+
+            page_index, future = in_flight.popleft()
+            try:
+                yield future.result(timeout=PDF_PAGE_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Extraction of page {page_index + 1} failed: {e}")
+                yield {"page": page_index, "text": "", "method": None, "seconds": None}
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+def extract_pdf_text(source: PdfSource, char_budget: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Extract text from a PDF, fanning pages out across the process pool
+
+    Args:
+        source: PDF bytes or path
+        char_budget: Stop once this many characters have been extracted (None for all pages)
+
+    Pages without a text layer are OCRed when PDF_OCR_ENABLED is set.
+
+    Returns:
+        Dictionary with the joined text, total page count, number of pages
+        extracted, whether extraction stopped early, the OCR report and
+        per-page results
+    """
+    start_time = time.time()
+    page_count = count_pages(source)
+
+    pages = []
+    extracted_chars = 0
+    ocr_report = None
+    with _worker_source(source, page_count) as task_source:
+        page_iterator = iter_pdf_pages(task_source, page_count)
+        try:
+            for page in page_iterator:
+                pages.append(page)
+                extracted_chars += len(page["text"])
+                if char_budget and extracted_chars >= char_budget:
+                    break
+        finally:
+            page_iterator.close()
+
+        if PDF_OCR_ENABLED and any(not p["text"] for p in pages):
+            remaining = max(0, char_budget - extracted_chars) if char_budget else None
+            if remaining != 0:
+                # pdf2image renders from a file, so OCR always gets a path
+                with _shared_file(task_source) as ocr_source:
+                    ocr_report = ocr_empty_pages(ocr_source, pages, remaining)
+
+    text = "\n\n".join(p["text"] for p in pages if p["text"])
+    logger.info(f"Extracted {len(text)} characters from {len(pages)}/{page_count} pages in {time.time() - start_time:.2f}s")
+
+    return {
+        "text": text,
+        "page_count": page_count,
+        "pages_extracted": len(pages),
+        "truncated": len(pages) < page_count,
+        "ocr": ocr_report,
+        "pages": pages
+    }
@@ -0,0 +1,99 @@
+import os
+import io
+import time
+import logging
+from typing import Dict, Any, Union
+
+# This module is preloaded into the PDF extraction pool's forkserver, so it must
+# stay free of side effects: no storages, threads or app imports, and the PDF
+# libraries are imported inside the functions that use them.
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PDF_OCR_TIMEOUT = float(os.environ.get("PDF_OCR_TIMEOUT", "60"))  # seconds per page
+PDF_OCR_LANG = os.environ.get("PDF_OCR_LANG", "eng")
+
+# A PDF is either raw bytes (in-memory uploads) or a path (large uploads spilled to disk)
+PdfSource = Union[bytes, str]
+
+def _open(source: PdfSource):
+    """Get something the PDF libraries can read: a fresh stream over bytes, or the path"""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+def extract_page_text(source: PdfSource, page_index: int) -> Dict[str, Any]:
+    """
+    Extract text from a single page, trying each extractor in turn
+
+    Runs in a worker process. The cascade is: pdfminer with default layout
+    analysis, pdfminer also analyzing text inside figures, then PyPDF2.
+
+    Args:
+        source: PDF bytes or path
+        page_index: Zero-based page index
+
+    Returns:
+        Dictionary with page index, text and the extractor that produced it
+    """
+    import PyPDF2
+    from pdfminer.high_level import extract_text
+    from pdfminer.layout import LAParams
+
+    start_time = time.time()
+    text = ""
+    method = None
+    attempts = [
+        ("pdfminer", lambda: extract_text(_open(source), page_numbers=[page_index])),
+        ("pdfminer_all_texts", lambda: extract_text(_open(source), page_numbers=[page_index], laparams=LAParams(all_texts=True))),
+        ("pypdf2", lambda: PyPDF2.PdfReader(_open(source)).pages[page_index].extract_text() or "")
+    ]
+
+    for name, extract in attempts:
+        try:
+            text = extract()
+        except Exception as e:
+            logger.warning(f"{name} failed on page {page_index + 1}: {e}")
+            text = ""
+        if text.strip():
+            method = name
+            break
+
+    return {
+        "page": page_index,
+        "text": text.strip(),
+        "method": method,
+        "seconds": round(time.time() - start_time, 3)
+    }
+
+def ocr_page(source: PdfSource, page_index: int, dpi: int) -> Dict[str, Any]:
+    """
+    Rasterize a single page and OCR it
+
+    Runs in a worker process; only this page is rendered, so memory stays
+    bounded by one page image per worker.
+
+    Args:
+        source: PDF path (bytes work too, but pdf2image then writes its own temp file)
+        page_index: Zero-based page index
+        dpi: Rasterization DPI
+
+    Returns:
+        Dictionary with page index, text, method, DPI and OCR time
+    """
+    import pytesseract
+    from pdf2image import convert_from_path, convert_from_bytes
+
+    start_time = time.time()
+    convert = convert_from_bytes if isinstance(source, (bytes, bytearray)) else convert_from_path
+    images = convert(source, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1, grayscale=True)
+    text = ""
+    if images:
+        text = pytesseract.image_to_string(images[0], lang=PDF_OCR_LANG, timeout=PDF_OCR_TIMEOUT)
+
+    return {
+        "page": page_index,
+        "text": text.strip(),
+        "method": "ocr",
+        "dpi": dpi,
+        "seconds": round(time.time() - start_time, 3)
+    }
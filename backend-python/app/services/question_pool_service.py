@@ -0,0 +1,181 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from app.services.interview_service import generate_interview_questions
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pool configuration
+QUESTION_POOL_SIZE = int(os.environ.get("QUESTION_POOL_SIZE", "20"))  # fill target
+QUESTION_POOL_LOW_WATERMARK = int(os.environ.get("QUESTION_POOL_LOW_WATERMARK", "8"))  # refill below this
+QUESTION_POOL_BATCH = int(os.environ.get("QUESTION_POOL_BATCH", "10"))  # questions per generation call
+QUESTION_POOL_WORKERS = int(os.environ.get("QUESTION_POOL_WORKERS", "1"))
+QUESTION_POOL_PREWARM_MATCHES = int(os.environ.get("QUESTION_POOL_PREWARM_MATCHES", "3"))  # top job matches to prepare
+QUESTION_POOL_LANGUAGE = "English"  # interviews are conducted in English
+DEFAULT_DIFFICULTY = "medium"
+
+def pool_key(experience_level: Optional[str], difficulty: str = DEFAULT_DIFFICULTY) -> str:
+    """
+    Get the storage key of a pool
+
+    Args:
+        experience_level: Candidate experience level (defaults to mid)
+        difficulty: Question difficulty
+
+    Returns:
+        Key such as "mid:medium"
+    """
+    return f"{experience_level or 'mid'}:{difficulty}"
+
+class QuestionPoolService:
+    """Pre-generated interview questions per (job, experience level, difficulty)"""
+
+    def __init__(self, job_storage):
+        """
+        Initialize the service
+
+        Args:
+            job_storage: Job storage holding the pools next to the jobs
+        """
+        self.job_storage = job_storage
+        self._executor = ThreadPoolExecutor(max_workers=QUESTION_POOL_WORKERS, thread_name_prefix="question-pool")
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._metrics = {'draws': 0, 'questions_served': 0, 'empty_draws': 0, 'refills': 0, 'refill_failures': 0}
+
+    def warm(self, job: Dict[str, Any], experience_level: Optional[str] = None,
+             difficulty: str = DEFAULT_DIFFICULTY) -> bool:
+        """
+        Fill the job's pool in the background if it is missing or low
+
+        Args:
+            job: Job data
+            experience_level: Experience level (defaults to the job's)
+            difficulty: Question difficulty
+
+        Returns:
+            True if a refill was scheduled
+        """
+        job_id = job.get('id')
+        if not job_id:
+            return False
+
+        key = pool_key(experience_level or job.get('experience_level'), difficulty)
+        pool = self.job_storage.get_question_pool(job_id, key)
+        if pool and len(pool.get('questions', [])) >= QUESTION_POOL_LOW_WATERMARK:
+            return False
+        return self._schedule_refill(job, key, experience_level or job.get('experience_level') or 'mid', difficulty)
+
+    def draw(self, job: Dict[str, Any], count: int, experience_level: Optional[str] = None,
+             difficulty: str = DEFAULT_DIFFICULTY) -> List[str]:
+        """
+        Take questions from the job's pool without waiting for generation
+
+        Drawn questions are removed so consecutive interviews get different ones;
+        the pool is refilled in the background once it runs low.
+
+        Args:
+            job: Job data
+            count: Number of questions wanted
+            experience_level: Experience level (defaults to the job's)
+            difficulty: Question difficulty
+
+        Returns:
+            Up to count questions (empty if the pool has not been generated yet)
+        """
+        job_id = job.get('id')
+        if not job_id:
+            return []
+
+        level = experience_level or job.get('experience_level') or 'mid'
+        key = pool_key(level, difficulty)
+
+        with self._lock:
+            pool = self.job_storage.get_question_pool(job_id, key) or {'questions': []}
+            questions = list(pool.get('questions', []))
+            drawn, remaining = questions[:count], questions[count:]
+            if drawn:
+                self.job_storage.save_question_pool(job_id, key, {**pool, 'questions': remaining})
+
+            self._metrics['draws'] += 1
+            self._metrics['questions_served'] += len(drawn)
+            if not drawn:
+                self._metrics['empty_draws'] += 1
+
+        if len(remaining) < QUESTION_POOL_LOW_WATERMARK:
+            self._schedule_refill(job, key, level, difficulty)
+        return drawn
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get draw and refill counters"""
+        with self._lock:
+            return {**self._metrics, 'refills_in_flight': len(self._in_flight)}
+
+    def _schedule_refill(self, job: Dict[str, Any], key: str, experience_level: str, difficulty: str) -> bool:
+        in_flight_key = (str(job['id']), key)
+        with self._lock:
+            if in_flight_key in self._in_flight:
+                return False
+            self._in_flight.add(in_flight_key)
+
+        self._executor.submit(self._refill, dict(job), key, experience_level, difficulty, in_flight_key)
+        return True
+
+    def _refill(self, job: Dict[str, Any], key: str, experience_level: str, difficulty: str, in_flight_key) -> None:
+        start_time = time.time()
+        try:
+            pool = self.job_storage.get_question_pool(job['id'], key) or {'questions': []}
+            missing = QUESTION_POOL_SIZE - len(pool.get('questions', []))
+            generated = []
+            while len(generated) < missing:
+                batch = generate_interview_questions(
+                    job,
+                    skills=job.get('required_skills', []),
+                    experience_level=experience_level,
+                    difficulty=difficulty,
+                    num_questions=min(QUESTION_POOL_BATCH, missing - len(generated)),
+                    language=QUESTION_POOL_LANGUAGE
+                )
+                # Failed generations come back as placeholder questions
+                batch = [q for q in batch if q and not q.startswith("Placeholder")]
+                if not batch:
+                    break
+                generated.extend(batch)
+
+            if not generated:
+                with self._lock:
+                    self._metrics['refill_failures'] += 1
+                logger.warning(f"Question pool refill for job {job['id']} ({key}) produced no questions")
+                return
+
+            with self._lock:
+                # Re-read: draws may have happened while generating
+                pool = self.job_storage.get_question_pool(job['id'], key) or {'questions': []}
+                questions = list(pool.get('questions', []))
+                seen = {q.strip().lower() for q in questions}
+                for question in generated:
+                    if question.strip().lower() not in seen:
+                        seen.add(question.strip().lower())
+                        questions.append(question)
+                self.job_storage.save_question_pool(job['id'], key, {
+                    **pool,
+                    'questions': questions,
+                    'experience_level': experience_level,
+                    'difficulty': difficulty
+                })
+                self._metrics['refills'] += 1
+
+            logger.info(f"Refilled question pool for job {job['id']} ({key}) to {len(questions)} questions "
+                        f"in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            with self._lock:
+                self._metrics['refill_failures'] += 1
+            logger.error(f"Error refilling question pool for job {job['id']} ({key}): {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._in_flight.discard(in_flight_key)
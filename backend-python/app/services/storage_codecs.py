@@ -0,0 +1,125 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Optional fast JSON backend
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional binary backend
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Header written in front of msgpack payloads so files can be told apart on read
+MSGPACK_MAGIC = b"JPAI-MSGPACK\x01\n"
+
+# Codec used when none is configured explicitly
+DEFAULT_CODEC = os.environ.get("STORAGE_CODEC", "json").lower()
+
+class JsonCodec:
+    """Human-readable JSON codec (the original on-disk format)"""
+
+    name = "json"
+
+    def encode(self, data: Any) -> bytes:
+        """Encode data as indented UTF-8 JSON"""
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+    def decode(self, payload: bytes) -> Any:
+        """Decode UTF-8 JSON"""
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload.decode('utf-8'))
+
+class FastJsonCodec(JsonCodec):
+    """Compact JSON codec, backed by orjson when it is installed"""
+
+    name = "fastjson"
+
+    def encode(self, data: Any) -> bytes:
+        """Encode data as compact UTF-8 JSON"""
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class MsgpackCodec:
+    """Compact binary codec based on msgpack"""
+
+    name = "msgpack"
+
+    def encode(self, data: Any) -> bytes:
+        """Encode data as msgpack prefixed with the format header"""
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return MSGPACK_MAGIC + msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Any:
+        """Decode a msgpack payload (with or without the format header)"""
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        if payload.startswith(MSGPACK_MAGIC):
+            payload = payload[len(MSGPACK_MAGIC):]
+        return msgpack.unpackb(payload, raw=False)
+
+CODECS = {
+    JsonCodec.name: JsonCodec(),
+    FastJsonCodec.name: FastJsonCodec(),
+    MsgpackCodec.name: MsgpackCodec()
+}
+
+def get_codec(name: Optional[str] = None):
+    """
+    Get a storage codec by name
+
+    Args:
+        name: Codec name ("json", "fastjson" or "msgpack"); defaults to STORAGE_CODEC
+
+    Returns:
+        Codec instance, falling back to JSON if the requested one is unavailable
+    """
+    name = (name or DEFAULT_CODEC).lower()
+    codec = CODECS.get(name)
+
+    if codec is None:
+        logger.warning(f"Unknown storage codec '{name}', using json")
+        return CODECS[JsonCodec.name]
+
+    if codec.name == MsgpackCodec.name and msgpack is None:
+        logger.warning("msgpack is not installed, using fastjson storage codec")
+        return CODECS[FastJsonCodec.name]
+
+    return codec
+
+def detect_codec(payload: bytes):
+    """
+    Detect the codec a payload was written with
+
+    Args:
+        payload: Raw file contents
+
+    Returns:
+        Codec able to decode the payload
+    """
+    if payload.startswith(MSGPACK_MAGIC):
+        return CODECS[MsgpackCodec.name]
+    return CODECS[JsonCodec.name]
+
+def decode_payload(payload: bytes) -> Any:
+    """Decode raw file contents written by any of the storage codecs"""
+    return detect_codec(payload).decode(payload)
+
+def codec_info() -> Dict[str, Any]:
+    """Describe which codec backends are available"""
+    return {
+        "default": get_codec().name,
+        "orjson": orjson is not None,
+        "msgpack": msgpack is not None
+    }
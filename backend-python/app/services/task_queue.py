@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Callable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Task queue configuration
+TASK_QUEUE_DB = os.environ.get("TASK_QUEUE_DB", "data/tasks.db")
+TASK_QUEUE_WORKERS = int(os.environ.get("TASK_QUEUE_WORKERS", "4"))
+TASK_MAX_RETRIES = int(os.environ.get("TASK_MAX_RETRIES", "2"))
+TASK_RETRY_DELAY = float(os.environ.get("TASK_RETRY_DELAY", "5"))  # seconds, multiplied by the attempt number
+TASK_RESULT_TTL = float(os.environ.get("TASK_RESULT_TTL", str(24 * 3600)))  # finished tasks kept this long
+TASK_LEASE = float(os.environ.get("TASK_LEASE", "60"))  # seconds a running task stays claimed without a heartbeat
+TASK_PURGE_INTERVAL = float(os.environ.get("TASK_PURGE_INTERVAL", "3600"))  # seconds between purges of finished tasks
+TASK_POLL_INTERVAL = 1.0  # seconds between queue checks when idle
+
+TASK_STATUSES = ("queued", "running", "succeeded", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    blob BLOB,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_queued ON tasks (status, run_after, created_at);
+"""
+
+# Task handler: (payload, blob) -> JSON-serializable result
+TaskHandler = Callable[[Dict[str, Any], Optional[bytes]], Any]
+
+class TaskQueue:
+    """Persistent SQLite-backed queue for long-running work, processed by a worker pool"""
+
+    def __init__(self, db_path: str = TASK_QUEUE_DB, workers: int = TASK_QUEUE_WORKERS):
+        """
+        Open (or create) the queue database
+
+        Args:
+            db_path: SQLite database file
+            workers: Number of worker threads started by start()
+        """
+        self.db_path = db_path
+        self.workers = workers
+        self._handlers: Dict[str, TaskHandler] = {}
+        # Workers wait on _wakeup, the lease heartbeat on its own event, so a submit wakes a worker
+        self._wakeup = threading.Condition()
+        self._heartbeat_stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        # Tasks being run by this process; their leases are renewed by the heartbeat thread
+        self._running: set = set()
+        self._running_lock = threading.Lock()
+        self._purge_lock = threading.Lock()
+        self._last_purge = 0.0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(tasks)")}
+            if 'lease_until' not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN lease_until REAL")
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection in autocommit mode (one per operation, so any thread may call)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def register(self, task_type: str, handler: TaskHandler) -> None:
+        """
+        Register the function that runs tasks of a type
+
+        Args:
+            task_type: Task type name
+            handler: Called with the payload and optional blob; its return value is stored as the result
+        """
+        self._handlers[task_type] = handler
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        if self._threads:
+            return
+        self._stopped = False
+        self._heartbeat_stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"task-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="task-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        logger.info(f"Task queue started with {self.workers} workers ({self.db_path})")
+
+    def stop(self) -> None:
+        """Stop the workers after their current task"""
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify_all()
+        self._heartbeat_stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def submit(self, task_type: str, payload: Dict[str, Any], blob: Optional[bytes] = None,
+               max_retries: int = TASK_MAX_RETRIES) -> str:
+        """
+        Queue a task
+
+        Args:
+            task_type: Registered task type
+            payload: JSON-serializable task arguments
+            blob: Optional binary input (e.g. an uploaded file)
+            max_retries: Retries after the first failed attempt
+
+        Returns:
+            Task ID
+        """
+        if task_type not in self._handlers:
+            raise ValueError(f"Unknown task type: {task_type}")
+
+        task_id = f"task_{uuid.uuid4().hex}"
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO tasks (id, type, status, payload, blob, max_attempts, run_after, created_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (task_id, task_type, json.dumps(payload), blob, max_retries + 1, now, now)
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        logger.info(f"Queued {task_type} task {task_id}")
+        return task_id
+
+    def get_task(self, task_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get a task's state
+
+        Args:
+            task_id: Task ID
+            include_result: Include the stored result
+
+        Returns:
+            Task data or None if the task does not exist
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, type, status, result, error, attempts, max_attempts, created_at, started_at, finished_at "
+                "FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        task = {key: row[key] for key in row.keys() if key != 'result'}
+        if include_result and row['result'] is not None:
+            task['result'] = json.loads(row['result'])
+        return task
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get task counts per status and the age of the oldest queued task"""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+            oldest = conn.execute("SELECT MIN(created_at) FROM tasks WHERE status = 'queued'").fetchone()[0]
+        return {
+            'workers': self.workers if self._threads else 0,
+            **{status: counts.get(status, 0) for status in TASK_STATUSES},
+            'oldest_queued_age_seconds': round(time.time() - oldest, 1) if oldest else 0
+        }
+
+    def purge_finished(self, older_than: float = TASK_RESULT_TTL) -> int:
+        """
+        Delete finished tasks
+
+        Args:
+            older_than: Minimum age in seconds since the task finished
+
+        Returns:
+            Number of tasks deleted
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM tasks WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - older_than,)
+            ).rowcount
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """
+        Atomically move the next due task to running, leased for TASK_LEASE seconds
+
+        Running tasks whose lease expired (their process died without
+        finishing them) go back to the queue first. Live tasks keep their
+        lease through the heartbeat, so other processes leave them alone.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                recovered = conn.execute(
+                    "UPDATE tasks SET status = 'queued', run_after = ? "
+                    "WHERE status = 'running' AND COALESCE(lease_until, 0) < ?", (now, now)
+                ).rowcount
+                if recovered:
+                    logger.warning(f"Requeued {recovered} tasks whose lease expired")
+                row = conn.execute(
+                    "SELECT * FROM tasks WHERE status = 'queued' AND run_after <= ? ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE tasks SET status = 'running', attempts = attempts + 1, started_at = ?, lease_until = ? "
+                        "WHERE id = ?",
+                        (now, now + TASK_LEASE, row['id'])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is not None:
+            with self._running_lock:
+                self._running.add(row['id'])
+        return row
+
+    def _renew_leases(self) -> None:
+        """Extend the leases of the tasks this process is running"""
+        with self._running_lock:
+            task_ids = list(self._running)
+        if not task_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE tasks SET lease_until = ? WHERE id = ? AND status = 'running'",
+                [(time.time() + TASK_LEASE, task_id) for task_id in task_ids]
+            )
+
+    def _heartbeat(self) -> None:
+        while not self._stopped:
+            try:
+                self._renew_leases()
+            except Exception as e:
+                logger.error(f"Error renewing task leases: {e}")
+            if self._heartbeat_stop.wait(TASK_LEASE / 3):
+                return
+
+    def _purge_if_due(self) -> None:
+        """Purge finished tasks at most once per TASK_PURGE_INTERVAL (called by idle workers)"""
+        if time.time() - self._last_purge < TASK_PURGE_INTERVAL or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_purge = time.time()
+            purged = self.purge_finished()
+            if purged:
+                logger.info(f"Purged {purged} finished tasks older than {TASK_RESULT_TTL:.0f}s")
+        except Exception as e:
+            logger.error(f"Error purging finished tasks: {e}")
+        finally:
+            self._purge_lock.release()
+
+    def _finish(self, task_id: str, **fields) -> None:
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*fields.values(), task_id))
+
+    def _run(self, row: sqlite3.Row) -> None:
+        task_id = row['id']
+        attempt = row['attempts'] + 1
+        start_time = time.time()
+        try:
+            handler = self._handlers.get(row['type'])
+            if handler is None:
+                raise ValueError(f"No handler registered for task type {row['type']}")
+
+            result = handler(json.loads(row['payload']), row['blob'])
+            self._finish(task_id, status='succeeded', result=json.dumps(result), error=None,
+                         blob=None, finished_at=time.time())
+            logger.info(f"Task {task_id} ({row['type']}) succeeded in {time.time() - start_time:.2f}s")
+
+        except Exception as e:
+            if attempt < row['max_attempts']:
+                delay = TASK_RETRY_DELAY * attempt
+                self._finish(task_id, status='queued', error=str(e), run_after=time.time() + delay)
+                logger.warning(f"Task {task_id} ({row['type']}) failed attempt {attempt}, retrying in {delay}s: {e}")
+            else:
+                self._finish(task_id, status='failed', error=str(e), blob=None, finished_at=time.time())
+                logger.error(f"Task {task_id} ({row['type']}) failed after {attempt} attempts: {e}", exc_info=True)
+
+        finally:
+            with self._running_lock:
+                self._running.discard(task_id)
+
+    def _worker(self) -> None:
+        while not self._stopped:
+            try:
+                row = self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming task: {e}")
+                row = None
+
+            if row is None:
+                self._purge_if_due()
+                with self._wakeup:
+                    if not self._stopped:
+                        self._wakeup.wait(TASK_POLL_INTERVAL)
+                continue
+
+            self._run(row)
+
+_queue: Optional[TaskQueue] = None
+_queue_lock = threading.Lock()
+
+def get_task_queue() -> TaskQueue:
+    """Get the shared task queue (workers are started by the caller)"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = TaskQueue()
+        return _queue
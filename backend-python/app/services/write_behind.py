@@ -0,0 +1,231 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+# Optional: exclusive file locks (POSIX only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Write-behind configuration
+#
+# Write-behind keeps the interview, CV and question pool files in memory and is
+# only safe in a single process. The first process that writes takes an
+# exclusive lock on WRITE_BEHIND_LOCK_FILE; any other process (e.g. a second
+# gunicorn worker) refuses write-behind and writes through to disk, and the
+# lock holder reloads a file when it changes on disk behind its back.
+WRITE_BEHIND_ENABLED = os.environ.get("STORAGE_WRITE_BEHIND", "false").lower() == "true"
+WRITE_BEHIND_WINDOW = float(os.environ.get("STORAGE_WRITE_BEHIND_WINDOW", "0.5"))  # seconds
+WRITE_BEHIND_LOCK_FILE = os.environ.get("STORAGE_WRITE_BEHIND_LOCK", "data/write_behind.lock")
+
+class WriteBehindQueue:
+    """Coalesces storage writes and flushes them in batches from a background thread"""
+
+    def __init__(self, window: float = WRITE_BEHIND_WINDOW, lock_file: Optional[str] = WRITE_BEHIND_LOCK_FILE):
+        """
+        Initialize the queue
+
+        Args:
+            window: Seconds to wait after the first pending write before flushing
+            lock_file: File locked by the one process allowed to use write-behind (None to skip the check)
+        """
+        self.window = window
+        self.lock_file = lock_file
+        self._lock_handle = None
+        self._refused = False
+        self._pending: Dict[str, Callable[[], None]] = {}
+        self._first_enqueued_at: Optional[float] = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+
+        self._metrics = {
+            'writes_submitted': 0,
+            'writes_coalesced': 0,
+            'writes_failed': 0,
+            'batches_flushed': 0,
+            'last_batch_size': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+            'last_flush_at': None,
+            'last_error': None
+        }
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def active(self) -> bool:
+        """False once another process was found using write-behind on the same data"""
+        return not self._refused
+
+    def _acquire_process_lock(self) -> bool:
+        """Take the single-process lock on first use (not at start, so a reloader parent that never writes keeps it free)"""
+        if self._lock_handle is not None or self.lock_file is None or fcntl is None:
+            return True
+        directory = os.path.dirname(self.lock_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle = open(self.lock_file, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            self._refused = True
+            logger.error(f"Another process holds {self.lock_file}; write-behind is single-process only, "
+                         f"writing through to disk in process {os.getpid()}")
+            return False
+        self._lock_handle = handle
+        return True
+
+    def is_pending(self, key: str) -> bool:
+        """Check if a write for key is waiting to be flushed"""
+        with self._condition:
+            return key in self._pending
+
+    def submit(self, key: str, write: Callable[[], None]) -> bool:
+        """
+        Schedule a write; a later write with the same key replaces a pending one
+
+        Args:
+            key: Coalescing key (usually the target file path)
+            write: Callable performing the write
+
+        Returns:
+            True if queued, False if write-behind is refused in this process
+            (the caller must write directly)
+        """
+        with self._condition:
+            if self._refused or not self._acquire_process_lock():
+                return False
+            if self._stopped:
+                write()
+                return True
+
+            if key in self._pending:
+                self._metrics['writes_coalesced'] += 1
+            self._pending[key] = write
+            self._metrics['writes_submitted'] += 1
+
+            if self._first_enqueued_at is None:
+                self._first_enqueued_at = time.time()
+            self._condition.notify()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write all pending items now, in the calling thread
+
+        Returns:
+            Number of writes flushed
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch = self._pending
+                self._pending = {}
+                self._first_enqueued_at = None
+
+            if not batch:
+                return 0
+
+            start_time = time.time()
+            failures = []
+            for key, write in batch.items():
+                try:
+                    write()
+                except Exception as e:
+                    failures.append(f"{key}: {e}")
+                    logger.error(f"Write-behind flush failed for {key}: {e}")
+
+            flush_ms = (time.time() - start_time) * 1000
+            # Metrics share the queue lock with submit() and get_metrics()
+            with self._condition:
+                self._metrics['writes_failed'] += len(failures)
+                if failures:
+                    self._metrics['last_error'] = failures[-1]
+                self._metrics['batches_flushed'] += 1
+                self._metrics['last_batch_size'] = len(batch)
+                self._metrics['last_flush_ms'] = round(flush_ms, 2)
+                self._metrics['max_flush_ms'] = round(max(self._metrics['max_flush_ms'], flush_ms), 2)
+                self._metrics['total_flush_ms'] += flush_ms
+                self._metrics['last_flush_at'] = time.time()
+            return len(batch)
+
+    def shutdown(self) -> None:
+        """Stop the background thread and flush anything still pending"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout=5)
+        flushed = self.flush()
+        if flushed:
+            logger.info(f"Write-behind queue flushed {flushed} pending writes on shutdown")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and flush latency metrics"""
+        with self._condition:
+            depth = len(self._pending)
+            oldest = self._first_enqueued_at
+            metrics = dict(self._metrics)
+
+        batches = metrics['batches_flushed']
+        total_flush_ms = metrics.pop('total_flush_ms')
+        metrics.update({
+            'enabled': self.active,
+            'refused_other_process': self._refused,
+            'window_seconds': self.window,
+            'queue_depth': depth,
+            'oldest_pending_age_ms': round((time.time() - oldest) * 1000, 2) if oldest else 0,
+            'avg_flush_ms': round(total_flush_ms / batches, 2) if batches else 0.0
+        })
+        return metrics
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+
+                # Let further writes coalesce until the window since the first one elapses
+                remaining = self._first_enqueued_at + self.window - time.time()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+
+            self.flush()
+
+_queue: Optional[WriteBehindQueue] = None
+_queue_lock = threading.Lock()
+
+def get_write_behind_queue() -> Optional[WriteBehindQueue]:
+    """Get the shared write-behind queue, or None if write-behind is disabled"""
+    global _queue
+    if not WRITE_BEHIND_ENABLED:
+        return None
+
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue()
+            atexit.register(_queue.shutdown)
+            logger.info(f"Write-behind storage enabled (window: {_queue.window}s)")
+        return _queue
+
+def flush_write_behind() -> int:
+    """Flush pending writes, if write-behind is enabled"""
+    return _queue.flush() if _queue is not None else 0
+
+def get_write_behind_metrics() -> Dict[str, Any]:
+    """Get write-behind metrics for monitoring"""
+    if _queue is None:
+        return {'enabled': WRITE_BEHIND_ENABLED, 'queue_depth': 0}
+    return _queue.get_metrics()
@@ -0,0 +1,245 @@
+import re
+import json
+import logging
+from typing import List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+THINK_RE = re.compile(r"<think>.*?(</think>|$)", re.DOTALL)
+FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)(```|$)")
+VALID_ESCAPES = set('"\\/bfnrtu')
+NUMBER_RE = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$")
+
+# Quote characters that may open a string, and what may close it
+OPENING_QUOTES = {'"': '"', "'": "'", "“": "”“\"", "”": "”“\""}
+
+# After a real closing quote the next non-space character is one of these (or the text ends)
+AFTER_STRING = set(",:}]")
+
+BARE_WORDS = {
+    "true": "true", "True": "true", "false": "false", "False": "false",
+    "null": "null", "None": "null", "NaN": "null", "undefined": "null"
+}
+
+class _Frame:
+    """An open object or array while repairing"""
+    __slots__ = ("closer", "expect_key", "after_value")
+
+    def __init__(self, closer: str):
+        self.closer = closer
+        self.expect_key = closer == "}"
+        self.after_value = False
+
+def _json_start(text: str) -> Optional[str]:
+    """Cut model chatter around the JSON: think blocks, code fences and prose before the first bracket"""
+    text = THINK_RE.sub("", text)
+    fence = FENCE_RE.search(text)
+    if fence and ("{" in fence.group(1) or "[" in fence.group(1)):
+        text = fence.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    return text[min(starts):] if starts else None
+
+def _next_string_end(text: str, start: int) -> int:
+    """Index just past the string opened by the quote at start, or -1 if it does not close"""
+    j = start + 1
+    while j < len(text):
+        if text[j] == "\\":
+            j += 2
+            continue
+        if text[j] == '"':
+            return j + 1
+        j += 1
+    return -1
+
+def _string_end(text: str, i: int, closers: str) -> bool:
+    """
+    Check if the quote at i closes the string, judged by what follows it
+
+    Besides a separator or bracket, another quoted string followed by one
+    (the next key or array item after a missing comma) also ends the string;
+    a quote followed by plain words is taken as part of the text.
+    """
+    if text[i] not in closers:
+        return False
+    j = i + 1
+    while j < len(text) and text[j].isspace():
+        j += 1
+    if j == len(text) or text[j] in AFTER_STRING:
+        return True
+    if text[j] != '"':
+        return False
+    after = _next_string_end(text, j)
+    if after < 0:
+        return False
+    while after < len(text) and text[after].isspace():
+        after += 1
+    return after == len(text) or text[after] in AFTER_STRING or text[after] == '"'
+
+def repair_json(text: str) -> str:
+    """
+    Turn nearly-valid model output into parseable JSON
+
+    Handles the usual ways models break JSON: prose or code fences around it,
+    single or typographic quotes, unescaped quotes and line breaks inside
+    strings, trailing or missing commas, unquoted keys, Python literals and
+    output cut off mid-document (open strings, arrays and objects are closed
+    and a half-written member is dropped).
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        Repaired JSON text (check it with json.loads)
+
+    Raises:
+        ValueError: If the text contains no JSON object or array
+    """
+    source = _json_start(text or "")
+    if source is None:
+        raise ValueError("No JSON object or array found")
+
+    out: List[str] = []
+    stack: List[_Frame] = []
+    # Points where the output is a complete prefix: (length of out, open frames' closers)
+    safe_points: List[Tuple[int, str]] = []
+    string_closers = None
+    string_is_key = False
+    i = 0
+    n = len(source)
+
+    def closers() -> str:
+        return "".join(frame.closer for frame in reversed(stack))
+
+    def value_done():
+        if stack:
+            stack[-1].after_value = True
+        safe_points.append((len(out), closers()))
+
+    def begin_member() -> bool:
+        """Prepare for a key or value; returns True if it is a key"""
+        frame = stack[-1]
+        if frame.after_value:
+            out.append(",")
+            frame.after_value = False
+            frame.expect_key = frame.closer == "}"
+        if frame.expect_key:
+            frame.expect_key = False
+            return True
+        return False
+
+    while i < n:
+        ch = source[i]
+
+        if string_closers is not None:
+            if ch == "\\" and i + 1 < n:
+                # Keep valid escapes; drop the backslash of invalid ones such as \'
+                out.append(source[i:i + 2] if source[i + 1] in VALID_ESCAPES else source[i + 1])
+                i += 2
+                continue
+            if _string_end(source, i, string_closers):
+                out.append('"')
+                string_closers = None
+                if not string_is_key:
+                    value_done()
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\t":
+                out.append("\\t")
+            elif ord(ch) < 0x20:
+                pass
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if not stack:
+            if out:
+                break  # the document closed; the rest is trailing prose
+            if ch not in "{[":
+                i += 1
+                continue
+
+        if ch in "{[":
+            if stack:
+                begin_member()
+            out.append(ch)
+            stack.append(_Frame("}" if ch == "{" else "]"))
+            safe_points.append((len(out), closers()))
+        elif ch in "}]":
+            if any(frame.closer == ch for frame in stack):
+                while stack:
+                    while out and out[-1] in (",", " ", "\n", "\t", "\r"):
+                        out.pop()
+                    if out and out[-1] == ":":
+                        out.append("null")
+                    frame = stack.pop()
+                    out.append(frame.closer)
+                    if frame.closer == ch:
+                        break
+                value_done()
+        elif ch in OPENING_QUOTES:
+            string_is_key = begin_member() if stack else False
+            string_closers = OPENING_QUOTES[ch]
+            out.append('"')
+        elif ch == ",":
+            frame = stack[-1]
+            if frame.after_value:
+                out.append(",")
+                frame.after_value = False
+                frame.expect_key = frame.closer == "}"
+        elif ch == ":":
+            out.append(":")
+        elif ch in " \t\r\n":
+            out.append(ch)
+        elif ch.isalnum() or ch in "-+._":
+            j = i
+            while j < n and (source[j].isalnum() or source[j] in "-+._"):
+                j += 1
+            word = source[i:j]
+            is_key = begin_member()
+            number = word.lstrip("+").rstrip(".")
+            if is_key:
+                out.append(json.dumps(word))
+            elif word in BARE_WORDS:
+                out.append(BARE_WORDS[word])
+                value_done()
+            elif NUMBER_RE.match(number):
+                out.append(number)
+                value_done()
+            else:
+                out.append(json.dumps(word))
+                value_done()
+            i = j
+            continue
+        # Anything else outside strings (comments, backticks, ellipses) is dropped
+        i += 1
+
+    if not stack:
+        return "".join(out)
+
+    # Truncated: first try finishing the member being written, then fall back to the last complete prefix
+    logger.debug(f"Repairing truncated JSON ({len(stack)} open containers)")
+    finished = list(out)
+    if string_closers is not None:
+        finished.append('"')
+    tail = "".join(finished).rstrip().rstrip(",")
+    if tail.endswith(":"):
+        tail += "null"
+    candidate = tail + closers()
+    try:
+        json.loads(candidate)
+        return candidate
+    except ValueError:
+        pass
+
+    for length, open_closers in reversed(safe_points):
+        candidate = "".join(out[:length]).rstrip().rstrip(",") + open_closers
+        try:
+            json.loads(candidate)
+            return candidate
+        except ValueError:
+            continue
+    return candidate
@@ -0,0 +1,120 @@
+import json
+import logging
+from typing import List, Any, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class JsonArrayItemParser:
+    """
+    Incremental parser that returns the items of one array in a JSON document as soon as each item closes
+
+    The document is fed in arbitrary chunks (e.g. streamed model output). Only
+    nesting, strings and object keys are tracked while scanning; each finished
+    item is decoded with json.loads, so the whole document is scanned once.
+    """
+
+    def __init__(self, array_key: str):
+        """
+        Initialize the parser
+
+        Args:
+            array_key: Key of the array in the top-level object (e.g. "job_matches")
+        """
+        self.array_key = array_key
+        self.buffer = ""
+        self._pos = 0
+        # One frame per open container: [kind, current key, expecting a key]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._array_depth: Optional[int] = None  # stack depth inside the target array
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Add text and get the array items completed by it
+
+        Args:
+            chunk: Next piece of the JSON document
+
+        Returns:
+            Decoded items that closed within this chunk, in order (null items are skipped)
+        """
+        self.buffer += chunk
+        items = []
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    frame = self._stack[-1] if self._stack else None
+                    if frame is not None and frame[0] == "{" and frame[2]:
+                        frame[1] = json.loads(buffer[self._string_start:i + 1])
+                        frame[2] = False
+                continue
+
+            if self._is_array_top() and self._item_start is None and ch not in " \t\r\n,]":
+                self._item_start = i
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if ch == "[" and self._array_depth is None and len(self._stack) == 1 \
+                        and self._stack[0][1] == self.array_key:
+                    self._array_depth = 2
+                self._stack.append([ch, None, ch == "{"])
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._is_array_top() and self._item_start is not None:
+                    # A container item just closed
+                    items.append(self._decode(self._item_start, i + 1))
+                    self._item_start = None
+                elif self._array_depth is not None and len(self._stack) == self._array_depth - 1 and ch == "]":
+                    # The target array closed; a pending scalar item ends here
+                    if self._item_start is not None:
+                        items.append(self._decode(self._item_start, i))
+                        self._item_start = None
+                    self._array_depth = -1
+            elif ch == ",":
+                if self._is_array_top() and self._item_start is not None:
+                    # A scalar item ends at the separator
+                    items.append(self._decode(self._item_start, i))
+                    self._item_start = None
+                elif self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][2] = True
+
+        self._pos = len(buffer)
+        return [item for item in items if item is not None]
+
+    def _is_array_top(self) -> bool:
+        return self._array_depth is not None and len(self._stack) == self._array_depth
+
+    def _decode(self, start: int, end: int) -> Any:
+        text = self.buffer[start:end].strip()
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping undecodable streamed item: {e}. Item: '{text[:200]}'")
+            return None
+
+    def document(self) -> Any:
+        """
+        Decode the complete document fed so far
+
+        Returns:
+            Parsed JSON value
+
+        Raises:
+            json.JSONDecodeError: If the document is incomplete or invalid
+        """
+        return json.loads(self.buffer)
@@ -0,0 +1,259 @@
+import os
+import re
+import logging
+import threading
+from typing import Dict, List, Any, Callable, Optional, Union
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Optional tokenizer backend
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Token counting: "chars" (about four characters per token) or "tiktoken"
+PROMPT_TOKENIZER = os.environ.get("PROMPT_TOKENIZER", "chars").lower()
+CHARS_PER_TOKEN = 4
+
+# Marker appended to trimmed text
+TRIM_MARKER = " ..."
+
+# A sentence boundary is only used if it keeps at least this share of the allowed text
+MIN_SENTENCE_KEEP = 0.5
+
+SENTENCE_END_RE = re.compile(r"[.!?](?=\s)|\n")
+INLINE_SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+LINE_EDGE_SPACE_RE = re.compile(r" ?\n ?")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+Tokenizer = Callable[[str], int]
+
+def _count_chars(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+_tokenizers: Dict[str, Tokenizer] = {"chars": _count_chars}
+_tokenizer_name = "chars"
+
+def register_tokenizer(name: str, tokenizer: Tokenizer) -> None:
+    """
+    Make a token counter available to set_tokenizer
+
+    Args:
+        name: Tokenizer name
+        tokenizer: Function returning the token count of a text
+    """
+    _tokenizers[name] = tokenizer
+
+def set_tokenizer(name: str) -> bool:
+    """
+    Select the token counter used by count_tokens
+
+    Args:
+        name: Registered tokenizer name
+
+    Returns:
+        True if the tokenizer exists and was selected
+    """
+    global _tokenizer_name
+    if name not in _tokenizers:
+        logger.warning(f"Unknown tokenizer '{name}', keeping '{_tokenizer_name}'")
+        return False
+    _tokenizer_name = name
+    return True
+
+def tokenizer_name() -> str:
+    """Get the name of the selected tokenizer"""
+    return _tokenizer_name
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text with the selected tokenizer"""
+    return _tokenizers[_tokenizer_name](text) if text else 0
+
+if tiktoken is not None:
+    try:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+        register_tokenizer("tiktoken", lambda text: len(_encoding.encode(text, disallowed_special=())))
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding: {e}")
+if PROMPT_TOKENIZER != "chars" and not set_tokenizer(PROMPT_TOKENIZER):
+    logger.warning(f"Tokenizer '{PROMPT_TOKENIZER}' is not available, estimating tokens from characters")
+
+def compact_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines (common in extracted PDF text), keeping line breaks"""
+    text = LINE_EDGE_SPACE_RE.sub("\n", INLINE_SPACE_RE.sub(" ", text))
+    return BLANK_LINES_RE.sub("\n\n", text).strip()
+
+def _longest_prefix(text: str, max_tokens: int) -> str:
+    """Get the longest prefix of text within max_tokens (text is known not to fit)"""
+    chars_per_token = len(text) / max(1, count_tokens(text))
+    end = min(len(text), int(max_tokens * chars_per_token))
+    while end > 0 and count_tokens(text[:end]) > max_tokens:
+        end = int(end * 0.9)
+    return text[:end]
+
+def trim_to_tokens(text: str, max_tokens: int, marker: str = TRIM_MARKER) -> str:
+    """
+    Shorten text to a token budget, cutting at a sentence end where possible
+
+    Falls back to a word boundary when the last sentence end would drop more
+    than half of the allowed text.
+
+    Args:
+        text: Text to fit
+        max_tokens: Budget including the marker
+        marker: Appended when text was cut
+
+    Returns:
+        text unchanged if it fits, otherwise a trimmed copy ending in marker
+    """
+    if not text or count_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens - count_tokens(marker)
+    if limit <= 0:
+        return ""
+
+    prefix = _longest_prefix(text, limit)
+    boundary = None
+    for match in SENTENCE_END_RE.finditer(prefix):
+        boundary = match.end()
+    if boundary is None or boundary < len(prefix) * MIN_SENTENCE_KEEP:
+        space = prefix.rfind(" ")
+        boundary = space if space > len(prefix) * MIN_SENTENCE_KEEP else len(prefix)
+
+    trimmed = prefix[:boundary].rstrip()
+    return trimmed + marker if trimmed else ""
+
+def split_budget(texts: List[str], budget: int, max_tokens_each: Optional[int] = None) -> List[str]:
+    """
+    Share a budget across texts, giving short texts their full size and splitting the rest evenly
+
+    Args:
+        texts: Texts to fit (e.g. one description per job)
+        budget: Total tokens for all texts
+        max_tokens_each: Optional cap per text
+
+    Returns:
+        Trimmed texts in the same order
+    """
+    sizes = [count_tokens(text) for text in texts]
+    wanted = [min(size, max_tokens_each) if max_tokens_each is not None else size for size in sizes]
+    grants = [0] * len(texts)
+
+    remaining = max(0, budget)
+    pending = sorted(range(len(texts)), key=lambda i: wanted[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        grants[i] = min(wanted[i], share)
+        remaining -= grants[i]
+
+    return [text if grants[i] >= sizes[i] else trim_to_tokens(text, grants[i]) for i, text in enumerate(texts)]
+
+def _section_size(section: Dict[str, Any]) -> int:
+    cap = section.get("max_tokens")
+    if "items" in section:
+        return sum(min(count_tokens(item), cap) if cap is not None else count_tokens(item) for item in section["items"])
+    size = count_tokens(section.get("text", ""))
+    return min(size, cap) if cap is not None else size
+
+def fit_sections(sections: List[Dict[str, Any]], budget: int,
+                 call_site: Optional[str] = None) -> Dict[str, Union[str, List[str]]]:
+    """
+    Allocate a token budget across prompt sections by priority and trim them to fit
+
+    Each section is a dict with:
+        name: key in the result
+        text: section text, or items: list of texts sharing the section's budget
+        priority: lower numbers are filled first (default 1)
+        max_tokens: optional cap (per item for items)
+        min_tokens: tokens reserved before any section is filled (default 0)
+
+    Args:
+        sections: Prompt sections
+        budget: Tokens available for all sections together
+        call_site: Optional name for the trim counters in get_prompt_metrics
+
+    Returns:
+        Mapping of section name to its fitted text (or list of texts)
+    """
+    sizes = {s["name"]: _section_size(s) for s in sections}
+    grants = {name: min(sizes[name], s.get("min_tokens", 0)) for s, name in zip(sections, sizes)}
+    remaining = budget - sum(grants.values())
+
+    for section in sorted(sections, key=lambda s: s.get("priority", 1)):
+        name = section["name"]
+        extra = max(0, min(sizes[name] - grants[name], remaining))
+        grants[name] += extra
+        remaining -= extra
+
+    fitted = {}
+    trimmed = 0
+    for section in sections:
+        name = section["name"]
+        cap = section.get("max_tokens")
+        if "items" in section:
+            fitted[name] = split_budget(section["items"], grants[name], cap)
+            trimmed += sum(1 for a, b in zip(section["items"], fitted[name]) if a != b)
+        else:
+            text = section.get("text", "")
+            fitted[name] = trim_to_tokens(text, grants[name])
+            trimmed += fitted[name] != text
+
+    if trimmed:
+        logger.info(f"Prompt budget {budget} ({call_site or 'prompt'}): trimmed {trimmed} sections/items")
+        if call_site:
+            with _metrics_lock:
+                _site_metrics(call_site)['trimmed'] += trimmed
+    return fitted
+
+def remaining_budget(budget: int, *fixed_texts: str) -> int:
+    """Get what is left of a budget after the fixed parts of a prompt"""
+    return max(0, budget - sum(count_tokens(text) for text in fixed_texts))
+
+# Per call site prompt sizes: estimated before the call, reported by the server after it
+_metrics: Dict[str, Dict[str, Any]] = {}
+_metrics_lock = threading.Lock()
+
+def _site_metrics(call_site: str) -> Dict[str, Any]:
+    return _metrics.setdefault(call_site, {
+        'calls': 0, 'estimated_tokens': 0, 'reported_calls': 0, 'reported_tokens': 0,
+        'max_reported_tokens': 0, 'trimmed': 0
+    })
+
+def record_prompt_tokens(call_site: str, estimated: int, reported: Optional[int] = None) -> None:
+    """
+    Record the prompt size of a model call
+
+    Args:
+        call_site: Name of the calling feature
+        estimated: Tokens counted by count_tokens
+        reported: Prompt tokens reported by the model server (prompt_eval_count), if any
+    """
+    with _metrics_lock:
+        metrics = _site_metrics(call_site)
+        metrics['calls'] += 1
+        metrics['estimated_tokens'] += estimated
+        if reported is not None:
+            metrics['reported_calls'] += 1
+            metrics['reported_tokens'] += reported
+            metrics['max_reported_tokens'] = max(metrics['max_reported_tokens'], reported)
+    logger.debug(f"Prompt tokens for {call_site}: estimated {estimated}, reported {reported}")
+
+def get_prompt_metrics() -> Dict[str, Any]:
+    """
+    Get prompt token averages per call site
+
+    With the server's cache, reported counts only cover tokens that were not
+    already cached, so they can be lower than the estimate.
+    """
+    with _metrics_lock:
+        sites = {}
+        for call_site, m in _metrics.items():
+            sites[call_site] = {
+                **m,
+                'avg_estimated_tokens': round(m['estimated_tokens'] / m['calls']) if m['calls'] else 0,
+                'avg_reported_tokens': round(m['reported_tokens'] / m['reported_calls']) if m['reported_calls'] else None
+            }
+    return {'tokenizer': _tokenizer_name, 'call_sites': sites}
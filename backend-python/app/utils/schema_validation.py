@@ -0,0 +1,215 @@
+import re
+import json
+import logging
+import threading
+from typing import Dict, List, Any, Callable, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Separators when a string is given where a list of strings is expected
+LIST_SPLIT_RE = re.compile(r"\s*(?:\n|;|,)\s*(?:[-*•]\s*)?")
+NUMBER_IN_TEXT_RE = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+TRUE_WORDS = {"true", "yes", "tak", "y", "1"}
+FALSE_WORDS = {"false", "no", "nie", "n", "0"}
+
+class SchemaMismatch(Exception):
+    """Raised when a value cannot be coerced to its schema"""
+
+# Coercer: value -> coerced value; appends to the issue list, raises SchemaMismatch if hopeless
+Coercer = Callable[[Any, List[str], str], Any]
+
+_compiled: Dict[str, Coercer] = {}
+_compiled_lock = threading.Lock()
+
+def _to_number(value: Any, integer: bool) -> Any:
+    if isinstance(value, bool):
+        value = int(value)
+    elif isinstance(value, str):
+        found = NUMBER_IN_TEXT_RE.search(value)
+        if not found:
+            raise SchemaMismatch(f"not a number: {value[:40]!r}")
+        value = float(found.group().replace(",", "."))
+    elif not isinstance(value, (int, float)):
+        raise SchemaMismatch(f"not a number: {type(value).__name__}")
+    return int(round(value)) if integer else value
+
+def _compile(schema: Dict[str, Any]) -> Coercer:
+    """Build the coercer for one schema node"""
+    schema_type = schema.get("type")
+    types = schema_type if isinstance(schema_type, list) else [schema_type]
+    steps: List[Coercer] = []
+
+    if "object" in types:
+        properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+        required = list(schema.get("required", []))
+        # A missing list reads the same as an empty one, so those are the only required fields with a default
+        list_fields = {name for name, sub in schema.get("properties", {}).items()
+                       if sub.get("type") == "array" or (isinstance(sub.get("type"), list) and "array" in sub["type"])}
+
+        def coerce_object(value, issues, path):
+            if not isinstance(value, dict):
+                raise SchemaMismatch(f"{path or 'value'} is not an object")
+            result = dict(value)
+            for name, coerce in properties.items():
+                if name in result and result[name] is not None:
+                    result[name] = coerce(result[name], issues, f"{path}.{name}" if path else name)
+            # Other required fields are never invented: callers check for them and cache what they find
+            for name in required:
+                if result.get(name) is None and name in list_fields:
+                    result[name] = []
+                    issues.append(f"{path}.{name}" if path else name)
+            missing = [name for name in required if result.get(name) is None]
+            if missing:
+                raise SchemaMismatch(f"{path or 'value'} is missing required {', '.join(missing)}")
+            return result
+        steps.append(coerce_object)
+
+    elif "array" in types:
+        item_coerce = _compile(schema["items"]) if isinstance(schema.get("items"), dict) else None
+        split_strings = isinstance(schema.get("items"), dict) and schema["items"].get("type") == "string"
+
+        def coerce_array(value, issues, path):
+            if not isinstance(value, list):
+                issues.append(path)
+                if isinstance(value, str) and split_strings:
+                    value = [part for part in LIST_SPLIT_RE.split(value.strip()) if part]
+                else:
+                    value = [value]
+            if item_coerce is None:
+                return value
+            result = []
+            for index, item in enumerate(value):
+                try:
+                    result.append(item_coerce(item, issues, f"{path}[{index}]"))
+                except SchemaMismatch as e:
+                    # One bad item should not cost the whole response
+                    issues.append(f"{path}[{index}] dropped ({e})")
+            return result
+        steps.append(coerce_array)
+
+    elif "string" in types:
+        def coerce_string(value, issues, path):
+            if isinstance(value, str):
+                return value
+            issues.append(path)
+            if isinstance(value, list):
+                return "\n".join(str(item) for item in value)
+            if isinstance(value, dict):
+                return json.dumps(value, ensure_ascii=False)
+            return str(value).lower() if isinstance(value, bool) else str(value)
+        steps.append(coerce_string)
+
+    elif "integer" in types or "number" in types:
+        integer = "integer" in types
+
+        def coerce_number(value, issues, path):
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and (not integer or isinstance(value, int)):
+                return value
+            issues.append(path)
+            return _to_number(value, integer)
+        steps.append(coerce_number)
+
+    elif "boolean" in types:
+        def coerce_boolean(value, issues, path):
+            if isinstance(value, bool):
+                return value
+            issues.append(path)
+            if isinstance(value, (int, float)):
+                return value != 0
+            word = str(value).strip().lower()
+            if word in TRUE_WORDS:
+                return True
+            if word in FALSE_WORDS:
+                return False
+            raise SchemaMismatch(f"not a boolean: {word[:40]!r}")
+        steps.append(coerce_boolean)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        folded = {str(option).strip().lower(): option for option in allowed}
+
+        def coerce_enum(value, issues, path):
+            if value in allowed:
+                return value
+            issues.append(path)
+            key = str(value).strip().lower()
+            if key in folded:
+                return folded[key]
+            # Closest by prefix (e.g. "intermediate level"); anything else is not guessed
+            for folded_option, option in folded.items():
+                if key and (key.startswith(folded_option) or folded_option.startswith(key)):
+                    return option
+            raise SchemaMismatch(f"not one of {', '.join(map(str, allowed))}: {key[:40]!r}")
+        steps.append(coerce_enum)
+
+    if "minimum" in schema or "maximum" in schema:
+        low = schema.get("minimum")
+        high = schema.get("maximum")
+
+        def coerce_range(value, issues, path):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return value
+            clamped = value
+            if low is not None and clamped < low:
+                clamped = low
+            if high is not None and clamped > high:
+                clamped = high
+            if clamped != value:
+                issues.append(path)
+            return clamped
+        steps.append(coerce_range)
+
+    def coerce(value, issues, path):
+        for step in steps:
+            value = step(value, issues, path)
+        return value
+    return coerce
+
+def compile_schema(schema: Dict[str, Any]) -> Coercer:
+    """
+    Get the coercer for a JSON schema, compiling it on first use
+
+    Supports the subset the services pass to Ollama: type, properties,
+    required, items, enum, minimum and maximum.
+
+    Args:
+        schema: JSON schema dictionary
+
+    Returns:
+        Compiled coercer (cached by the schema's content)
+    """
+    key = json.dumps(schema, sort_keys=True)
+    coercer = _compiled.get(key)
+    if coercer is None:
+        coercer = _compile(schema)
+        with _compiled_lock:
+            _compiled[key] = coercer
+    return coercer
+
+def coerce_to_schema(value: Any, schema: Dict[str, Any]) -> Tuple[Any, List[str]]:
+    """
+    Validate a parsed model response against its schema, fixing what can be fixed
+
+    Wrong scalar types are converted ("85" -> 85, "yes" -> true), a single
+    value or comma-separated string becomes a list, enum values are matched
+    case-insensitively and numbers are clamped to minimum/maximum. A missing
+    required array becomes an empty one. Array items that cannot be coerced
+    (e.g. missing a required field or an unknown enum value) are dropped;
+    the same problem anywhere else fails the whole value.
+
+    Args:
+        value: Parsed JSON value
+        schema: JSON schema dictionary
+
+    Returns:
+        Coerced value and the paths that needed fixing (empty if it was valid)
+
+    Raises:
+        SchemaMismatch: If the value cannot be made to fit (e.g. an object is required but a list was
+            given, a required field is missing or an enum value is unknown)
+    """
+    issues: List[str] = []
+    coerced = compile_schema(schema)(value, issues, "")
+    return coerced, [issue or "(root)" for issue in issues]
@@ -2,12 +2,8 @@ import json
 import logging
 import re
 from typing import Dict, List, Any
-import sys
-import os
 
-# Add parent directory to path to allow imports
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from services.ai_service import get_structured_output
+from app.services.ai_service import get_structured_output
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -0,0 +1,132 @@
+import re
+import logging
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Stock phrases that say nothing concrete, anywhere in a reply
+VAGUE_PHRASES = [
+    "yes i know",
+    "i know that",
+    "i am familiar with",
+    "i have experience",
+    "i understand",
+    "sounds good",
+    "of course",
+    "definitely",
+    "certainly",
+    "absolutely"
+]
+
+# Replies that are vague when they are the whole message
+VAGUE_REPLIES = frozenset(["yes", "sure", "okay", "ok", "i do"])
+
+# Keywords marking questions and answers about programming concepts
+TECH_KEYWORDS = ['code', 'programming', 'software', 'database', 'api',
+                 'algorithm', 'function', 'class', 'object', 'method',
+                 'framework', 'library', 'deploy', 'architecture']
+
+# Replies shorter than these are too short to be an answer / to skip technical detail
+MIN_ANSWER_LENGTH = 20
+MIN_DETAILED_ANSWER_LENGTH = 50
+
+# All vague phrases as one alternation, matched against lowercased text. Whole-reply
+# patterns are kept out of it: a ^...$ branch disables the regex engine's literal
+# prefix scan and made the combined pattern several times slower.
+VAGUE_RE = re.compile("|".join(re.escape(p) for p in VAGUE_PHRASES))
+
+DONT_KNOW_RE = re.compile(r"don'?t know")
+
+class TurnClassifier:
+    """Classifies interview messages for one job's required skills"""
+
+    def __init__(self, required_skills: Tuple[str, ...]):
+        """
+        Build the technical-term matcher
+
+        Args:
+            required_skills: Skills required for the job
+        """
+        terms = {skill.lower() for skill in required_skills}
+        terms.update(TECH_KEYWORDS)
+
+        # An empty skill name is a substring of everything
+        self._always_technical = "" in terms
+        terms.discard("")
+
+        # Longest first so overlapping terms don't matter for a plain yes/no match
+        alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        self._technical_re = re.compile(alternation) if alternation else None
+
+    def mentions_technical_topic(self, text: str) -> bool:
+        """Check whether text mentions a required skill or a programming keyword"""
+        return self._mentions_technical_topic(text.lower())
+
+    def _mentions_technical_topic(self, text_lower: str) -> bool:
+        if self._always_technical:
+            return True
+        return bool(self._technical_re and self._technical_re.search(text_lower))
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """
+        Get every signal used by the interview flow for one message
+
+        Args:
+            text: Message text
+
+        Returns:
+            Dictionary of signals:
+                is_question: the message contains a question mark
+                technical: mentions a required skill or technical keyword
+                vague_phrase: matches a stock vague reply
+                too_short: shorter than MIN_ANSWER_LENGTH
+                lacks_detail: shorter than MIN_DETAILED_ANSWER_LENGTH and not technical
+                dont_know: the candidate says they don't know
+        """
+        text_lower = text.lower()
+        length = len(text.strip())
+        technical = self._mentions_technical_topic(text_lower)
+
+        # "$" also matches before a single trailing newline
+        reply = text_lower[:-1] if text_lower.endswith("\n") else text_lower
+
+        return {
+            "is_question": "?" in text,
+            "technical": technical,
+            "vague_phrase": reply in VAGUE_REPLIES or VAGUE_RE.search(text_lower) is not None,
+            "too_short": length < MIN_ANSWER_LENGTH,
+            "lacks_detail": length < MIN_DETAILED_ANSWER_LENGTH and not technical,
+            "dont_know": DONT_KNOW_RE.search(text_lower) is not None
+        }
+
+    def is_vague(self, signals: Dict[str, Any], question_technical: bool = False) -> bool:
+        """
+        Decide whether a reply is vague from its signals
+
+        Args:
+            signals: Result of classify() for the reply
+            question_technical: Whether the question being answered was technical
+
+        Returns:
+            True if the reply is a stock phrase, too short, or a short answer
+            without technical detail to a technical question
+        """
+        return signals["vague_phrase"] or signals["too_short"] or (question_technical and signals["lacks_detail"])
+
+@lru_cache(maxsize=256)
+def _cached_classifier(required_skills: Tuple[str, ...]) -> TurnClassifier:
+    return TurnClassifier(required_skills)
+
+def get_turn_classifier(required_skills: List[str]) -> TurnClassifier:
+    """
+    Get the classifier for a job's skill list, building it on first use
+
+    Args:
+        required_skills: Skills required for the job
+
+    Returns:
+        Shared TurnClassifier instance
+    """
+    return _cached_classifier(tuple(required_skills or ()))
@@ -0,0 +1,176 @@
+"""
+A/B the job list layout in the job matching prompt: indented JSON versus the compact table.
+
+Usage:
+    python benchmark_job_prompt.py [--live] [--runs N] [num_jobs ...]
+
+Without --live, prints the size of the job list and the whole prompt in
+each layout (characters and estimated tokens) for the given job counts.
+
+With --live, also runs match_jobs_with_ai against the AI server for every
+profile in each layout and reports latency, the prompt tokens the server
+evaluated, and how well the rankings agree: top-5 overlap and Spearman
+correlation of match percentages, both between layouts and between two
+runs of the JSON layout (the run-to-run noise floor). Calls that fell back
+to the keyword matcher (structured output failed, or the matches carry the
+fallback reasoning) are counted and left out of every figure, since they
+measure the fallback rather than the prompt layout.
+"""
+import sys
+import time
+
+import app.services.job_matching_service as job_matching
+from app.services.ai_service import get_structured_output_metrics
+from app.utils.prompt_budget import count_tokens, get_prompt_metrics
+from sample_jobs import SAMPLE_JOBS
+
+DEFAULT_JOB_COUNTS = [10, 55]
+LAYOUTS = ("json", "table")
+TOP_K = 5
+# Reasoning text _fallback_matches puts on every match
+FALLBACK_MARKER = "(fallback)"
+
+PROFILES = [
+    "Backend developer with five years of Python, Django and PostgreSQL, some Docker and AWS experience.",
+    "Frontend engineer working with React, TypeScript and CSS for three years, interested in UI performance.",
+    "Junior data analyst who knows SQL, Excel and a bit of Python, looking for a first role in data."
+]
+
+def jobs_for(count: int):
+    """Sample jobs repeated (with unique ids) up to count"""
+    return [
+        {**SAMPLE_JOBS[i % len(SAMPLE_JOBS)], "id": f"{SAMPLE_JOBS[i % len(SAMPLE_JOBS)]['id']}-{i}"}
+        for i in range(count)
+    ]
+
+def captured_prompt(jobs, layout: str) -> str:
+    """Build the real matching prompt without calling the model"""
+    captured = {}
+    original = job_matching.get_structured_output
+
+    def capture(prompt, system_prompt, schema, call_site=None):
+        captured["prompt"] = prompt
+        return {"job_matches": [], "extracted_user_skills": []}
+
+    job_matching.get_structured_output = capture
+    try:
+        job_matching.match_jobs_with_ai(PROFILES[0], "", jobs, prompt_format=layout)
+    finally:
+        job_matching.get_structured_output = original
+    return captured["prompt"]
+
+def spearman(a, b):
+    """Spearman rank correlation of two equal-length score lists"""
+    def ranks(values):
+        order = sorted(range(len(values)), key=lambda i: values[i])
+        result = [0.0] * len(values)
+        for rank, i in enumerate(order):
+            result[i] = rank
+        return result
+    n = len(a)
+    if n < 2:
+        return None
+    ra, rb = ranks(a), ranks(b)
+    d2 = sum((x - y) ** 2 for x, y in zip(ra, rb))
+    return 1 - 6 * d2 / (n * (n * n - 1))
+
+def agreement(first, second):
+    """Top-k overlap and Spearman correlation of two match lists"""
+    top_first = [m["id"] for m in first[:TOP_K]]
+    top_second = [m["id"] for m in second[:TOP_K]]
+    overlap = len(set(top_first) & set(top_second)) / TOP_K
+
+    scores_first = {m["id"]: m.get("match_percentage", 0) for m in first}
+    scores_second = {m["id"]: m.get("match_percentage", 0) for m in second}
+    common = sorted(set(scores_first) & set(scores_second))
+    rho = spearman([scores_first[i] for i in common], [scores_second[i] for i in common])
+    return overlap, rho
+
+def reported_tokens():
+    site = get_prompt_metrics()["call_sites"].get("job_matching", {})
+    return site.get("reported_tokens", 0), site.get("reported_calls", 0)
+
+def failed_structured_calls():
+    return get_structured_output_metrics().get("job_matching", {}).get("failed", 0)
+
+def is_fallback(matches, failed_before: int) -> bool:
+    """Whether a match_jobs_with_ai call returned the keyword fallback instead of model output"""
+    if failed_structured_calls() > failed_before:
+        return True
+    return not matches or any(FALLBACK_MARKER in str(m.get("reasoning", "")) for m in matches)
+
+def run_live(jobs, layout: str):
+    """
+    Match every profile once
+
+    Returns:
+        Matches per profile (None where the call fell back), seconds per call,
+        evaluated tokens per call and the number of fallback calls
+    """
+    results, latencies, tokens = [], [], []
+    fallbacks = 0
+    for profile in PROFILES:
+        tokens_before, calls_before = reported_tokens()
+        failed_before = failed_structured_calls()
+        start = time.perf_counter()
+        matches = job_matching.match_jobs_with_ai(profile, "", jobs, prompt_format=layout)
+        elapsed = time.perf_counter() - start
+        tokens_after, calls_after = reported_tokens()
+        if is_fallback(matches, failed_before):
+            fallbacks += 1
+            results.append(None)
+            continue
+        results.append(matches)
+        latencies.append(elapsed)
+        if calls_after > calls_before:
+            tokens.append(tokens_after - tokens_before)
+    return results, latencies, tokens, fallbacks
+
+def agreements(first_runs, second_runs):
+    """Agreement per profile, skipping profiles where either call fell back"""
+    return [agreement(a, b) for a, b in zip(first_runs, second_runs) if a is not None and b is not None]
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else float("nan")
+
+def main():
+    args = sys.argv[1:]
+    live = "--live" in args
+    runs = 1
+    if "--runs" in args:
+        runs = int(args[args.index("--runs") + 1])
+        del args[args.index("--runs"):args.index("--runs") + 2]
+    counts = [int(a) for a in args if a != "--live"] or DEFAULT_JOB_COUNTS
+
+    for count in counts:
+        jobs = jobs_for(count)
+        print(f"{count} jobs:")
+        for layout in LAYOUTS:
+            job_list, _ = job_matching.encode_jobs_for_prompt(
+                jobs, [job.get("description", "") for job in jobs], layout)
+            prompt = captured_prompt(jobs, layout)
+            print(f"  {layout:>5}: job list {len(job_list):7d} chars ~{count_tokens(job_list):6d} tokens | "
+                  f"prompt {len(prompt):7d} chars ~{count_tokens(prompt):6d} tokens")
+
+        if not live:
+            continue
+
+        for run in range(runs):
+            json_first, json_latency, json_tokens, json_fallbacks = run_live(jobs, "json")
+            json_second, _, _, json_second_fallbacks = run_live(jobs, "json")
+            table, table_latency, table_tokens, table_fallbacks = run_live(jobs, "table")
+
+            between = agreements(json_first, table)
+            noise = agreements(json_first, json_second)
+            print(f"  run {run + 1}: latency json {mean(json_latency):.2f}s, table {mean(table_latency):.2f}s | "
+                  f"evaluated tokens json {mean(json_tokens):.0f}, table {mean(table_tokens):.0f} | "
+                  f"fallbacks excluded: json {json_fallbacks + json_second_fallbacks}/{2 * len(PROFILES)}, "
+                  f"table {table_fallbacks}/{len(PROFILES)}")
+            print(f"         json vs table: top-{TOP_K} overlap {mean([o for o, _ in between]):.2f}, "
+                  f"spearman {mean([r for _, r in between]):.2f} | "
+                  f"json vs json: top-{TOP_K} overlap {mean([o for o, _ in noise]):.2f}, "
+                  f"spearman {mean([r for _, r in noise]):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Measure per-turn prompt evaluation on the Ollama server for two prompt layouts.
+
+Usage:
+    python benchmark_prompt_cache.py [turns] [rounds]
+
+"before": per-turn interview state (question counts, previous questions)
+embedded in the system prompt, as handle_conversation used to do.
+"after": static per-job system prompt, history, then the state as a short
+system message right before the candidate's reply.
+
+Both replay the same scripted interview; the server's prompt_eval_count and
+prompt_eval_duration show how much of each prompt missed its KV-cache.
+The two layouts share the system prompt, so the model is unloaded before
+every run (dropping its KV-cache) and the order alternates between rounds;
+otherwise the second layout would start with the first one's prefix cached.
+Requires a reachable AI server.
+"""
+import sys
+
+import requests
+
+from app.services import ai_service
+from app.services.ai_service import get_ai_response, get_last_call_metrics, model_for_task
+
+DEFAULT_TURNS = 6
+DEFAULT_ROUNDS = 2
+
+JOB = {
+    "title": "Backend Developer",
+    "company": "Acme",
+    "description": "Build and operate Python services on PostgreSQL and Kubernetes.",
+    "required_skills": ["Python", "Django", "PostgreSQL", "Docker", "Kubernetes"]
+}
+
+ANSWERS = [
+    "I've spent four years building Django REST APIs backed by PostgreSQL.",
+    "We used select_related and prefetch_related to remove N+1 queries, which cut p95 latency in half.",
+    "Yes, I know that.",
+    "We deployed with Helm on EKS and used readiness probes so rollouts never dropped traffic.",
+    "I would add a partial index on the status column and batch the backfill in chunks of 10k rows.",
+    "I don't know, I haven't used that."
+]
+
+STATIC_PROMPT = f"""
+You are an interviewer named PrepJobAI working at {JOB['company']}, interviewing a candidate for a {JOB['title']} position.
+
+Job Description: {JOB['description']}
+
+Required Skills: {', '.join(JOB['required_skills'])}
+
+Ask one technical question at a time, push for concrete examples when answers are vague,
+never repeat a question, and always respond in English.
+"""
+
+def turn_state(questions):
+    return f"""
+CURRENT INTERVIEW STATE:
+- You have asked {len(questions)} technical questions so far
+Previous questions asked (DO NOT repeat these):
+{questions}
+"""
+
+def unload_model():
+    """Unload the model so the next run starts without a cached prompt prefix"""
+    model = model_for_task(None)
+    response = requests.post(f"{ai_service.CURRENT_SERVER}/api/generate",
+                             json={"model": model, "keep_alive": 0}, timeout=60)
+    response.raise_for_status()
+
+def run(layout: str, turns: int):
+    unload_model()
+    history = []
+    questions = []
+    results = []
+    for turn in range(turns):
+        answer = ANSWERS[turn % len(ANSWERS)]
+        state = turn_state(questions)
+        if layout == "before":
+            reply = get_ai_response(answer, STATIC_PROMPT + state, context=list(history))
+        else:
+            reply = get_ai_response(answer, STATIC_PROMPT, context=history + [{"role": "system", "content": state}])
+        results.append(get_last_call_metrics())
+        history += [{"role": "user", "content": answer}, {"role": "assistant", "content": reply}]
+        if "?" in reply:
+            questions.append(reply)
+    return results
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TURNS
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_ROUNDS
+    measured = {"before": [], "after": []}
+    for round_number in range(rounds):
+        order = ("before", "after") if round_number % 2 == 0 else ("after", "before")
+        for layout in order:
+            results = run(layout, turns)
+            print(f"round {round_number + 1}, {layout}:")
+            for turn, metrics in enumerate(results, 1):
+                print(f"  turn {turn}: prompt_eval {metrics.get('prompt_eval_count')} tokens, "
+                      f"{metrics.get('prompt_eval_ms')} ms (total {metrics.get('total_ms')} ms)")
+            # The first turn is cold in both layouts; the difference shows from turn 2 on
+            measured[layout] += [m['prompt_eval_ms'] for m in results[1:] if m.get('prompt_eval_ms') is not None]
+
+    for layout, values in measured.items():
+        if values:
+            print(f"{layout}: mean prompt_eval {sum(values) / len(values):.1f} ms over {len(values)} turns (turn 2 on)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark storage codecs on the jobs.json fixture scaled up to a large catalog.
+
+Usage:
+    python benchmark_storage.py [num_jobs]
+
+Reports save time, load time and bytes on disk for every available codec.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.services.storage_codecs import CODECS, codec_info, decode_payload
+
+FIXTURE_PATH = "jobs.json"
+DEFAULT_NUM_JOBS = 100_000
+REPEATS = 3
+
+def build_catalog(num_jobs: int):
+    """Replicate the fixture jobs until the catalog has num_jobs entries"""
+    with open(FIXTURE_PATH, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+
+    jobs = []
+    for i in range(num_jobs):
+        job = dict(fixture[i % len(fixture)])
+        job["id"] = f"job_{i}"
+        job["created_at"] = time.time()
+        jobs.append(job)
+    return jobs
+
+def benchmark_codec(codec, jobs, directory: str):
+    """Time a full save and load cycle for one codec"""
+    file_path = os.path.join(directory, f"jobs.{codec.name}")
+
+    save_times = []
+    load_times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        with open(file_path, 'wb') as f:
+            f.write(codec.encode(jobs))
+        save_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with open(file_path, 'rb') as f:
+            loaded = decode_payload(f.read())
+        load_times.append(time.perf_counter() - start)
+
+        assert len(loaded) == len(jobs)
+
+    return {
+        "codec": codec.name,
+        "save_ms": round(min(save_times) * 1000, 1),
+        "load_ms": round(min(load_times) * 1000, 1),
+        "bytes": os.path.getsize(file_path)
+    }
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_JOBS
+    jobs = build_catalog(num_jobs)
+    print(f"Catalog: {num_jobs} jobs, backends: {codec_info()}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in CODECS.values():
+            try:
+                result = benchmark_codec(codec, jobs, directory)
+            except RuntimeError as e:
+                print(f"{codec.name:>10}: skipped ({e})")
+                continue
+            print(f"{result['codec']:>10}: save {result['save_ms']:>8} ms, "
+                  f"load {result['load_ms']:>8} ms, {result['bytes']:>12,} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark the turn classifier against the previous inline conversation logic.
+
+Usage:
+    python benchmark_turn_classifier.py [num_messages ...]
+
+For each transcript length, reports the time to scan the whole transcript
+once with the old inline loop and with session_from_messages (which uses
+the turn classifier), and the total cost over an interview when every turn
+rescans the full history versus recording only the new message.
+"""
+import random
+import re
+import sys
+import time
+
+from app.services.interview_session_service import new_session, record_ai_message, record_user_message, session_from_messages
+
+DEFAULT_LENGTHS = [50, 200, 1000]
+REPEATS = 5
+
+REQUIRED_SKILLS = ["Python", "Django", "PostgreSQL", "Docker", "Kubernetes", "React", "TypeScript", "AWS"]
+
+AI_MESSAGES = [
+    "Thanks for that. Can you walk me through how you structured your last Django project?",
+    "Interesting! How would you design a database schema for a multi-tenant application?",
+    "What made you interested in this role?",
+    "Great, let's move on.",
+    "How do you approach deploying containers to Kubernetes in production?",
+    "Could you give me a concrete example of a React performance problem you solved?"
+]
+
+USER_MESSAGES = [
+    "Yes, I know that.",
+    "Sure",
+    "I built a REST API with Django and PostgreSQL, using select_related to cut query counts by half.",
+    "I have experience with that.",
+    "I don't know, to be honest.",
+    "We ran blue-green deploys on EKS with Helm charts and rolled back automatically on failed health checks.",
+    "I like working with people and learning new things every day at work."
+]
+
+LEGACY_VAGUE_PATTERNS = [
+    r"(?i)yes i know",
+    r"(?i)^yes$",
+    r"(?i)i know that",
+    r"(?i)i am familiar with",
+    r"(?i)i have experience",
+    r"(?i)i understand",
+    r"(?i)sounds good",
+    r"(?i)of course",
+    r"(?i)definitely",
+    r"(?i)certainly",
+    r"(?i)absolutely",
+    r"(?i)^sure$",
+    r"(?i)^okay$",
+    r"(?i)^ok$",
+    r"(?i)^i do$"
+]
+
+def legacy_scan(messages, required_skills):
+    """The per-request loop handle_conversation ran before sessions and the classifier"""
+    technical_questions_asked = 0
+    previous_questions = []
+    vague_answer_count = 0
+    vague_answers = []
+    for i, msg in enumerate(messages):
+        if not msg.get('isUser', True):
+            message_text = msg.get('message', '')
+            if "?" in message_text:
+                is_technical = False
+                for skill in required_skills:
+                    if skill.lower() in message_text.lower():
+                        is_technical = True
+                        break
+                tech_keywords = ['code', 'programming', 'software', 'database', 'api',
+                                 'algorithm', 'function', 'class', 'object', 'method',
+                                 'framework', 'library', 'deploy', 'architecture']
+                for keyword in tech_keywords:
+                    if keyword.lower() in message_text.lower():
+                        is_technical = True
+                        break
+                if is_technical:
+                    technical_questions_asked += 1
+                    previous_questions.append(message_text)
+        else:
+            user_message = msg.get('message', '')
+            if i > 0 and not messages[i-1].get('isUser', True) and "?" in messages[i-1].get('message', ''):
+                is_vague = False
+                for pattern in LEGACY_VAGUE_PATTERNS:
+                    if re.search(pattern, user_message):
+                        is_vague = True
+                        break
+                if len(user_message.strip()) < 20:
+                    is_vague = True
+                contains_technical_detail = False
+                for skill in required_skills:
+                    if skill.lower() in user_message.lower():
+                        contains_technical_detail = True
+                        break
+                for keyword in tech_keywords:
+                    if keyword.lower() in user_message.lower():
+                        contains_technical_detail = True
+                        break
+                if is_technical and not contains_technical_detail and len(user_message.strip()) < 50:
+                    is_vague = True
+                if is_vague:
+                    vague_answer_count += 1
+                    vague_answers.append(user_message)
+    return technical_questions_asked, previous_questions, vague_answer_count, vague_answers
+
+def build_transcript(num_messages: int):
+    """Alternate interviewer and candidate messages drawn from the samples"""
+    rng = random.Random(num_messages)
+    return [
+        {"id": str(i), "isUser": i % 2 == 1, "message": rng.choice(USER_MESSAGES if i % 2 else AI_MESSAGES)}
+        for i in range(num_messages)
+    ]
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    lengths = [int(n) for n in sys.argv[1:]] or DEFAULT_LENGTHS
+    job = {"required_skills": REQUIRED_SKILLS}
+
+    for num_messages in lengths:
+        messages = build_transcript(num_messages)
+
+        session = session_from_messages(job, messages)
+        expected = (session["technical_questions_asked"], session["previous_questions"],
+                    session["vague_answer_count"], session["vague_answers"])
+        assert legacy_scan(messages, REQUIRED_SKILLS) == expected, "classifier disagrees with the legacy loop"
+
+        legacy_once = best_of(lambda: legacy_scan(messages, REQUIRED_SKILLS))
+        classifier_once = best_of(lambda: session_from_messages(job, messages))
+
+        # Whole interview: old handler rescanned the full history on every turn
+        legacy_interview = best_of(lambda: [legacy_scan(messages[:n], REQUIRED_SKILLS) for n in range(1, num_messages + 1)])
+
+        def incremental():
+            s = new_session(job)
+            for msg in messages:
+                (record_user_message if msg["isUser"] else record_ai_message)(s, msg["message"], msg["id"])
+        incremental_interview = best_of(incremental)
+
+        print(f"{num_messages:>6} messages: single scan legacy {legacy_once * 1000:8.2f} ms, "
+              f"classifier {classifier_once * 1000:8.2f} ms ({legacy_once / classifier_once:4.1f}x) | "
+              f"interview rescans {legacy_interview * 1000:9.1f} ms, "
+              f"incremental {incremental_interview * 1000:7.2f} ms ({legacy_interview / incremental_interview:6.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import copy
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from app.services import ai_service
+
+SERVER_A = "http://gpu-a:11434"
+SERVER_B = "http://gpu-b:11434"
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, result, status_code=200):
+        self._result = result
+        self.status_code = status_code
+        self.text = str(result)
+
+    def json(self):
+        return self._result
+
+class FakeOllama:
+    """Records chat requests; answers from a list of responses (or exceptions), then with a default reply"""
+
+    def __init__(self, responses=()):
+        self.requests = []
+        self.responses = list(responses)
+
+    def post(self, url, json=None, timeout=None):
+        # Retries reuse and update the same payload
+        self.requests.append((url, copy.deepcopy(json)))
+        if self.responses:
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return FakeResponse({
+            "model": json["model"],
+            "message": {"content": "<think>hm</think>Tell me about your last project."},
+            "prompt_eval_count": 120, "prompt_eval_duration": 35_000_000,
+            "eval_count": 9, "eval_duration": 90_000_000,
+            "load_duration": 2_500_000, "total_duration": 130_000_000
+        })
+
+@pytest.fixture
+def ollama(monkeypatch):
+    fake = FakeOllama()
+    monkeypatch.setattr(ai_service.requests, "post", fake.post)
+    monkeypatch.setattr(ai_service, "CURRENT_SERVER", SERVER_A)
+    monkeypatch.setattr(ai_service, "ai_server_status", {
+        "last_checked": 1.0, "is_online": True, "current_server": SERVER_A,
+        "available_models": [ai_service.AI_MODEL]
+    })
+    monkeypatch.setattr(ai_service, "check_ai_server_health", lambda force_check=False: ai_service.ai_server_status)
+    monkeypatch.setattr(ai_service, "_keep_alive_provider", None)
+    monkeypatch.setattr(ai_service, "_server_selector", None)
+    return fake
+
+def test_calls_send_keep_alive_and_num_ctx(ollama, monkeypatch):
+    monkeypatch.setattr(ai_service, "OLLAMA_NUM_CTX", None)
+    ai_service.get_ai_response("hi", system_prompt="You interview.")
+    payload = ollama.requests[-1][1]
+    assert payload["keep_alive"] == ai_service.OLLAMA_KEEP_ALIVE
+    # The server's default context size unless one is configured
+    assert "num_ctx" not in payload["options"]
+
+    ai_service.get_ai_response("hi", system_prompt="You interview.", keep_alive="5m", num_ctx=8192)
+    payload = ollama.requests[-1][1]
+    assert payload["keep_alive"] == "5m"
+    assert payload["options"]["num_ctx"] == 8192
+
+    # Calls without their own keep_alive use the provider's value for the model
+    monkeypatch.setattr(ai_service, "_keep_alive_provider", lambda model: "900s")
+    ai_service.get_ai_response("hi")
+    assert ollama.requests[-1][1]["keep_alive"] == "900s"
+
+def test_turns_share_the_prompt_prefix(ollama):
+    system_prompt = "You are an interviewer for a Python Developer position."
+    history = [{"role": "assistant", "content": "Hello! What do you know about the GIL?"}]
+
+    ai_service.get_ai_response("It is a lock.", system_prompt=system_prompt,
+                               context=history + [{"role": "system", "content": "1 question asked"}])
+    history += [{"role": "user", "content": "It is a lock."},
+                {"role": "assistant", "content": "Why does CPython need it?"}]
+    ai_service.get_ai_response("Reference counting.", system_prompt=system_prompt,
+                               context=history + [{"role": "system", "content": "2 questions asked"}])
+
+    first, second = (payload["messages"] for _, payload in ollama.requests)
+    # Everything up to the previous turn's state is byte-identical
+    assert second[:2] == first[:2]
+    assert second[-1] == {"role": "user", "content": "Reference counting."}
+
+def test_last_call_metrics_are_reported_in_ms(ollama):
+    assert ai_service.get_ai_response("hi") == "Tell me about your last project."
+    metrics = ai_service.get_last_call_metrics()
+    assert metrics["prompt_eval_count"] == 120
+    assert metrics["prompt_eval_ms"] == 35.0
+    assert metrics["load_ms"] == 2.5
+    assert metrics["total_ms"] == 130.0
+
+def test_failed_call_clears_the_metrics(ollama):
+    ai_service.get_ai_response("hi")
+    ollama.responses = [FakeResponse({}, status_code=500)] * 3
+    ai_service.get_ai_response("hi")
+    assert ai_service.get_last_call_metrics() == {}
+
+@pytest.fixture
+def tiers(monkeypatch):
+    monkeypatch.setattr(ai_service, "MODEL_TIERS", {"small": ["tiny:1b", "small:4b"], "large": ["big:14b"]})
+    monkeypatch.setattr(ai_service, "TASK_ROUTES", {"flashcards": "small", "interview": "large", "pinned": "custom:7b"})
+    monkeypatch.setattr(ai_service, "AI_MODEL", "default:8b")
+
+def test_route_candidates(tiers):
+    assert ai_service.route_candidates("flashcards") == ["tiny:1b", "small:4b", "big:14b", "default:8b"]
+    assert ai_service.route_candidates("interview") == ["big:14b", "default:8b"]
+    assert ai_service.route_candidates("pinned") == ["custom:7b", "big:14b", "default:8b"]
+    assert ai_service.route_candidates(None) == ai_service.route_candidates("interview")
+
+def test_resolve_model_takes_the_first_installed_candidate(tiers):
+    assert ai_service.resolve_model("flashcards", ["small:4b", "tiny:1b"]) == "tiny:1b"
+    assert ai_service.resolve_model("flashcards", ["big:14b"]) == "big:14b"
+    # "model" matches "model:latest"
+    ai_service.MODEL_TIERS["small"] = ["tiny"]
+    assert ai_service.resolve_model("flashcards", ["tiny:latest"]) == "tiny"
+    assert ai_service.resolve_model("flashcards", ["other:1b"]) == "default:8b"
+    assert ai_service.resolve_model("flashcards", []) == "default:8b"
+
+def _switch_to(server, available_models):
+    def check(force_check=False):
+        if force_check:
+            ai_service.CURRENT_SERVER = server
+            ai_service.ai_server_status.update(current_server=server, available_models=available_models)
+        return ai_service.ai_server_status
+    return check
+
+def test_retries_resolve_the_model_for_the_new_server(ollama, tiers, monkeypatch):
+    ai_service.ai_server_status["available_models"] = ["tiny:1b", "big:14b"]
+    monkeypatch.setattr(ai_service, "check_ai_server_health", _switch_to(SERVER_B, ["big:14b"]))
+    ollama.responses = [FakeResponse({}, status_code=503)]
+
+    assert ai_service.get_ai_response("hi", call_site="flashcards") == "Tell me about your last project."
+
+    assert [(url, payload["model"]) for url, payload in ollama.requests] == [
+        (f"{SERVER_A}/api/chat", "tiny:1b"),
+        (f"{SERVER_B}/api/chat", "big:14b"),
+    ]
+    # Metrics count the call for the model that answered
+    metrics = ai_service.get_model_routing()["metrics"]["flashcards"]
+    assert metrics["big:14b"]["calls"] >= 1
+
+def test_explicit_model_is_kept_on_retries(ollama, tiers, monkeypatch):
+    monkeypatch.setattr(ai_service, "check_ai_server_health", _switch_to(SERVER_B, ["big:14b"]))
+    ollama.responses = [requests.exceptions.Timeout()]
+
+    ai_service.get_ai_response("hi", call_site="flashcards", model="custom:7b")
+    assert [payload["model"] for _, payload in ollama.requests] == ["custom:7b", "custom:7b"]
+
+def test_server_selector_picks_only_the_first_attempt(ollama, tiers, monkeypatch):
+    ai_service.ai_server_status["available_models"] = ["big:14b"]
+    monkeypatch.setattr(ai_service, "check_ai_server_health", _switch_to(SERVER_A, ["big:14b"]))
+    monkeypatch.setattr(ai_service, "_server_selector", lambda model, default: SERVER_B)
+    ollama.responses = [FakeResponse({}, status_code=500)]
+
+    ai_service.get_ai_response("hi", call_site="interview")
+    assert [url for url, _ in ollama.requests] == [f"{SERVER_B}/api/chat", f"{SERVER_A}/api/chat"]
@@ -0,0 +1,108 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from app.services import conversation_context
+from app.services.conversation_context import build_context, build_transcript, schedule_summary_update
+
+def _session(count, summary="", summary_upto=0):
+    messages = [{"id": str(i), "isUser": i % 2 == 1, "message": f"message {i} " + "word " * 8} for i in range(count)]
+    return {"id": "session_1", "status": "active", "messages": messages, "summary": summary, "summary_upto": summary_upto}
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word keeps the budgets easy to reason about
+    monkeypatch.setattr(conversation_context, "count_tokens", lambda text: len(text.split()) if text else 0)
+
+def test_context_replaces_folded_messages_with_the_summary(monkeypatch):
+    monkeypatch.setattr(conversation_context, "CONVERSATION_TOKEN_BUDGET", 1000)
+    session = _session(12, summary="Asked about Django.", summary_upto=6)
+
+    context = build_context(session, "system", "latest reply")
+
+    assert context[0] == {"role": "system", "content": "Summary of the interview so far: Asked about Django."}
+    # Everything after the summary except the latest message, which is the prompt
+    assert [c["content"].split()[1] for c in context[1:]] == [str(i) for i in range(6, 11)]
+    assert [c["role"] for c in context[1:3]] == ["assistant", "user"]
+
+def test_context_drops_the_oldest_messages_over_budget(monkeypatch):
+    # Ten words per message: room for three after the prompts
+    monkeypatch.setattr(conversation_context, "CONVERSATION_TOKEN_BUDGET", 33)
+    context = build_context(_session(12), "system", "latest reply")
+    assert [c["content"].split()[1] for c in context] == ["8", "9", "10"]
+
+    # The last question and answer are kept even when they alone are over budget
+    monkeypatch.setattr(conversation_context, "CONVERSATION_TOKEN_BUDGET", 1)
+    assert len(build_context(_session(12), "system", "latest reply")) == conversation_context.MIN_CONTEXT_MESSAGES
+
+def test_transcript_is_full_when_it_fits():
+    session = _session(4)
+    assert build_transcript(session, token_budget=1000) == conversation_context.format_transcript(session["messages"])
+    assert build_transcript(session).startswith("Interviewer: message 0")
+
+def test_transcript_uses_the_summary_when_over_budget():
+    session = _session(20, summary="Covered caching.", summary_upto=10)
+
+    transcript = build_transcript(session, token_budget=40)
+
+    lines = transcript.split("\n")
+    assert lines[0] == "Summary of the earlier interview: Covered caching."
+    assert lines[1].endswith("earlier messages omitted]")
+    assert lines[-1].startswith("Candidate: message 19")
+    assert len(transcript.split()) <= 40
+
+class FakeStorage:
+    def __init__(self, session):
+        self.sessions = {session["id"]: dict(session)}
+
+    def get_interview(self, session_id):
+        return dict(self.sessions[session_id]) if session_id in self.sessions else None
+
+    def update_interview(self, session_id, session):
+        self.sessions[session_id] = session
+        return True
+
+def _wait_idle():
+    deadline = time.time() + 5
+    while conversation_context._in_flight and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_summary_update_folds_messages_leaving_the_verbatim_window(monkeypatch):
+    monkeypatch.setattr(conversation_context, "CONVERSATION_VERBATIM_MESSAGES", 6)
+    monkeypatch.setattr(conversation_context, "CONVERSATION_SUMMARY_BATCH", 4)
+    folded = []
+
+    def summarize(previous_summary, messages):
+        folded.append([msg["id"] for msg in messages])
+        return "summary"
+    monkeypatch.setattr(conversation_context, "summarize_messages", summarize)
+
+    # Not enough messages have left the window yet
+    assert not schedule_summary_update(FakeStorage(_session(9)), _session(9))
+
+    session = _session(10)
+    storage = FakeStorage(session)
+    assert schedule_summary_update(storage, session)
+    _wait_idle()
+
+    assert folded == [["0", "1", "2", "3"]]
+    assert storage.sessions["session_1"]["summary"] == "summary"
+    assert storage.sessions["session_1"]["summary_upto"] == 4
+
+def test_summary_update_is_dropped_when_the_session_moved_on(monkeypatch):
+    monkeypatch.setattr(conversation_context, "CONVERSATION_VERBATIM_MESSAGES", 6)
+    monkeypatch.setattr(conversation_context, "CONVERSATION_SUMMARY_BATCH", 4)
+    session = _session(10)
+    storage = FakeStorage(session)
+
+    def summarize(previous_summary, messages):
+        # Another update landed first
+        storage.sessions["session_1"]["summary_upto"] = 2
+        return "stale summary"
+    monkeypatch.setattr(conversation_context, "summarize_messages", summarize)
+
+    assert schedule_summary_update(storage, session)
+    _wait_idle()
+    assert storage.sessions["session_1"]["summary"] == ""
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+from app.services.local_storage import LocalCVStorage
+
+HASH_A = "a" * 64
+HASH_B = "b" * 64
+
+def _artifact(text, fingerprint="fp1"):
+    return {"text": text, "page_count": 1, "pages_extracted": 1, "truncated": False, "ocr": None,
+            "analysis": {"user_summary": "s"}, "analysis_fingerprint": fingerprint}
+
+def test_artifacts_are_stored_one_file_per_content_hash(tmp_path):
+    storage = LocalCVStorage(str(tmp_path))
+    assert storage.get_cv_artifact(HASH_A) is None
+
+    storage.save_cv_artifact(HASH_A, _artifact("first"))
+    storage.save_cv_artifact(HASH_B, _artifact("second"))
+
+    assert sorted(os.listdir(storage.artifacts_dir)) == [f"{HASH_A}.json", f"{HASH_B}.json"]
+    artifact = storage.get_cv_artifact(HASH_A)
+    assert artifact["text"] == "first"
+    assert artifact["content_hash"] == HASH_A
+    assert "updated_at" in artifact
+
+def test_saving_again_replaces_the_artifact(tmp_path):
+    storage = LocalCVStorage(str(tmp_path))
+    storage.save_cv_artifact(HASH_A, _artifact("text", fingerprint="old"))
+    storage.save_cv_artifact(HASH_A, _artifact("text", fingerprint="new"))
+
+    assert storage.get_cv_artifact(HASH_A)["analysis_fingerprint"] == "new"
+    assert os.listdir(storage.artifacts_dir) == [f"{HASH_A}.json"]
+
+def test_legacy_artifacts_file_is_split(tmp_path):
+    legacy = {HASH_A: _artifact("first"), HASH_B: _artifact("second")}
+    (tmp_path / "artifacts.json").write_text(json.dumps(legacy))
+
+    storage = LocalCVStorage(str(tmp_path))
+
+    assert not (tmp_path / "artifacts.json").exists()
+    assert storage.get_cv_artifact(HASH_B)["text"] == "second"
+
+def test_analysis_fingerprint_follows_the_prompt_settings(monkeypatch):
+    pytest.importorskip("requests")
+    from app.services import cv_service
+
+    fingerprint = cv_service.cv_analysis_fingerprint()
+    assert cv_service.cv_analysis_fingerprint() == fingerprint
+
+    monkeypatch.setattr(cv_service, "CV_ANALYSIS_MAX_TOKENS", cv_service.CV_ANALYSIS_MAX_TOKENS + 1)
+    assert cv_service.cv_analysis_fingerprint() != fingerprint
+    monkeypatch.undo()
+
+    monkeypatch.setattr(cv_service, "model_for_task", lambda task: "another-model")
+    assert cv_service.cv_analysis_fingerprint() != fingerprint
@@ -0,0 +1,195 @@
+"""
+Firebase job storage tests, run against the Firestore emulator
+
+Start the emulator and point the client at it to run them:
+
+    firebase emulators:start --only firestore --project demo-jobprepai
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m pytest tests/test_firebase_storage.py
+"""
+import os
+import threading
+import time
+import uuid
+
+import pytest
+
+if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+    pytest.skip("FIRESTORE_EMULATOR_HOST is not set", allow_module_level=True)
+
+pytest.importorskip("firebase_admin")
+
+from app.services import firebase_storage
+from app.services.firebase_storage import FirebaseJobStorage, build_search_fields, SKILLS_FIELD, TOKENS_FIELD
+
+@pytest.fixture
+def storage():
+    """Job storage on a fresh collection, without the replica"""
+    storage = FirebaseJobStorage(use_replica=False, backfill=False)
+    storage.collection = firebase_storage.db.collection(f"jobs_test_{uuid.uuid4().hex[:8]}")
+    yield storage
+    for doc in storage.collection.stream():
+        doc.reference.delete()
+
+def _job(job_id, title, skills, description=""):
+    return {"id": job_id, "title": title, "required_skills": skills, "description": description}
+
+def test_job_storage_is_firebase_when_enabled(monkeypatch):
+    import importlib
+    import app
+    monkeypatch.setenv("FIREBASE_ENABLED", "true")
+    try:
+        reloaded = importlib.reload(app)
+        assert reloaded.JobStorage is FirebaseJobStorage
+        # Only jobs have a Firebase backend
+        assert reloaded.InterviewStorage.__name__ == "LocalInterviewStorage"
+        assert reloaded.CVStorage.__name__ == "LocalCVStorage"
+    finally:
+        monkeypatch.setenv("FIREBASE_ENABLED", "false")
+        importlib.reload(app)
+
+def test_save_job_writes_search_fields(storage):
+    storage.save_job(_job("job_1", "Python Developer", ["Python", "Django"]))
+
+    data = storage.collection.document("job_1").get().to_dict()
+    assert data[SKILLS_FIELD] == ["django", "python"]
+    assert "pyth" in data[TOKENS_FIELD]
+    # Index fields are not returned to callers
+    assert SKILLS_FIELD not in storage.get_job("job_1")
+
+def test_list_jobs_page_filters_and_pages(storage):
+    for i in range(5):
+        storage.save_job(_job(f"job_{i}", "Python Developer", ["Python"]))
+    storage.save_job(_job("job_9", "Java Developer", ["Java"]))
+
+    first = storage.list_jobs_page(keyword="python", limit=3)
+    assert [job["id"] for job in first["jobs"]] == ["job_0", "job_1", "job_2"]
+    assert first["next_cursor"] == "job_2"
+
+    second = storage.list_jobs_page(keyword="python", limit=3, start_after=first["next_cursor"])
+    assert [job["id"] for job in second["jobs"]] == ["job_3", "job_4"]
+
+    by_skill = storage.list_jobs_page(skills=["Java"], limit=None)
+    assert [job["id"] for job in by_skill["jobs"]] == ["job_9"]
+
+def test_backfill_search_fields(storage):
+    # A document written before the index fields existed
+    storage.collection.document("old").set(_job("old", "Go Engineer", ["Go"]))
+
+    assert storage.backfill_search_fields() == 1
+    data = storage.collection.document("old").get().to_dict()
+    assert data[SKILLS_FIELD] == build_search_fields(data)[SKILLS_FIELD]
+    # Already indexed documents are left alone
+    assert storage.backfill_search_fields() == 0
+
+def test_old_documents_match_until_and_after_the_startup_backfill(storage):
+    storage.collection.document("old").set(_job("old", "Go Engineer", ["Go"]))
+    storage.search_fields_ready = False
+
+    # Filtered here while the index fields are missing
+    assert [job["id"] for job in storage.list_jobs(keyword="go")] == ["old"]
+    assert [job["id"] for job in storage.list_jobs(skills=["go"])] == ["old"]
+
+    assert storage.ensure_search_fields()
+    assert TOKENS_FIELD in storage.collection.document("old").get().to_dict()
+    assert [job["id"] for job in storage.list_jobs(keyword="go")] == ["old"]
+
+    # The marker makes later startups skip the scan
+    marker = firebase_storage.db.collection(firebase_storage.META_COLLECTION).document(f"{storage.collection.id}_search_fields")
+    assert marker.get().to_dict()["version"] == firebase_storage.SEARCH_FIELDS_VERSION
+    storage.collection.document("older").set(_job("older", "Go Engineer", ["Go"]))
+    assert storage.ensure_search_fields()
+    assert TOKENS_FIELD not in storage.collection.document("older").get().to_dict()
+    marker.delete()
+
+def test_replica_indexes_old_documents(storage):
+    storage.collection.document("old").set(_job("old", "Go Engineer", ["Go"]))
+    replica = firebase_storage.JobsReplica(storage.collection, max_lag=2)
+    assert replica.start(timeout=10)
+    try:
+        storage.replica = replica
+        assert [job["id"] for job in storage.list_jobs(keyword="go")] == ["old"]
+        assert storage.last_read_count == 0
+    finally:
+        replica.stop()
+
+def _wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+@pytest.fixture
+def replica_storage(storage):
+    storage.replica = firebase_storage.JobsReplica(storage.collection, max_lag=2)
+    assert storage.replica.start(timeout=10)
+    yield storage
+    storage.replica.stop()
+
+def test_replica_serves_sorted_pages(replica_storage):
+    for job_id in ("job_3", "job_1", "job_2"):
+        replica_storage.save_job(_job(job_id, "Python Developer", ["Python"]))
+    replica = replica_storage.replica
+
+    assert _wait_for(lambda: len(replica.values()) == 3)
+    assert [d["id"] for d in replica.values()] == ["job_1", "job_2", "job_3"]
+    assert [d["id"] for d in replica.values("job_1")] == ["job_2", "job_3"]
+
+    page = replica_storage.list_jobs_page(keyword="python", limit=2)
+    assert replica_storage.last_read_count == 0
+    assert [job["id"] for job in page["jobs"]] == ["job_1", "job_2"]
+    # The heartbeat lives in its own collection, never among the jobs
+    assert sorted(doc.id for doc in replica_storage.collection.stream()) == ["job_1", "job_2", "job_3"]
+    assert replica._heartbeat_ref.parent.id == firebase_storage.JOB_REPLICA_HEARTBEAT_COLLECTION
+
+def test_replica_heartbeat_keeps_idle_listener_fresh(replica_storage):
+    replica = replica_storage.replica
+    assert _wait_for(lambda: replica.last_heartbeat_at is not None)
+    first = replica.last_heartbeat_at
+    time.sleep(replica.max_lag * 1.5)
+    assert replica.last_heartbeat_at > first
+    assert replica.is_fresh()
+
+def _stop_heartbeat(replica):
+    replica._heartbeat_stop.set()
+    replica._heartbeat_thread.join()
+    replica._heartbeat_thread = None
+
+def test_stalled_replica_is_not_fresh(replica_storage):
+    replica = replica_storage.replica
+    replica_storage.save_job(_job("job_1", "Python Developer", ["Python"]))
+    assert _wait_for(lambda: replica.get("job_1") is not None)
+    assert _wait_for(replica.is_fresh)
+
+    # Without the heartbeat nothing arrives; backdate past max_lag instead of waiting
+    _stop_heartbeat(replica)
+    replica.last_heartbeat_at -= replica.max_lag + 1
+    replica._last_start_attempt -= replica.max_lag + 1
+    watch = replica._watch
+    assert not replica.is_fresh()
+    # Request threads never restart the listener
+    assert replica._watch is watch
+    assert replica.get("job_1") is not None
+
+    replica.fallback_reads = 0
+    replica_storage.list_jobs_page(keyword="python")
+    assert replica.fallback_reads == 1
+
+def test_heartbeat_thread_restarts_a_stalled_listener(replica_storage, monkeypatch):
+    replica = replica_storage.replica
+    replica_storage.save_job(_job("job_1", "Python Developer", ["Python"]))
+    assert _wait_for(lambda: replica.get("job_1") is not None)
+
+    _stop_heartbeat(replica)
+    monkeypatch.setattr(firebase_storage, "JOB_REPLICA_RESTART_INTERVAL", 0)
+    replica.last_heartbeat_at = replica._last_start_attempt = time.time() - replica.max_lag - 1
+    watch = replica._watch
+
+    replica._heartbeat_stop.clear()
+    replica._heartbeat_thread = threading.Thread(target=replica._heartbeat, daemon=True)
+    replica._heartbeat_thread.start()
+
+    assert _wait_for(lambda: replica._watch is not watch)
+    assert _wait_for(replica.is_fresh)
+    assert replica.get("job_1") is not None
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from app.services import flashcard_service
+from app.services.flashcard_service import FlashcardService, flashcard_cache_key
+from app.services.local_storage import LocalFlashcardStorage
+
+RESULT = {"summary": "Solid Python basics", "improvements": ["Testing"], "passed": True, "rating": 72, "userId": "alice"}
+
+CARD_SET = {"id": "set-1", "title": "Python", "description": "Review", "cards": [{"id": 1, "front": "GIL?", "back": "A lock"}]}
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+
+    def generate(interview_result):
+        calls.append(interview_result)
+        return dict(CARD_SET)
+
+    monkeypatch.setattr(flashcard_service, "generate_flashcards_from_interview_result", generate)
+    return calls
+
+@pytest.fixture
+def service(tmp_path):
+    return FlashcardService(LocalFlashcardStorage(str(tmp_path / "flashcards")))
+
+def test_cache_key_ignores_the_user():
+    assert flashcard_cache_key(RESULT) == flashcard_cache_key({**RESULT, "userId": "bob"})
+    assert flashcard_cache_key(RESULT) != flashcard_cache_key({**RESULT, "rating": 73})
+
+def test_cached_sets_are_issued_per_request(service, generated):
+    first = service.get_flashcards(RESULT)
+    second = service.get_flashcards({**RESULT, "userId": "bob"})
+
+    assert len(generated) == 1
+    assert first["cards"] == second["cards"] == CARD_SET["cards"]
+    assert first["id"] != second["id"]
+    assert second["created_at"] >= first["created_at"]
+
+    # Callers cannot change what the next user gets
+    second["cards"].clear()
+    assert service.get_flashcards(RESULT)["cards"] == CARD_SET["cards"]
+    assert service.get_metrics()["cache_hits"] == 2
+
+def test_concurrent_requests_share_one_generation(service, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow_generate(interview_result):
+        calls.append(interview_result)
+        release.wait(5)
+        return dict(CARD_SET)
+
+    monkeypatch.setattr(flashcard_service, "generate_flashcards_from_interview_result", slow_generate)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get_flashcards(RESULT))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert _wait_for(lambda: service.get_metrics()["joined_prefetch"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({r["id"] for r in results}) == 3
+
+def test_incomplete_sets_are_not_cached(service, monkeypatch):
+    monkeypatch.setattr(flashcard_service, "generate_flashcards_from_interview_result",
+                        lambda interview_result: {"error": "no cards"})
+    assert service.get_flashcards(RESULT) == {"error": "no cards"}
+    assert service.storage.get_flashcard_set(flashcard_cache_key(RESULT)) is None
+    assert service.get_metrics()["failures"] == 1
+
+def test_prefetch_fills_the_cache(service, generated):
+    assert service.prefetch(RESULT)
+    assert _wait_for(lambda: not service.get_metrics()["in_flight"])
+
+    assert not service.prefetch(RESULT)
+    service.get_flashcards(RESULT)
+    assert len(generated) == 1
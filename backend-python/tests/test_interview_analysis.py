@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+from app.services import interview_analysis_service as analysis_service
+from app.services.interview_analysis_service import analyze_interviews, interview_answers
+from app.services.local_storage import LocalInterviewStorage
+
+JOB = {"title": "Python Developer", "description": "APIs", "required_skills": ["Python"]}
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = LocalInterviewStorage(data_file=str(tmp_path / "interviews.json"))
+    for i in range(5):
+        storage.save_interview({"id": f"interview_{i}", "job": JOB, "messages": [
+            {"isUser": False, "message": "Hi! What is a decorator?"},
+            {"isUser": True, "message": f"A function wrapping another ({i})"},
+        ]})
+    return storage
+
+def test_answers_are_paired_with_the_question_they_answer():
+    questions, responses = interview_answers({"messages": [
+        {"isUser": True, "message": "Hello"},
+        {"isUser": False, "message": "Q1?"},
+        {"isUser": True, "message": "A1"},
+        {"isUser": True, "message": "A1 continued"},
+        {"isUser": False, "message": "Q2?"},
+    ]})
+    assert questions == ["", "Q1?", "Q1?"]
+    assert responses == ["Hello", "A1", "A1 continued"]
+
+def test_batch_results_are_streamed_and_saved(storage, monkeypatch):
+    monkeypatch.setattr(analysis_service, "INTERVIEW_ANALYSIS_WRITE_BATCH", 2)
+    writes = []
+    update = storage.update_interview_fields
+    monkeypatch.setattr(storage, "update_interview_fields", lambda fields: writes.append(sorted(fields)) or update(fields))
+
+    def analyze(responses, **kwargs):
+        if "(3)" in responses[0]:
+            return {"error": "model returned nothing"}
+        return {"overall_feedback": responses[0], "questions": kwargs["questions_asked"]}
+    monkeypatch.setattr(analysis_service, "analyze_interview_responses", analyze)
+
+    ids = [f"interview_{i}" for i in range(5)] + ["interview_1", "missing"]
+    results = {r["interview_id"]: r for r in analyze_interviews(storage, ids, concurrency=3)}
+
+    assert results["missing"]["status"] == "not_found"
+    assert results["interview_3"] == {"interview_id": "interview_3", "status": "failed", "error": "model returned nothing"}
+    assert results["interview_0"]["analysis"]["questions"] == ["Hi! What is a decorator?"]
+    assert len(results) == 6
+    # Four successes saved in writes of two
+    assert [len(w) for w in writes] == [2, 2]
+    assert storage.get_interview("interview_4")["analysis"]["overall_feedback"] == "A function wrapping another (4)"
+    assert "analysis" not in storage.get_interview("interview_3")
+
+def test_closing_the_stream_saves_results_so_far(storage, monkeypatch):
+    monkeypatch.setattr(analysis_service, "INTERVIEW_ANALYSIS_WRITE_BATCH", 10)
+    started = []
+    lock = threading.Lock()
+
+    def analyze(responses, **kwargs):
+        with lock:
+            started.append(responses[0])
+        return {"overall_feedback": responses[0]}
+    monkeypatch.setattr(analysis_service, "analyze_interview_responses", analyze)
+
+    results = analyze_interviews(storage, [f"interview_{i}" for i in range(5)], concurrency=1)
+    first = next(results)
+    results.close()
+
+    assert storage.get_interview(first["interview_id"])["analysis"] == first["analysis"]
+    # Analyses not yet started were cancelled
+    assert len(started) < 5
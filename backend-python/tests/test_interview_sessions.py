@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from app.services import interview_session_service as sessions
+from app.services.local_storage import LocalInterviewStorage
+
+JOB = {"id": "job1", "title": "Python Developer", "required_skills": ["Python", "Django"]}
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return LocalInterviewStorage(data_file=str(tmp_path / "interviews.json"))
+
+def test_counters_follow_the_conversation():
+    session = sessions.new_session(JOB)
+    sessions.record_ai_message(session, "How have you used Django in production?")
+    assert session["technical_questions_asked"] == 1
+    assert session["pending_question_technical"] is True
+
+    sessions.record_user_message(session, "Yes")
+    assert session["vague_answer_count"] == 1
+    assert session["pending_question_technical"] is None
+
+    # A reply that answers no question is never scored
+    sessions.record_user_message(session, "ok")
+    assert session["vague_answer_count"] == 1
+    assert session["user_message_count"] == 2
+
+def test_replayed_history_matches_recorded_turns():
+    recorded = sessions.new_session(JOB)
+    history = []
+    for is_user, text in [(False, "Tell me about Python decorators?"), (True, "I know them"),
+                          (False, "Great. What is the GIL?"), (True, "A lock around the interpreter state")]:
+        message = (sessions.record_user_message if is_user else sessions.record_ai_message)(recorded, text)
+        history.append(message)
+
+    replayed = sessions.session_from_messages(JOB, history)
+    for key in ("technical_questions_asked", "previous_questions", "vague_answer_count", "ai_message_count", "user_message_count"):
+        assert replayed[key] == recorded[key]
+
+def test_interview_ends_after_the_answer_to_the_last_question():
+    session = sessions.new_session(JOB)
+    for i in range(sessions.TECHNICAL_QUESTION_LIMIT):
+        sessions.record_ai_message(session, f"How would you test Django view {i}?")
+        assert not sessions.should_end_interview(session)
+        sessions.record_user_message(session, "With the test client and fixtures for the database")
+    assert sessions.should_end_interview(session)
+
+def test_sessions_get_their_own_files(storage, tmp_path):
+    storage.save_interview({"id": "interview_1", "job_id": "job1"})
+    session = sessions.new_session(JOB)
+    sessions.save_session(storage, session)
+
+    assert os.path.exists(tmp_path / "data" / "interviews" / f"{session['id']}.json")
+    assert session["id"] not in storage._read_file(str(tmp_path / "interviews.json"))
+    assert storage.get_interview(session["id"])["job_id"] == "job1"
+    assert set(storage.get_interviews([session["id"], "interview_1", "missing"])) == {session["id"], "interview_1"}
+    assert {i["id"] for i in storage.list_interviews()} == {session["id"], "interview_1"}
+
+    assert storage.update_interview_fields({session["id"]: {"analysis": "ok"}, "interview_1": {"analysis": "ok"}}) == 2
+    assert storage.get_interview(session["id"])["analysis"] == "ok"
+
+def test_sessions_move_out_of_the_shared_file(storage, tmp_path):
+    # Stored before sessions had their own files
+    legacy = sessions.new_session(JOB)
+    storage._save_data({legacy["id"]: legacy})
+
+    assert storage.get_interview(legacy["id"])["id"] == legacy["id"]
+    sessions.save_session(storage, legacy)
+    assert legacy["id"] not in storage._read_file(str(tmp_path / "interviews.json"))
+    assert storage.get_interview(legacy["id"])["id"] == legacy["id"]
+
+def test_client_session_ids_cannot_escape_the_directory(storage):
+    assert storage._session_path("session_../../etc/passwd") is None
+    assert storage.get_interview("session_../../etc/passwd") is None
+
+def test_save_keeps_a_newer_background_summary(storage):
+    session = sessions.new_session(JOB)
+    sessions.save_session(storage, session)
+    assert sessions.update_session_summary(storage, session["id"], 0, 4, "Candidate knows Django")
+
+    # The turn saves the copy it loaded before the summary landed
+    sessions.save_session(storage, session)
+    stored = storage.get_interview(session["id"])
+    assert stored["summary"] == "Candidate knows Django"
+    assert stored["summary_upto"] == 4
+
+def test_one_turn_per_session():
+    with sessions.session_turn("session_a") as first:
+        assert first
+        with sessions.session_turn("session_a") as second:
+            assert not second
+        with sessions.session_turn("session_b") as other:
+            assert other
+    with sessions.session_turn("session_a") as again:
+        assert again
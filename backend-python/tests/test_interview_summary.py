@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from app.services import interview_session_service as sessions
+from app.services import interview_summary_service as summaries
+from app.services.local_storage import LocalInterviewStorage
+
+JOB = {"id": "job1", "title": "Python Developer", "company": "TechCorp", "required_skills": ["Python"]}
+
+SUMMARY = {
+    "passed": True, "rating": 90, "improvements": ["Testing"], "summary": "Strong",
+    "learning_roadmap": {"key_areas": ["Testing"], "resources": [{"title": "pytest", "type": "book",
+                         "description": "d", "difficulty": "beginner"}], "suggested_timeline": "1 week"}
+}
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return LocalInterviewStorage(data_file=str(tmp_path / "interviews.json"))
+
+def _finished_session(vague_answers=0):
+    session = sessions.new_session(JOB)
+    for i in range(3):
+        sessions.record_ai_message(session, f"Question {i}: how do you test Python code?")
+        answer = "Yes" if i < vague_answers else "I write pytest fixtures and parametrize edge cases for each function."
+        sessions.record_user_message(session, answer)
+    return session
+
+def test_end_summary_is_stored_when_ready(storage, monkeypatch):
+    release = threading.Event()
+    seen = []
+
+    def generate(session):
+        release.wait(5)
+        seen.append(len(session["messages"]))
+        return dict(SUMMARY)
+    monkeypatch.setattr(summaries, "generate_end_summary", generate)
+    received = []
+    monkeypatch.setattr(summaries, "end_summary_listeners", [received.append])
+
+    session = _finished_session()
+    storage.save_interview(session)
+    future = summaries.start_end_summary(storage, session)
+    assert session["end_summary_status"] == "pending"
+    # A second request for the same session joins the running generation
+    assert summaries.start_end_summary(storage, session) is future
+
+    # The closing message is recorded while the summary is generated from the snapshot
+    sessions.record_ai_message(session, "Thank you, that's all for today.")
+    sessions.save_session(storage, session)
+    release.set()
+    assert future.result(timeout=5) == SUMMARY
+
+    stored = storage.get_interview(session["id"])
+    assert seen == [6]
+    assert stored["end_summary_status"] == "ready"
+    assert stored["end_summary"] == SUMMARY
+    assert len(stored["messages"]) == 7
+    assert received == [SUMMARY]
+    assert summaries.get_end_summary_status(storage, stored) == {"status": "ready", "endSummary": SUMMARY}
+
+def test_failed_end_summary_is_marked(storage, monkeypatch):
+    def generate(session):
+        raise RuntimeError("model unavailable")
+    monkeypatch.setattr(summaries, "generate_end_summary", generate)
+
+    session = _finished_session()
+    storage.save_interview(session)
+    with pytest.raises(RuntimeError):
+        summaries.start_end_summary(storage, session).result(timeout=5)
+
+    stored = storage.get_interview(session["id"])
+    assert summaries.get_end_summary_status(storage, stored) == {"status": "failed", "endSummary": {}}
+
+def test_pending_summary_without_a_task_is_restarted(storage, monkeypatch):
+    calls = []
+    monkeypatch.setattr(summaries, "generate_end_summary", lambda session: calls.append(session["id"]) or dict(SUMMARY))
+
+    session = _finished_session()
+    session["end_summary_status"] = "pending"
+    storage.save_interview(session)
+
+    # As after a restart: pending in storage, nothing running here
+    assert summaries.get_end_summary_status(storage, session) == {"status": "pending", "endSummary": {}}
+    deadline = time.time() + 5
+    while summaries._in_flight and time.time() < deadline:
+        time.sleep(0.01)
+    assert calls == [session["id"]]
+    assert storage.get_interview(session["id"])["end_summary_status"] == "ready"
+
+def test_fallback_summary_when_the_model_fails(monkeypatch):
+    monkeypatch.setattr(summaries, "get_structured_output", lambda **kwargs: {"error": "no JSON"})
+
+    assert summaries.generate_end_summary(_finished_session())["passed"] is True
+    failed = summaries.generate_end_summary(_finished_session(vague_answers=3))
+    assert failed["passed"] is False
+    assert failed["rating"] == 35
+
+def test_vague_answers_cap_the_model_rating(monkeypatch):
+    monkeypatch.setattr(summaries, "get_structured_output", lambda **kwargs: dict(SUMMARY))
+
+    summary = summaries.generate_end_summary(_finished_session(vague_answers=3))
+    assert summary["rating"] == 70
+    assert summary["passed"] is False
+    assert any("vague" in improvement for improvement in summary["improvements"])
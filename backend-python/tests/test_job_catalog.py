@@ -0,0 +1,114 @@
+import gc
+
+import pytest
+
+from app.services import job_catalog
+from app.services.job_catalog import (
+    COLUMN_INDEX,
+    JobCatalog,
+    build_job_catalog,
+    open_job_catalog
+)
+from app.services.local_storage import LocalJobStorage
+
+JOBS = [
+    {
+        "id": "job1",
+        "title": "Python Developer",
+        "company": "TechCorp",
+        "location": "Kraków",
+        "required_skills": ["Python", "SQL"],
+        "experience_level": "mid",
+        "created_at": 1.5
+    },
+    {
+        "id": 7,
+        "title": "Żółw Engineer",
+        "required_skills": [],
+        "experience_level": "principal"
+    }
+]
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = str(tmp_path / "jobs.cat")
+    build_job_catalog(JOBS, path)
+    return path
+
+def test_records_round_trip(catalog_path):
+    catalog = JobCatalog(catalog_path)
+    try:
+        assert [record.copy() for record in catalog] == JOBS
+        assert catalog.get("job1")["location"] == "Kraków"
+        assert catalog.get("job1").skills_lower == ["python", "sql"]
+    finally:
+        catalog.close()
+
+def test_presence_bitmask_and_offsets(catalog_path):
+    catalog = JobCatalog(catalog_path)
+    try:
+        # Absent columns are not stored, so they are not keys either
+        assert not catalog._has_column(0, COLUMN_INDEX["description"])
+        assert "description" not in catalog.get("job1")
+        # Multi-byte strings are addressed by byte offset and length
+        assert catalog._column(1, COLUMN_INDEX["title"]) == "Żółw Engineer"
+        assert catalog._list_column(1, COLUMN_INDEX["required_skills"]) == []
+        # Unknown experience levels and non-string ids go to the extra column
+        assert catalog._experience_code(1) == 0
+        assert catalog._has_column(1, COLUMN_INDEX["extra"])
+    finally:
+        catalog.close()
+
+def test_ids_match_as_strings(catalog_path):
+    catalog = JobCatalog(catalog_path)
+    try:
+        assert catalog.get(7)["title"] == "Żółw Engineer"
+        assert catalog.get("7")["id"] == 7
+        assert catalog.get("missing") is None
+    finally:
+        catalog.close()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-catalog"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        JobCatalog(str(path))
+    assert open_job_catalog(str(path)) is None
+
+def test_reopen_after_rebuild_releases_old_mapping(catalog_path):
+    first = open_job_catalog(catalog_path)
+    assert open_job_catalog(catalog_path) is first
+
+    record = first.get("job1")
+    build_job_catalog(JOBS[:1], catalog_path)
+    second = open_job_catalog(catalog_path)
+    assert second is not first
+    assert len(second) == 1
+
+    # Records handed out earlier keep the old mapping readable
+    finalizer = first._finalizer
+    del first
+    gc.collect()
+    assert record["title"] == "Python Developer"
+    assert finalizer.alive
+
+    del record
+    gc.collect()
+    assert not finalizer.alive
+
+def test_storage_sees_its_own_writes_without_polling(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("app.services.local_storage.JOB_CATALOG_CHECK_INTERVAL", 3600)
+    storage = LocalJobStorage(data_file=str(tmp_path / "jobs.json"), catalog_file=str(tmp_path / "jobs.cat"))
+    assert len(storage.list_jobs()) == 3
+
+    stats = []
+    real_stat = job_catalog.os.stat
+    monkeypatch.setattr(job_catalog.os, "stat", lambda path, *a, **kw: stats.append(path) or real_stat(path, *a, **kw))
+    storage.list_jobs()
+    storage.get_job("job1")
+    assert stats == []
+
+    job_id = storage.save_job({"title": "Data Engineer", "required_skills": ["Spark"]})
+    assert storage.get_job(job_id)["title"] == "Data Engineer"
+    assert len(storage.list_jobs(skills=["spark"])) == 1
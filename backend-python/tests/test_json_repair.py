@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app.utils.json_repair import repair_json
+
+def parsed(text):
+    return json.loads(repair_json(text))
+
+def test_valid_json_is_unchanged():
+    text = '{"a": [1, 2.5, "x"], "b": {"c": null, "d": true}}'
+    assert parsed(text) == json.loads(text)
+
+def test_prose_fences_and_think_blocks_are_stripped():
+    text = '<think>let me see {not json}</think>Sure! ```json\n{"a": 1}\n``` Hope this helps.'
+    assert parsed(text) == {"a": 1}
+
+def test_trailing_and_missing_commas():
+    assert parsed('{"a": 1, "b": [1, 2,],}') == {"a": 1, "b": [1, 2]}
+    assert parsed('{"a": 1\n "b": 2}') == {"a": 1, "b": 2}
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "x"\n "b": 2}', {"a": "x", "b": 2}),
+    ('["a" "b"]', ["a", "b"]),
+    ('["a" "b" "c"]', ["a", "b", "c"]),
+])
+def test_missing_comma_after_string(text, expected):
+    assert parsed(text) == expected
+
+def test_unescaped_quotes_inside_strings():
+    assert parsed('{"q": "He said "hi" to me"}') == {"q": 'He said "hi" to me'}
+    assert parsed('{"q": "a "b" "c" d"}') == {"q": 'a "b" "c" d'}
+
+def test_quotes_keys_and_literals():
+    assert parsed("{'a': 'x', b: True, c: None, d: NaN}") == {"a": "x", "b": True, "c": None, "d": None}
+    assert parsed('{"a": “typographic”}') == {"a": "typographic"}
+
+def test_line_breaks_and_invalid_escapes_in_strings():
+    assert parsed('{"a": "line\nbreak", "b": "it\\\'s"}') == {"a": "line\nbreak", "b": "it's"}
+
+def test_truncated_output_is_closed():
+    assert parsed('{"items": [{"id": 1}, {"id": 2, "name": "tw') == {"items": [{"id": 1}, {"id": 2, "name": "tw"}]}
+    assert parsed('{"a": 1, "b":') == {"a": 1, "b": None}
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        repair_json("I cannot help with that.")
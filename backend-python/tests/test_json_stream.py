@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import JsonArrayItemParser
+
+DOCUMENT = json.dumps({
+    "job_matches": [
+        {"job_id": "1", "reasoning": "uses [brackets] and \"quotes\", {braces}"},
+        {"job_id": "2", "skills": ["a", "b"]}
+    ],
+    "extracted_user_skills": ["python"]
+})
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items += parser.feed(chunk)
+    return items
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, len(DOCUMENT)])
+def test_items_match_whole_document_for_any_chunking(chunk_size):
+    parser = JsonArrayItemParser("job_matches")
+    chunks = [DOCUMENT[i:i + chunk_size] for i in range(0, len(DOCUMENT), chunk_size)]
+    assert feed_all(parser, chunks) == json.loads(DOCUMENT)["job_matches"]
+    assert parser.document() == json.loads(DOCUMENT)
+
+def test_item_is_returned_as_soon_as_it_closes():
+    parser = JsonArrayItemParser("job_matches")
+    assert parser.feed('{"job_matches": [{"job_id": "1"') == []
+    assert parser.feed('}, {"job_id"') == [{"job_id": "1"}]
+
+def test_scalar_items_and_other_arrays():
+    parser = JsonArrayItemParser("tags")
+    items = feed_all(parser, ['{"other": [1, 2], "tags": ["x", 3', ', null, true]}'])
+    # Items of other arrays are ignored, null items are skipped
+    assert items == ["x", 3, True]
+
+def test_nested_array_with_same_key_is_ignored():
+    parser = JsonArrayItemParser("items")
+    items = feed_all(parser, ['{"meta": {"items": [9]}, "items": [{"items": [1]}]}'])
+    assert items == [{"items": [1]}]
+
+def test_incomplete_document_raises():
+    parser = JsonArrayItemParser("job_matches")
+    parser.feed('{"job_matches": [')
+    with pytest.raises(json.JSONDecodeError):
+        parser.document()
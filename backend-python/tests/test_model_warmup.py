@@ -0,0 +1,113 @@
+from collections import deque
+
+import pytest
+
+pytest.importorskip("requests")
+
+from app.services import model_warmup
+from app.services.model_warmup import ModelWarmup
+
+SERVER = "http://gpu-1:11434"
+
+@pytest.fixture
+def warmup():
+    return ModelWarmup(servers=[SERVER], interval=60)
+
+def test_keep_alive_is_sized_to_the_call_rate(warmup):
+    now = 10_000.0
+    assert warmup.keep_alive_for("big", now) is None
+
+    # 10 calls over 20 minutes: a 2 minute gap, kept for three gaps
+    warmup._calls["big"] = deque(now - 1200 + 120 * i for i in range(10))
+    assert warmup.keep_alive_for("big", now) == 360
+
+    # Busy models get the floor, rare ones the ceiling
+    warmup._calls["busy"] = deque(now - i for i in range(100))
+    assert warmup.keep_alive_for("busy", now) == model_warmup.MODEL_WARMUP_MIN_KEEP_ALIVE
+    warmup._calls["rare"] = deque([now - 3000])
+    assert warmup.keep_alive_for("rare", now) == model_warmup.MODEL_WARMUP_MAX_KEEP_ALIVE
+
+    # Calls older than the traffic window do not count
+    warmup._calls["old"] = deque([now - model_warmup.MODEL_WARMUP_TRAFFIC_WINDOW - 1])
+    assert warmup.keep_alive_for("old", now) is None
+
+def test_real_calls_send_the_sized_keep_alive(warmup):
+    assert warmup.call_keep_alive("big") is None
+    warmup.record_call(SERVER, "big", {"load_ms": 5})
+    assert warmup.call_keep_alive("big") == f"{model_warmup.MODEL_WARMUP_MIN_KEEP_ALIVE}s"
+
+def test_calls_go_to_a_server_where_the_model_is_warm(warmup):
+    warmup._servers = {
+        "a": {"online": True, "loaded": {}},
+        "b": {"online": True, "loaded": {"big:latest": {"expires_at": None}}},
+        "c": {"online": False, "loaded": {"small:latest": {"expires_at": None}}},
+    }
+    assert warmup.pick_server("big", "a") == "b"
+    assert warmup.pick_server("big", "b") == "b"
+    # Warm nowhere (or only on an offline server): keep the default
+    assert warmup.pick_server("small", "a") == "a"
+    warmup._servers["b"]["loaded"]["big:latest"]["expires_at"] = 1.0
+    assert warmup.pick_server("big", "a") == "a"
+
+class FakeServer:
+    """Loaded models of one server with room for `slots` models, oldest evicted first"""
+
+    def __init__(self, loaded, slots):
+        self.loaded = list(loaded)
+        self.slots = slots
+        self.loads = []
+
+    def state(self, server):
+        return {"online": True, "available_models": ["big", "small"],
+                "loaded": {model: {"expires_at": None, "size_vram": None} for model in self.loaded}}
+
+    def preload(self, server, model, keep_alive=None, counter="preloads"):
+        self.loads.append(model)
+        key = model_warmup._model_key(model)
+        if key not in self.loaded:
+            self.loaded.append(key)
+            del self.loaded[:-self.slots]
+        return True
+
+@pytest.fixture
+def fake_server(warmup, monkeypatch):
+    server = FakeServer(["big:latest"], slots=1)
+    monkeypatch.setattr(warmup, "check_server", server.state)
+    monkeypatch.setattr(warmup, "preload", server.preload)
+    monkeypatch.setattr(warmup, "wanted_models", lambda available: {"big", "small"})
+    return server
+
+def _traffic(warmup, *models):
+    now = model_warmup.time.time()
+    for model in models:
+        warmup._calls[model] = deque([now - 10])
+
+def test_refresh_stops_reloading_when_a_reload_evicts_a_busy_model(warmup, fake_server):
+    _traffic(warmup, "big", "small")
+
+    warmup.refresh()
+    # "big" is extended, then reloading "small" evicts it
+    assert fake_server.loads == ["big", "small"]
+    assert warmup.get_metrics()["full_servers"] == [SERVER]
+
+    # The next check extends what is loaded and does not swap the models back
+    warmup.refresh()
+    assert fake_server.loads == ["big", "small", "small"]
+    assert fake_server.loaded == ["small:latest"]
+
+def test_full_server_reloads_again_once_a_model_unloads(warmup, fake_server):
+    _traffic(warmup, "big", "small")
+    warmup.refresh()
+
+    fake_server.loaded = []
+    fake_server.slots = 2
+    warmup.refresh()
+    assert sorted(fake_server.loaded) == ["big:latest", "small:latest"]
+    assert warmup.get_metrics()["full_servers"] == []
+
+def test_evicting_an_idle_model_does_not_fill_the_server(warmup, fake_server):
+    _traffic(warmup, "small")
+
+    warmup.refresh()
+    assert fake_server.loaded == ["small:latest"]
+    assert warmup.get_metrics()["full_servers"] == []
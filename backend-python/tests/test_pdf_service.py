@@ -0,0 +1,173 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from app.services import pdf_service
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.skipif("forkserver" not in __import__("multiprocessing").get_all_start_methods(),
+                    reason="forkserver start method not available")
+def test_pool_workers_do_not_import_the_server_script(tmp_path):
+    # Stands in for app.py: records every module name it is executed under
+    marker = tmp_path / "imports.txt"
+    script = tmp_path / "server.py"
+    script.write_text(textwrap.dedent(f"""
+        import os
+        import sys
+        sys.path.insert(0, {BACKEND_DIR!r})
+        with open({str(marker)!r}, "a") as f:
+            f.write(__name__ + "\\n")
+
+        if __name__ == "__main__":
+            from app.services import pdf_service
+            pdf_service.PDF_WORKERS = 2
+            pool = pdf_service._get_pool()
+            futures = [pool.submit(os.getpid) for _ in range(4)]
+            worker_pids = {{future.result(timeout=60) for future in futures}}
+            pool.shutdown()
+            print(len(worker_pids))
+    """))
+
+    result = subprocess.run([sys.executable, str(script)], cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert marker.read_text().split() == ["__main__"]
+
+def test_worker_source_shares_bytes_as_a_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_service, "_get_pool", lambda: object())
+    monkeypatch.setattr(pdf_service, "PDF_SHARE_DIR", str(tmp_path))
+
+    with pdf_service._worker_source(b"%PDF-1.4 test", 3) as source:
+        assert isinstance(source, str)
+        with open(source, "rb") as f:
+            assert f.read() == b"%PDF-1.4 test"
+    assert not os.path.exists(source)
+
+def test_worker_source_keeps_bytes_inline(monkeypatch):
+    monkeypatch.setattr(pdf_service, "_get_pool", lambda: None)
+    with pdf_service._worker_source(b"%PDF", 3) as source:
+        assert source == b"%PDF"
+
+    monkeypatch.setattr(pdf_service, "_get_pool", lambda: object())
+    with pdf_service._worker_source(b"%PDF", 1) as source:
+        assert source == b"%PDF"
+
+class FakeBox:
+    width = 612
+    height = 792
+
+class FakeReader:
+    def __init__(self, source):
+        self.pages = [type("Page", (), {"mediabox": FakeBox()})() for _ in range(10)]
+
+class FakeFuture:
+    def __init__(self, pool, result):
+        self.pool = pool
+        self._result = result
+
+    def result(self, timeout=None):
+        self.pool.in_flight -= 1
+        return self._result
+
+    def cancel(self):
+        self.pool.in_flight -= 1
+
+class FakePool:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.submitted.append(args[1])
+        return FakeFuture(self, fn(*args))
+
+def fake_ocr_page(source, page_index, dpi):
+    return {"page": page_index, "text": "x" * 100, "method": "ocr", "dpi": dpi, "seconds": 0.1}
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    monkeypatch.setattr(pdf_service.PyPDF2, "PdfReader", FakeReader, raising=False)
+    monkeypatch.setattr(pdf_service, "ocr_page", fake_ocr_page)
+    monkeypatch.setattr(pdf_service, "PDF_OCR_MAX_PAGES", 8)
+    monkeypatch.setattr(pdf_service, "PDF_WORKERS", 2)
+    pool = FakePool()
+    monkeypatch.setattr(pdf_service, "_get_pool", lambda: pool)
+    return pool
+
+def empty_pages(count):
+    return [{"page": i, "text": "", "method": None, "seconds": 0} for i in range(count)]
+
+def test_ocr_stops_at_the_char_budget(fake_ocr):
+    pages = empty_pages(8)
+    report = pdf_service.ocr_empty_pages("doc.pdf", pages, char_budget=250)
+
+    assert report["pages"] == 3
+    assert report["over_budget"] == 5
+    assert [p["text"] != "" for p in pages] == [True] * 3 + [False] * 5
+    assert fake_ocr.submitted == [0, 1, 2, 3]
+    assert fake_ocr.in_flight == 0
+
+def test_ocr_keeps_at_most_one_page_per_worker_in_flight(fake_ocr):
+    report = pdf_service.ocr_empty_pages("doc.pdf", empty_pages(10))
+
+    assert report["pages"] == 8
+    assert report["skipped"] == 2
+    assert fake_ocr.peak == 2
+
+def fake_extract_page(source, page_index):
+    return {"page": page_index, "text": "y" * 1000, "method": "pdfminer", "seconds": 0.1}
+
+@pytest.fixture
+def fake_extract(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_service, "count_pages", lambda source: 20)
+    monkeypatch.setattr(pdf_service, "extract_page_text", fake_extract_page)
+    monkeypatch.setattr(pdf_service, "PDF_OCR_ENABLED", False)
+    monkeypatch.setattr(pdf_service, "PDF_WORKERS", 3)
+    monkeypatch.setattr(pdf_service, "PDF_SHARE_DIR", str(tmp_path))
+    pool = FakePool()
+    monkeypatch.setattr(pdf_service, "_get_pool", lambda: pool)
+    return pool
+
+def test_extraction_stops_at_the_char_budget(fake_extract):
+    result = pdf_service.extract_pdf_text(b"%PDF", char_budget=2500)
+
+    assert result["pages_extracted"] == 3
+    assert result["truncated"]
+    assert len(result["text"]) == 3 * 1000 + 2 * 2
+    # Only the pages already in flight were parsed beyond the budget
+    assert fake_extract.submitted == [0, 1, 2, 3, 4]
+    assert fake_extract.peak == 3
+    assert fake_extract.in_flight == 0
+
+def test_extraction_without_a_budget_reads_every_page(fake_extract):
+    result = pdf_service.extract_pdf_text(b"%PDF")
+
+    assert result["pages_extracted"] == 20
+    assert not result["truncated"]
+    assert [p["page"] for p in result["pages"]] == list(range(20))
+
+def test_small_uploads_stay_in_memory(tmp_path):
+    with pdf_service.pdf_source(b"%PDF-1.4", spill_dir=str(tmp_path)) as source:
+        assert source == b"%PDF-1.4"
+        assert pdf_service._open(source).read() == b"%PDF-1.4"
+    assert os.listdir(tmp_path) == []
+
+def test_large_uploads_spill_and_are_removed(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_service, "PDF_SPILL_THRESHOLD", 4)
+
+    with pytest.raises(RuntimeError):
+        with pdf_service.pdf_source(b"%PDF-1.4", spill_dir=str(tmp_path)) as source:
+            assert os.path.dirname(source) == str(tmp_path)
+            assert pdf_service._open(source) == source
+            with open(source, "rb") as f:
+                assert f.read() == b"%PDF-1.4"
+            raise RuntimeError("extraction failed")
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,59 @@
+from app.utils import prompt_budget
+from app.utils.prompt_budget import (
+    compact_whitespace,
+    count_tokens,
+    fit_sections,
+    remaining_budget,
+    split_budget,
+    trim_to_tokens,
+    TRIM_MARKER
+)
+
+SENTENCES = "First sentence here. Second sentence follows. Third one ends it."
+
+def test_count_tokens_estimates_from_characters():
+    if prompt_budget.tokenizer_name() == "chars":
+        assert count_tokens("x" * 40) == 10
+
+def test_compact_whitespace():
+    assert compact_whitespace("  a   b \n\n\n\n c  ") == "a b\n\nc"
+
+def test_trim_keeps_text_that_fits():
+    assert trim_to_tokens(SENTENCES, 1000) == SENTENCES
+
+def test_trim_cuts_at_sentence_end():
+    trimmed = trim_to_tokens(SENTENCES, 13)
+    assert trimmed.endswith(TRIM_MARKER)
+    assert trimmed == "First sentence here. Second sentence follows." + TRIM_MARKER
+    assert count_tokens(trimmed) <= 13
+
+def test_trim_to_nothing():
+    assert trim_to_tokens(SENTENCES, 1) == ""
+
+def test_split_budget_gives_short_texts_their_size():
+    short, long_text = "short", "word " * 200
+    fitted = split_budget([short, long_text], 60)
+    assert fitted[0] == short
+    assert count_tokens(fitted[1]) <= 60 - count_tokens(short)
+
+def test_fit_sections_fills_by_priority():
+    sections = [
+        {"name": "low", "text": "b " * 100, "priority": 2},
+        {"name": "high", "text": "a " * 100, "priority": 1},
+    ]
+    fitted = fit_sections(sections, 60)
+    assert fitted["high"] == sections[1]["text"]
+    assert count_tokens(fitted["low"]) <= 10
+
+def test_fit_sections_reserves_min_tokens():
+    sections = [
+        {"name": "first", "text": "a " * 100, "priority": 1},
+        {"name": "reserved", "text": "b " * 100, "priority": 2, "min_tokens": 20},
+    ]
+    fitted = fit_sections(sections, 60)
+    assert count_tokens(fitted["reserved"]) > 10
+    assert count_tokens(fitted["first"]) + count_tokens(fitted["reserved"]) <= 60
+
+def test_remaining_budget():
+    assert remaining_budget(100, "x" * 40, "y" * 40) == 80
+    assert remaining_budget(5, "x" * 400) == 0
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from app.services import question_pool_service
+from app.services.question_pool_service import QuestionPoolService, pool_key
+from app.services.local_storage import LocalJobStorage
+
+JOB = {"id": "job1", "title": "Python Developer", "required_skills": ["Python"], "experience_level": "senior"}
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return LocalJobStorage(data_file=str(tmp_path / "jobs.json"), catalog_file="")
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+
+    def generate(job, skills, experience_level, difficulty, num_questions, language):
+        start = sum(calls)
+        calls.append(num_questions)
+        return [f"Question {start + i}?" for i in range(num_questions)]
+    monkeypatch.setattr(question_pool_service, "generate_interview_questions", generate)
+    monkeypatch.setattr(question_pool_service, "QUESTION_POOL_SIZE", 12)
+    monkeypatch.setattr(question_pool_service, "QUESTION_POOL_BATCH", 5)
+    monkeypatch.setattr(question_pool_service, "QUESTION_POOL_LOW_WATERMARK", 4)
+    return calls
+
+def _wait_idle(service):
+    deadline = time.time() + 5
+    while service.get_metrics()["refills_in_flight"] and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_warm_fills_the_pool_in_batches(storage, generated):
+    service = QuestionPoolService(storage)
+    assert service.warm(JOB)
+    _wait_idle(service)
+
+    pool = storage.get_question_pool("job1", pool_key("senior"))
+    assert len(pool["questions"]) == 12
+    assert generated == [5, 5, 2]
+    # A full pool is left alone
+    assert not service.warm(JOB)
+
+def test_draw_from_an_empty_pool_does_not_wait(storage, generated):
+    service = QuestionPoolService(storage)
+    assert service.draw(JOB, 5) == []
+    assert service.get_metrics()["empty_draws"] == 1
+
+    # ...but starts the refill
+    _wait_idle(service)
+    assert len(service.draw(JOB, 5)) == 5
+
+def test_draws_hand_out_different_questions_and_refill_when_low(storage, generated):
+    service = QuestionPoolService(storage)
+    service.warm(JOB)
+    _wait_idle(service)
+
+    first = service.draw(JOB, 5)
+    second = service.draw(JOB, 5)
+    assert len(first) == len(second) == 5
+    assert not set(first) & set(second)
+
+    # Two questions left, below the watermark: topped up again without duplicates
+    _wait_idle(service)
+    questions = storage.get_question_pool("job1", pool_key("senior"))["questions"]
+    assert len(questions) == 12
+    assert len(set(questions)) == 12
+    assert service.get_metrics()["questions_served"] == 10
+
+def test_placeholder_questions_are_not_pooled(storage, monkeypatch):
+    monkeypatch.setattr(question_pool_service, "generate_interview_questions",
+                        lambda job, **kwargs: ["Placeholder question 1"])
+    service = QuestionPoolService(storage)
+    service.warm(JOB)
+    _wait_idle(service)
+
+    assert storage.get_question_pool("job1", pool_key("senior")) is None
+    assert service.get_metrics()["refill_failures"] == 1
+
+def test_a_failing_save_listener_does_not_fail_the_save(storage):
+    seen = []
+    storage.save_listeners.append(lambda job: 1 / 0)
+    storage.save_listeners.append(seen.append)
+
+    job_id = storage.save_job(dict(JOB, id=None))
+
+    assert storage.get_job(job_id)["title"] == "Python Developer"
+    assert [job["id"] for job in seen] == [job_id]
@@ -0,0 +1,80 @@
+import pytest
+
+from app.utils.schema_validation import coerce_to_schema, SchemaMismatch
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "score": {"type": "integer", "minimum": 0, "maximum": 100},
+        "passed": {"type": "boolean"},
+        "level": {"type": "string", "enum": ["junior", "mid", "senior"]},
+        "skills": {"type": "array", "items": {"type": "string"}},
+        "matches": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"job_id": {"type": "string"}, "percent": {"type": "number"}},
+                "required": ["job_id"]
+            }
+        }
+    },
+    "required": ["summary", "score", "skills"]
+}
+
+def test_valid_value_has_no_issues():
+    value = {"summary": "ok", "score": 50, "passed": True, "level": "mid", "skills": ["go"], "matches": []}
+    assert coerce_to_schema(value, SCHEMA) == (value, [])
+
+def test_scalars_are_converted():
+    coerced, issues = coerce_to_schema({"summary": 12, "score": "85%", "passed": "yes", "skills": []}, SCHEMA)
+    assert coerced == {"summary": "12", "score": 85, "passed": True, "skills": []}
+    assert set(issues) == {"summary", "score", "passed"}
+
+def test_numbers_are_clamped_and_enums_matched():
+    coerced, _ = coerce_to_schema({"summary": "s", "score": 140, "level": "Senior level", "skills": []}, SCHEMA)
+    assert coerced["score"] == 100
+    assert coerced["level"] == "senior"
+
+def test_strings_become_lists():
+    coerced, issues = coerce_to_schema({"summary": "s", "score": 1, "skills": "Python, SQL\n- Docker"}, SCHEMA)
+    assert coerced["skills"] == ["Python", "SQL", "Docker"]
+    assert issues == ["skills"]
+
+def test_array_items_missing_required_fields_are_dropped():
+    coerced, issues = coerce_to_schema(
+        {"summary": "s", "score": 1, "skills": [], "matches": [{"job_id": 7, "percent": "70"}, {"percent": 50}]}, SCHEMA)
+    assert coerced["matches"] == [{"job_id": "7", "percent": 70.0}]
+    assert any("matches[1] dropped" in issue for issue in issues)
+
+@pytest.mark.parametrize("value", [
+    {"score": 10},
+    {"summary": None, "score": 10},
+])
+def test_missing_required_scalar_is_not_invented(value):
+    with pytest.raises(SchemaMismatch):
+        coerce_to_schema(value, SCHEMA)
+
+def test_wrong_container_type_raises():
+    with pytest.raises(SchemaMismatch):
+        coerce_to_schema(["not", "an", "object"], SCHEMA)
+
+def test_unconvertible_boolean_raises():
+    with pytest.raises(SchemaMismatch):
+        coerce_to_schema({"summary": "s", "score": 1, "skills": [], "passed": "maybe"}, SCHEMA)
+
+def test_missing_required_array_becomes_empty():
+    coerced, issues = coerce_to_schema({"summary": "s", "score": 1}, SCHEMA)
+    assert coerced["skills"] == []
+    assert issues == ["skills"]
+
+@pytest.mark.parametrize("level", ["principal", ""])
+def test_unknown_enum_value_is_not_guessed(level):
+    with pytest.raises(SchemaMismatch):
+        coerce_to_schema({"summary": "s", "score": 1, "skills": [], "level": level}, SCHEMA)
+
+def test_array_items_with_unknown_enum_values_are_dropped():
+    schema = {"type": "array", "items": {"type": "string", "enum": ["book", "video"]}}
+    coerced, issues = coerce_to_schema(["Book", "podcast"], schema)
+    assert coerced == ["book"]
+    assert any("[1] dropped" in issue for issue in issues)
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+from app.services import storage_codecs
+from app.services.storage_codecs import (
+    CODECS,
+    MSGPACK_MAGIC,
+    decode_payload,
+    detect_codec,
+    get_codec
+)
+from app.services.local_storage import LocalFlashcardStorage
+
+DATA = {"id": "job1", "title": "Żółw Engineer", "skills": ["Python", "SQL"], "rating": 72, "remote": True, "salary": None}
+
+@pytest.mark.parametrize("name", ["json", "fastjson"])
+def test_json_codecs_round_trip(name):
+    payload = get_codec(name).encode(DATA)
+    assert json.loads(payload.decode("utf-8")) == DATA
+    assert detect_codec(payload).name == "json"
+    assert decode_payload(payload) == DATA
+
+def test_fastjson_is_compact():
+    assert len(get_codec("fastjson").encode(DATA)) < len(get_codec("json").encode(DATA))
+
+def test_unknown_codec_falls_back_to_json():
+    assert get_codec("yaml").name == "json"
+
+def test_msgpack_falls_back_when_not_installed(monkeypatch):
+    monkeypatch.setattr(storage_codecs, "msgpack", None)
+    assert get_codec("msgpack").name == "fastjson"
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    payload = get_codec("msgpack").encode(DATA)
+    assert payload.startswith(MSGPACK_MAGIC)
+    assert detect_codec(payload).name == "msgpack"
+    assert decode_payload(payload) == DATA
+
+def test_files_written_with_any_codec_load(tmp_path):
+    names = [name for name in CODECS if get_codec(name).name == name]
+    for name in names:
+        LocalFlashcardStorage(str(tmp_path), codec=name).save_flashcard_set(f"set_{name}", DATA)
+
+    reader = LocalFlashcardStorage(str(tmp_path), codec="json")
+    for name in names:
+        assert reader.get_flashcard_set(f"set_{name}") == DATA
+    # Writes are atomic: no temporary files are left behind
+    assert sorted(os.listdir(tmp_path)) == sorted(f"set_{name}.json" for name in names)
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from app.services import task_queue
+from app.services.task_queue import TaskQueue
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = TaskQueue(db_path=str(tmp_path / "tasks.db"), workers=1)
+    yield queue
+    queue.stop()
+
+def test_submit_wakes_an_idle_worker(queue, monkeypatch):
+    # Only a notify can get the task picked up within the test timeout
+    monkeypatch.setattr(task_queue, "TASK_POLL_INTERVAL", 60)
+    monkeypatch.setattr(task_queue, "TASK_LEASE", 0.3)
+    queue.register("echo", lambda payload, blob: payload)
+    queue.start()
+    time.sleep(0.2)  # worker and heartbeat are both waiting
+
+    for i in range(3):
+        task_id = queue.submit("echo", {"n": i})
+        assert _wait_for(lambda: queue.get_task(task_id)["status"] == "succeeded", timeout=2)
+        assert queue.get_task(task_id, include_result=True)["result"] == {"n": i}
+
+def test_failed_tasks_are_retried_then_failed(queue, monkeypatch):
+    monkeypatch.setattr(task_queue, "TASK_RETRY_DELAY", 0)
+    calls = []
+
+    def flaky(payload, blob):
+        calls.append(blob)
+        raise RuntimeError("model unavailable")
+
+    queue.register("flaky", flaky)
+    task_id = queue.submit("flaky", {}, blob=b"cv", max_retries=1)
+    queue.start()
+
+    assert _wait_for(lambda: queue.get_task(task_id)["status"] == "failed")
+    task = queue.get_task(task_id)
+    assert task["attempts"] == 2
+    assert task["error"] == "model unavailable"
+    assert calls == [b"cv", b"cv"]
+
+def test_claim_leases_the_oldest_due_task(queue):
+    queue.register("noop", lambda payload, blob: None)
+    first = queue.submit("noop", {})
+    second = queue.submit("noop", {})
+
+    row = queue._claim()
+    assert row["id"] == first
+    assert queue.get_task(first)["status"] == "running"
+    assert first in queue._running
+    assert queue._claim()["id"] == second
+    assert queue._claim() is None
+
+def test_expired_leases_are_requeued(queue, monkeypatch):
+    queue.register("noop", lambda payload, blob: None)
+    task_id = queue.submit("noop", {})
+
+    monkeypatch.setattr(task_queue, "TASK_LEASE", -1)
+    assert queue._claim()["id"] == task_id
+    # The process running it is gone: its lease lapses and the next claim takes it over
+    queue._running.clear()
+    monkeypatch.setattr(task_queue, "TASK_LEASE", 60)
+    row = queue._claim()
+    assert row["id"] == task_id
+    assert row["attempts"] == 1
+
+def test_live_leases_are_renewed(queue, monkeypatch):
+    queue.register("noop", lambda payload, blob: None)
+    task_id = queue.submit("noop", {})
+    monkeypatch.setattr(task_queue, "TASK_LEASE", 1)
+    queue._claim()
+
+    time.sleep(1.1)
+    queue._renew_leases()
+    # Renewed, so not taken over
+    assert queue._claim() is None
+    assert queue.get_task(task_id)["status"] == "running"
+
+def test_finished_tasks_are_purged(queue, monkeypatch):
+    queue.register("noop", lambda payload, blob: None)
+    task_id = queue.submit("noop", {})
+    queue._run(queue._claim())
+    assert queue.get_task(task_id)["status"] == "succeeded"
+
+    assert queue.purge_finished(older_than=60) == 0
+    assert queue.purge_finished(older_than=-1) == 1
+    assert queue.get_task(task_id) is None
+
+def test_unknown_task_types_are_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit("missing", {})
+
+def test_stop_ends_every_thread(queue):
+    queue.start()
+    threads = list(queue._threads)
+    queue.stop()
+    assert not any(thread.is_alive() for thread in threads)
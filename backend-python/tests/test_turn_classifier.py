@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from app.services.interview_session_service import session_from_messages
+from app.utils.turn_classifier import get_turn_classifier
+from benchmark_turn_classifier import AI_MESSAGES, USER_MESSAGES, REQUIRED_SKILLS, legacy_scan
+
+EDGE_USER_MESSAGES = [
+    "yes",
+    "Yes\n",
+    "OK",
+    "i do ",
+    "Absolutely, I've shipped that.",
+    "I DON'T KNOW",
+    "We used C++ and a custom allocator for this.",
+    "",
+    "   ",
+    "Kraków team, Żółw project: I wrote the Docker images.",
+]
+
+EDGE_AI_MESSAGES = [
+    "Do you know C++?",
+    "Tell me about your API design?",
+    "Nice.",
+    "What is a closure? And a decorator?",
+]
+
+def _transcript(seed, length=40):
+    rng = random.Random(seed)
+    user = USER_MESSAGES + EDGE_USER_MESSAGES
+    ai = AI_MESSAGES + EDGE_AI_MESSAGES
+    # Mostly alternating, with occasional double messages from either side
+    messages = []
+    for i in range(length):
+        is_user = rng.random() < 0.5 if rng.random() < 0.2 else i % 2 == 1
+        messages.append({"id": str(i), "isUser": is_user, "message": rng.choice(user if is_user else ai)})
+    return messages
+
+@pytest.mark.parametrize("skills", [REQUIRED_SKILLS, ["C++", "Żółw"], [], ["Python", ""]])
+@pytest.mark.parametrize("seed", range(10))
+def test_sessions_match_the_legacy_loop(skills, seed):
+    messages = _transcript(seed)
+    session = session_from_messages({"required_skills": skills}, messages)
+
+    assert legacy_scan(messages, skills) == (
+        session["technical_questions_asked"], session["previous_questions"],
+        session["vague_answer_count"], session["vague_answers"]
+    )
+
+def test_signals():
+    classifier = get_turn_classifier(["PostgreSQL"])
+
+    signals = classifier.classify("How would you tune PostgreSQL?")
+    assert signals["is_question"] and signals["technical"]
+
+    signals = classifier.classify("Sure")
+    assert signals["vague_phrase"] and signals["too_short"] and not signals["technical"]
+
+    signals = classifier.classify("I honestly don't know how that works in practice.")
+    assert signals["dont_know"] and signals["lacks_detail"]
+    assert classifier.is_vague(signals, question_technical=True)
+    assert not classifier.is_vague(signals, question_technical=False)
+
+def test_classifiers_are_shared_per_skill_list():
+    assert get_turn_classifier(["Go", "SQL"]) is get_turn_classifier(["Go", "SQL"])
+    assert get_turn_classifier(None) is get_turn_classifier([])
@@ -0,0 +1,107 @@
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from app.services import local_storage
+from app.services.write_behind import WriteBehindQueue, fcntl
+
+@pytest.fixture
+def queue(tmp_path):
+    # A long window so nothing flushes until the test asks for it
+    queue = WriteBehindQueue(window=60, lock_file=str(tmp_path / "write_behind.lock"))
+    yield queue
+    queue.shutdown()
+
+def test_later_writes_replace_pending_ones(queue):
+    written = []
+    assert queue.submit("a", lambda: written.append("a1"))
+    assert queue.submit("a", lambda: written.append("a2"))
+    assert queue.submit("b", lambda: written.append("b1"))
+    assert queue.is_pending("a")
+
+    assert queue.flush() == 2
+    assert written == ["a2", "b1"]
+    assert not queue.is_pending("a")
+
+    metrics = queue.get_metrics()
+    assert metrics["writes_submitted"] == 3
+    assert metrics["writes_coalesced"] == 1
+    assert metrics["batches_flushed"] == 1
+    assert metrics["last_batch_size"] == 2
+    assert metrics["queue_depth"] == 0
+
+def test_failed_writes_are_counted(queue):
+    def fail():
+        raise OSError("disk full")
+
+    queue.submit("bad", fail)
+    queue.submit("good", lambda: None)
+    assert queue.flush() == 2
+
+    metrics = queue.get_metrics()
+    assert metrics["writes_failed"] == 1
+    assert metrics["last_error"] == "bad: disk full"
+
+def test_metrics_are_consistent_under_concurrent_flushes(queue):
+    def submit_and_flush(n):
+        for i in range(200):
+            queue.submit(f"{n}-{i}", lambda: None)
+            queue.flush()
+
+    threads = [threading.Thread(target=submit_and_flush, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = queue.get_metrics()
+    assert metrics["writes_submitted"] == 800
+    assert metrics["queue_depth"] == 0
+
+def test_writes_after_shutdown_go_straight_through(tmp_path):
+    queue = WriteBehindQueue(window=60, lock_file=str(tmp_path / "write_behind.lock"))
+    queue.shutdown()
+    written = []
+    assert queue.submit("a", lambda: written.append("a"))
+    assert written == ["a"]
+
+@pytest.mark.skipif(fcntl is None, reason="needs POSIX file locks")
+def test_second_process_is_refused(queue, tmp_path):
+    lock_file = tmp_path / "write_behind.lock"
+    assert queue.submit("a", lambda: None)
+
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path[:0] = {sys.path!r}
+        from app.services.write_behind import WriteBehindQueue
+        queue = WriteBehindQueue(window=60, lock_file={str(lock_file)!r})
+        print(queue.submit("a", lambda: None), queue.active)
+    """)
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.stdout.split() == ["False", "False"], result.stderr
+
+def test_cached_storage_hands_out_copies(tmp_path, monkeypatch, queue):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(local_storage, "get_write_behind_queue", lambda: queue)
+    storage = local_storage.LocalInterviewStorage(data_file=str(tmp_path / "interviews.json"))
+
+    interview = {"job_id": "job1", "messages": [{"role": "user", "content": "hi"}]}
+    interview_id = storage.save_interview(interview)
+    interview["messages"].append({"role": "user", "content": "mutated after save"})
+
+    loaded = storage.get_interview(interview_id)
+    assert len(loaded["messages"]) == 1
+    loaded["messages"].clear()
+    assert len(storage.get_interview(interview_id)["messages"]) == 1
+
+    storage.save_interview({"job_id": "job2"})
+    listed = storage.list_interviews(job_id="job1")
+    assert [i["id"] for i in listed] == [interview_id]
+    listed[0]["job_id"] = "changed"
+    assert storage.get_interview(interview_id)["job_id"] == "job1"
+
+    queue.flush()
+    assert storage._read_file(str(tmp_path / "interviews.json"))[interview_id]["job_id"] == "job1"
@@ -61,6 +61,7 @@ export const Home = () => {
     const [experience, setExperience] = useState("");
     const [position, setPosition] = useState("");
     interface Job {
+        id: string;
         match_percentage: number;
         title: string;
         company: string;
@@ -130,6 +131,63 @@ export const Home = () => {
         }
     }, [experience]);
 
+    // Reads the NDJSON stream from /api/match-jobs/stream, showing each match as soon as it arrives
+    const streamMatches = async (profileText: string, jobKeyword: string) => {
+        const response = await fetch("http://localhost:5000/api/match-jobs/stream", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json"
+            },
+            body: JSON.stringify({
+                profile_text: profileText,
+                job_keyword: jobKeyword
+            })
+        });
+
+        if (!response.ok || !response.body) {
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.error || `Job matching failed: ${response.status}: ${response.statusText}`);
+        }
+
+        setJobs([]);
+        const received: Job[] = [];
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        const handleLine = (line: string) => {
+            if (!line.trim()) {
+                return;
+            }
+            const event = JSON.parse(line);
+            if (event.error) {
+                throw new Error(event.error);
+            }
+            if (event.match) {
+                received.push(event.match);
+                setJobs([...received]);
+            } else if (event.done) {
+                // Final order by match percentage
+                const rank = new Map<string, number>(event.order.map((id: string, i: number) => [id, i]));
+                setJobs([...received].sort((a, b) => (rank.get(a.id) ?? 0) - (rank.get(b.id) ?? 0)));
+            }
+        };
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split("\n");
+            buffer = lines.pop() ?? "";
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer + decoder.decode());
+
+        return received.length;
+    };
+
     const validateForm = () => {
         let valid = true;
         const newErrors = { position: "", experience: "" };
@@ -193,60 +251,12 @@ export const Home = () => {
                 const analysis = extractData.analysis || {};
                 const profileText = analysis.user_summary || extractData.text || "";
 
-                // Use the regular match-jobs API with the extracted text
-                URL = "http://localhost:5000/api/match-jobs";
-                const matchResponse = await fetch(URL, {
-                    method: "POST",
-                    headers: {
-                        "Content-Type": "application/json"
-                    },
-                    body: JSON.stringify({
-                        profile_text: profileText,
-                        job_keyword: position
-                    })
-                });
-
-                if (!matchResponse.ok) {
-                    throw new Error(`Job matching failed: ${matchResponse.status}: ${matchResponse.statusText}`);
-                }
-
-                const responseData = await matchResponse.json();
-
-                if (responseData.error) {
-                    throw new Error(responseData.error);
-                }
-
-                setJobs(responseData.matches || []);
+                const matchCount = await streamMatches(profileText, position);
 
                 // Log success message
-                console.log(`Found ${responseData.matches?.length || 0} jobs matching your CV for position: ${position}`);
+                console.log(`Found ${matchCount} jobs matching your CV for position: ${position}`);
             } else {
-                // Use regular JSON for text-based submission
-                const data = {
-                    profile_text: experience,
-                    job_keyword: position,
-                };
-
-                URL = "http://localhost:5000/api/match-jobs";
-                const response = await fetch(URL, {
-                    method: "POST",
-                    headers: {
-                        "Content-Type": "application/json"
-                    },
-                    body: JSON.stringify(data)
-                });
-
-                if (!response.ok) {
-                    throw new Error(`Server returned ${response.status}: ${response.statusText}`);
-                }
-
-                const responseData = await response.json();
-
-                if (responseData.error) {
-                    throw new Error(responseData.error);
-                }
-
-                setJobs(responseData.matches || []);
+                await streamMatches(experience, position);
             }
 
         } catch (error: any) {
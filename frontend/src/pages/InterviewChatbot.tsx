@@ -54,6 +54,7 @@ export const InterviewChatbot = () => {
     const [messages, setMessages] = useState<Message[]>([]);
     const [isInterviewEnded, setIsInterviewEnded] = useState(false);
     const [interviewSummary, setInterviewSummary] = useState<InterviewSummary | null>(null);
+    const [sessionId, setSessionId] = useState<string | null>(null);
     const [isSaving, setIsSaving] = useState(false);
     const [isSaved, setIsSaved] = useState(false);
     const [saveError, setSaveError] = useState<string | null>(null);
@@ -140,9 +141,9 @@ export const InterviewChatbot = () => {
                 headers: {
                     'Content-Type': 'application/json'
                 },
+                // Starts a server-side session; later turns only send the new reply
                 body: JSON.stringify({
-                    job: job,
-                    messages: []
+                    job: job
                 })
             });
 
@@ -151,6 +152,7 @@ export const InterviewChatbot = () => {
             }
 
             const data = await response.json();
+            setSessionId(data.sessionId ?? null);
 
             // Check if interview ends at the beginning (shouldn't happen, but just in case)
             if (data.endSummary && Object.keys(data.endSummary).length > 0) {
@@ -172,6 +174,27 @@ export const InterviewChatbot = () => {
         }
     };
 
+    // The end summary is generated alongside the closing message; poll until it is ready
+    const pollInterviewSummary = async (id: string) => {
+        for (let attempt = 0; attempt < 90; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            try {
+                const response = await fetch(`http://localhost:5000/api/conversation/${id}/summary`);
+                if (!response.ok) continue;
+
+                const data = await response.json();
+                if (data.status === 'ready' && data.endSummary && Object.keys(data.endSummary).length > 0) {
+                    setInterviewSummary(data.endSummary);
+                    return;
+                }
+                if (data.status === 'failed') break;
+            } catch (error) {
+                console.error('Error polling interview summary:', error);
+            }
+        }
+        console.error('Interview summary did not become available');
+    };
+
     const handleInput = (e: React.ChangeEvent<HTMLTextAreaElement>) => {
         const textarea = textareaRef.current;
         setValue(e.target.value);
@@ -228,7 +251,11 @@ export const InterviewChatbot = () => {
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({
+                body: JSON.stringify(sessionId ? {
+                    session_id: sessionId,
+                    message: userMessage.message,
+                    message_id: userMessage.id
+                } : {
                     job: job,
                     messages: [...messages, userMessage]
                 })
@@ -244,6 +271,9 @@ export const InterviewChatbot = () => {
             if (aiMessage.endSummary && Object.keys(aiMessage.endSummary).length > 0) {
                 setIsInterviewEnded(true);
                 setInterviewSummary(aiMessage.endSummary);
+            } else if (aiMessage.summaryPending && sessionId) {
+                setIsInterviewEnded(true);
+                pollInterviewSummary(sessionId);
             }
 
             // Add AI response to chat